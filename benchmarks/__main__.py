@@ -0,0 +1,30 @@
+"""Run every benchmark and emit JSON results
+
+Usage:
+    python -m benchmarks [--quick] [--output FILE]
+"""
+from __future__ import annotations
+
+import argparse
+
+from benchmarks import overhead, startup, validation
+from benchmarks.common import report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='run 1/20 of iterations')
+    parser.add_argument('--output', help='JSON file of results, stdout if not given')
+    args = parser.parse_args()
+
+    scale = 0.05 if args.quick else 1.0
+    results = (
+        overhead.run(scale)
+        + validation.run(max(1, int(2000 * scale)))
+        + startup.run(3 if args.quick else 10)
+    )
+    report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Timing and reporting helpers shared by benchmarks"""
+from __future__ import annotations
+
+from typing import Any, Callable
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    *,
+    number: int,
+    repeat: int = 5,
+    **params
+) -> dict[str, Any]:
+    """Time the function and return seconds per call as a result record
+
+    The function runs `number` times in each of `repeat` rounds after
+    one warm-up call. `min` is the most stable number for comparison.
+    """
+    fn()
+    rounds = [
+        t / number for t in timeit.repeat(fn, number=number, repeat=repeat)
+    ]
+    return {
+        'benchmark': name,
+        'params': params,
+        'number': number,
+        'repeat': repeat,
+        'min': min(rounds),
+        'median': statistics.median(rounds),
+        'mean': statistics.fmean(rounds)
+    }
+
+
+def environment() -> dict[str, Any]:
+    """Machine and revision on which benchmarks ran"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'revision': revision,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+
+def report(results: list[dict[str, Any]], output: str | None = None) -> None:
+    """Write results as JSON to the file (stdout if None),
+    and a readable table to stderr"""
+    document = {'environment': environment(), 'results': results}
+
+    if output is None:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+    else:
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+
+    for result in results:
+        params = ' '.join(f'{k}={v}' for k, v in result['params'].items())
+        print(
+            f'{result["benchmark"]:<24} {params:<28} '
+            f'{result["min"] * 1e6:12.1f} us',
+            file=sys.stderr
+        )
@@ -0,0 +1,168 @@
+"""Framework overhead of running runnables with no-op operations
+
+Measures a no-op `Task.run`, `Pipeline` depth scaling, `Group` fan-out
+width, nested Group/Pipeline trees, sync vs `arun` vs process pool
+execution of the same group, and compiled plans vs runs of the tree.
+
+Usage:
+    python -m benchmarks.overhead [--quick] [--output FILE] [--only NAME ...]
+"""
+from __future__ import annotations
+
+from typing import Any, Callable
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+
+from sprinkler import Task, Pipeline, Group, Runtime
+
+from benchmarks.common import measure, report
+
+
+def noop(x: int) -> int:
+    return x
+
+
+def make_pipeline(depth: int) -> Pipeline:
+    return Pipeline('p').add(*[Task(f't{i}', noop) for i in range(depth)])
+
+
+def make_group(width: int) -> Group:
+    return Group('g').add(*[Task(f't{i}', noop) for i in range(width)])
+
+
+def make_tree(depth: int, width: int, prefix: str = 'n') -> Group:
+    """Group of pipelines of groups ... with `width ** (depth + 1)` tasks"""
+    group = Group(prefix)
+    for i in range(width):
+        id_ = f'{prefix}{i}'
+        if depth == 0:
+            group.add(Task(id_, noop))
+        else:
+            group.add(Pipeline(id_).add(make_tree(depth - 1, width, id_)))
+    return group
+
+
+def bench_task(scale: float) -> list[dict[str, Any]]:
+    task = Task('t', noop)
+    untyped = Task('t', lambda x: x)
+    return [
+        measure('task_noop', lambda: task.run(1), number=int(20000 * scale)),
+        measure('task_noop_untyped', lambda: untyped.run(1), number=int(20000 * scale))
+    ]
+
+
+def bench_pipeline_depth(scale: float) -> list[dict[str, Any]]:
+    results = []
+    for depth in (1, 10, 100, 1000):
+        pipeline = make_pipeline(depth)
+        results.append(measure(
+            'pipeline_depth', lambda: pipeline.run(1),
+            number=max(1, int(20000 * scale / depth)), depth=depth
+        ))
+    return results
+
+
+def bench_group_width(scale: float) -> list[dict[str, Any]]:
+    results = []
+    runtime = Runtime()
+    for width in (1, 10, 100):
+        group = make_group(width)
+        results.append(measure(
+            'group_width', lambda: group.run(__default__=1, __executor__=runtime),
+            number=max(1, int(5000 * scale / width)), width=width
+        ))
+    runtime.shutdown()
+    return results
+
+
+def bench_nested(scale: float) -> list[dict[str, Any]]:
+    results = []
+    runtime = Runtime()
+    for depth, width in ((1, 4), (2, 4), (3, 3)):
+        tree = make_tree(depth, width)
+        tasks = width ** (depth + 1)
+        results.append(measure(
+            'nested_tree', lambda: tree.run(__default__=1, __executor__=runtime),
+            number=max(1, int(5000 * scale / tasks)),
+            depth=depth, width=width, tasks=tasks
+        ))
+    runtime.shutdown()
+    return results
+
+
+def bench_execution(scale: float) -> list[dict[str, Any]]:
+    width = 16
+    group = make_group(width)
+    number = max(1, int(500 * scale))
+    results = []
+
+    with Runtime() as runtime:
+        results.append(measure(
+            'execution', lambda: group.run(__default__=1, __executor__=runtime),
+            number=number, mode='runtime', width=width
+        ))
+
+    loop = asyncio.new_event_loop()
+    results.append(measure(
+        'execution', lambda: loop.run_until_complete(group.arun(__default__=1)),
+        number=number, mode='arun', width=width
+    ))
+    loop.close()
+
+    with ProcessPoolExecutor(2) as pool:
+        results.append(measure(
+            'execution', lambda: group.run(__default__=1, __executor__=pool),
+            number=max(1, number // 10), mode='process_pool', width=width
+        ))
+
+    return results
+
+
+def bench_compiled(scale: float) -> list[dict[str, Any]]:
+    results = []
+    for depth in (10, 100):
+        pipeline = make_pipeline(depth)
+        plan = pipeline.compile()
+        number = max(1, int(20000 * scale / depth))
+        results.append(measure(
+            'compiled', lambda: pipeline.run(1),
+            number=number, mode='run', depth=depth
+        ))
+        results.append(measure(
+            'compiled', lambda: plan.run(1),
+            number=number, mode='plan', depth=depth
+        ))
+    return results
+
+
+SUITES: dict[str, Callable[[float], list[dict[str, Any]]]] = {
+    'task': bench_task,
+    'pipeline_depth': bench_pipeline_depth,
+    'group_width': bench_group_width,
+    'nested': bench_nested,
+    'execution': bench_execution,
+    'compiled': bench_compiled
+}
+
+
+def run(scale: float = 1.0, only: list[str] | None = None) -> list[dict[str, Any]]:
+    results = []
+    for name, suite in SUITES.items():
+        if only is None or name in only:
+            results.extend(suite(scale))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='run 1/20 of iterations')
+    parser.add_argument('--output', help='JSON file of results, stdout if not given')
+    parser.add_argument('--only', nargs='+', choices=list(SUITES))
+    args = parser.parse_args()
+
+    report(run(0.05 if args.quick else 1.0, args.only), args.output)
+
+
+if __name__ == '__main__':
+    main()
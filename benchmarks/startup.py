@@ -0,0 +1,111 @@
+"""Import cost of the sprinkler package
+
+Runs each import statement in a fresh interpreter with `-X importtime`
+and reports the cumulative import time of modules it loaded beyond the
+interpreter startup, the modules costing most, and whether optional
+backends (openai, aiohttp, pydantic) were imported.
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--top N] [--output FILE]
+"""
+from __future__ import annotations
+
+from typing import Any
+import argparse
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+
+STATEMENTS = {
+    'import': 'import sprinkler',
+    'core': 'from sprinkler import Task, Pipeline, Group',
+    'define_task': (
+        'from sprinkler import Task\n'
+        'Task("t", lambda a: a)'
+    ),
+    'chat': 'from sprinkler.runnable.task import ChatCompletionTask'
+}
+
+BACKENDS = ('openai', 'aiohttp', 'pydantic')
+
+
+def import_times(statement: str) -> list[tuple[str, int, int, int]]:
+    """Imports of the statement in a fresh interpreter
+
+    Returns:
+        list of (module, depth, self, cumulative) with times in
+        microseconds, in order of `-X importtime` output where nested
+        imports (depth > 0) come before their parents
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_, cumulative, name = line[len('import time:'):].split('|')
+        # one space after the bar, then two spaces per level
+        name = name[1:].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(self_), int(cumulative)))
+    return imports
+
+
+def measure_import(name: str, statement: str, repeat: int, top: int) -> dict[str, Any]:
+    baseline = {module for module, *_ in import_times('pass')}
+
+    rounds = []
+    for _ in range(repeat):
+        imports = [
+            import_ for import_ in import_times(statement)
+            if import_[0] not in baseline
+        ]
+        loaded = [(module, cumulative) for module, _, _, cumulative in imports]
+        # nested imports are included in their top-level parents
+        total = sum(
+            cumulative for _, depth, _, cumulative in imports if depth == 0
+        )
+        rounds.append((total / 1e6, loaded))
+
+    total, loaded = min(rounds, key=lambda round_: round_[0])
+    modules = {module for module, _ in loaded}
+
+    return {
+        'benchmark': 'startup',
+        'params': {'statement': name},
+        'number': 1,
+        'repeat': repeat,
+        'min': total,
+        'median': statistics.median(t for t, _ in rounds),
+        'mean': statistics.fmean(t for t, _ in rounds),
+        'modules': len(modules),
+        'backends': [backend for backend in BACKENDS if backend in modules],
+        'top': sorted(loaded, key=lambda item: -item[1])[:top]
+    }
+
+
+def run(repeat: int = 10, top: int = 10) -> list[dict[str, Any]]:
+    return [
+        measure_import(name, statement, repeat, top)
+        for name, statement in STATEMENTS.items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help='the number of costly modules')
+    parser.add_argument('--output', help='JSON file of results, stdout if not given')
+    args = parser.parse_args()
+
+    report(run(args.repeat, args.top), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Per-call overhead of Task input/output validation
+
+Compares the cached validators built once per task (on first access,
+see `Task._build_models`) with the previous behavior of rebuilding
+the pydantic models on every call.
+
+Usage:
+    python -m benchmarks.validation [--number N]
+"""
+from __future__ import annotations
+
+from typing import Any, List
+import argparse
+import timeit
+
+from pydantic import create_model, ConfigDict
+
+from sprinkler import Task
+
+from benchmarks.common import measure
+
+
+def operation(a: int, b: str, c: List[int] = []) -> str:
+    return b * a
+
+
+def run_rebuilding_models(task: Task) -> None:
+    """Emulate the validation path before the models were cached"""
+    input_model = create_model(
+        f'TaskInput_{task.id}',
+        **task._input_model_config,
+        __config__=ConfigDict(arbitrary_types_allowed=True)
+    )
+    output_model = create_model(
+        f'TaskOutput_{task.id}',
+        **task._output_model_config,
+        __config__=ConfigDict(arbitrary_types_allowed=True)
+    )
+    input_ = input_model.model_validate({'a': 3, 'b': 'x'}).model_dump()
+    output = task.operation(**input_)
+    output_model.model_validate({'return': output}).model_dump()
+
+
+def run(number: int = 2000) -> list[dict[str, Any]]:
+    """Result records for `python -m benchmarks`"""
+    task = Task('task', operation)
+    return [
+        measure('validation', lambda: run_rebuilding_models(task),
+                number=number, models='rebuilt'),
+        measure('validation', lambda: task.run(3, 'x'),
+                number=number, models='cached')
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    task = Task('task', operation)
+
+    before = timeit.timeit(lambda: run_rebuilding_models(task), number=args.number)
+    after = timeit.timeit(lambda: task.run(3, 'x'), number=args.number)
+
+    print(f'rebuild models per call: {before / args.number * 1e6:10.1f} us/call')
+    print(f'cached models:           {after / args.number * 1e6:10.1f} us/call')
+    print(f'speedup:                 {before / after:10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,52 @@
-from sprinkler.runnable import Runnable, Task, Pipeline, Group, Ann, Ctx, K
-from sprinkler.context import Context
-
-__all__ = [
-    'Runnable',
-    'Task',
-    'Pipeline',
-    'Group',
-    'Context'
-    'Ann',
-    'Ctx',
-    'K'
-]
\ No newline at end of file
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from sprinkler.runnable import Runnable, Task, Pipeline, Group, DAG, Ann, Ctx, K
+    from sprinkler.context import Context
+    from sprinkler.validation import Validation
+    from sprinkler.runtime import Runtime
+    from sprinkler.retry import RetryPolicy, RetryError
+    from sprinkler.hedge import Hedge
+    from sprinkler.tracing import Tracer
+    from sprinkler.worker import WorkerPool
+
+
+# exported names and their modules, imported on first access (PEP 562)
+# so that `import sprinkler` stays cheap
+_exports = {
+    'Runnable': 'sprinkler.runnable',
+    'Task': 'sprinkler.runnable',
+    'Pipeline': 'sprinkler.runnable',
+    'Group': 'sprinkler.runnable',
+    'DAG': 'sprinkler.runnable',
+    'Context': 'sprinkler.context',
+    'Validation': 'sprinkler.validation',
+    'Runtime': 'sprinkler.runtime',
+    'WorkerPool': 'sprinkler.worker',
+    'RetryPolicy': 'sprinkler.retry',
+    'RetryError': 'sprinkler.retry',
+    'Hedge': 'sprinkler.hedge',
+    'Tracer': 'sprinkler.tracing',
+    'Ann': 'sprinkler.runnable',
+    'Ctx': 'sprinkler.runnable',
+    'K': 'sprinkler.runnable'
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str) -> Any:
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,568 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+from collections import OrderedDict
+from types import CodeType, FunctionType
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import zlib
+
+from sprinkler.constants import null
+from sprinkler.utils import LazyModule
+
+
+sqlite3 = LazyModule('sqlite3')
+
+
+def _encode(value: Any) -> str:
+    """Canonical JSON of value tagged with its type for stable hash
+
+    Containers are tagged, so tuples and lists (or dictionaries with
+    keys `1` and `'1'`) are encoded differently. Items of dictionaries
+    and sets are sorted by their encoding, so keys of mixed types
+    can be encoded.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return json.dumps(value)
+    if isinstance(value, list):
+        return '["l",[' + ','.join(map(_encode, value)) + ']]'
+    if isinstance(value, tuple):
+        return '["t",[' + ','.join(map(_encode, value)) + ']]'
+    if isinstance(value, dict):
+        items = sorted(
+            '[' + _encode(key) + ',' + _encode(item) + ']'
+            for key, item in value.items()
+        )
+        return '["d",[' + ','.join(items) + ']]'
+    if isinstance(value, (set, frozenset)):
+        return '["s",[' + ','.join(sorted(map(_encode, value))) + ']]'
+    if isinstance(value, bytes):
+        return '["b",' + json.dumps(value.hex()) + ']'
+    if hasattr(value, 'model_dump'):
+        return '["m",' + _encode(value.model_dump()) + ']'
+
+    try:
+        return '["p",' + json.dumps(pickle.dumps(value, protocol=4).hex()) + ']'
+    except Exception as e:
+        raise TypeError(f'{type(value).__name__} object can\'t be hashed.') from e
+
+
+def stable_hash(*values: Any) -> str:
+    """Hash of values which is stable across processes and restarts
+
+    Raises:
+        TypeError: if a value can't be encoded (nor pickled)
+    """
+    return hashlib.sha256(_encode(values).encode()).hexdigest()
+
+
+def code_digest(code: CodeType) -> str:
+    """Hash of compiled code, which changes when the code is edited"""
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode())
+
+    for const in code.co_consts:
+        # repr of nested code objects has their address, so their digest is used
+        if isinstance(const, CodeType):
+            digest.update(code_digest(const).encode())
+        else:
+            digest.update(repr(const).encode())
+
+    return digest.hexdigest()
+
+
+# values of closure which are part of the code, others are state
+_CONSTANT_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _global_names(code: CodeType) -> Iterator[str]:
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _global_names(const)
+
+
+def _update_function_digest(digest: Any, function: FunctionType, seen: set[int]) -> None:
+    if id(function) in seen:
+        return
+    seen.add(id(function))
+    digest.update(code_digest(function.__code__).encode())
+
+    for cell in function.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # the cell isn't assigned yet
+            continue
+        if isinstance(value, FunctionType):
+            _update_function_digest(digest, value, seen)
+        elif isinstance(value, _CONSTANT_TYPES):
+            digest.update(repr(value).encode())
+
+    for name in _global_names(function.__code__):
+        value = function.__globals__.get(name)
+        if isinstance(value, FunctionType):
+            digest.update(name.encode())
+            _update_function_digest(digest, value, seen)
+
+
+def function_digest(function: Any) -> str | None:
+    """Hash of a function with its closure and the functions it calls
+
+    Python functions referenced by global names or in the closure are
+    followed, so editing a helper changes the digest of its callers.
+    Constants in the closure are included. Other values (objects,
+    classes, methods, modules and mutable globals) are not followed,
+    so editing them doesn't change the digest.
+
+    Returns:
+        None if the function isn't written in Python (e.g. builtins)
+    """
+    if not hasattr(function, '__code__'):
+        # callable object
+        function = getattr(function, '__call__', None)
+    function = getattr(function, '__func__', function)
+    if not isinstance(function, FunctionType):
+        return None
+
+    digest = hashlib.sha256()
+    _update_function_digest(digest, function, set())
+    return digest.hexdigest()
+
+
+class Cache:
+    """Base class of caches for results of operations
+
+    Caches are shared resources, so they are not copied with context.
+    Missing keys are reported by `null`.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+    def stats(self) -> dict[str, int]:
+        """Counters of cache for monitoring"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self)
+        }
+
+
+    def _count(self, value: Any) -> Any:
+        if value is null:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+
+    def __deepcopy__(self, memo: dict) -> Cache:
+        return self
+
+
+class LRUCache(Cache):
+    """In-process cache evicting least recently used values
+
+    Attributes:
+        maxsize: the maximum number of values, unbounded if None
+        ttl: seconds until a value expires, never if None
+    """
+
+    maxsize: int | None
+    ttl: float | None
+
+    def __init__(
+        self,
+        maxsize: int | None = 1024,
+        *,
+        ttl: float | None = None
+    ) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                return self._count(null)
+
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return self._count(null)
+
+            self._data.move_to_end(key)
+            return self._count(value)
+
+
+    def set(self, key: str, value: Any) -> None:
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        # lock can't be pickled, the copy gets its own lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(Cache):
+    """Cache stored in SQLite database which survives restarts
+
+    Values are pickled.
+
+    Attributes:
+        path: path of database file
+        ttl: seconds until a value expires, never if None
+    """
+
+    path: str
+    ttl: float | None
+
+    def __init__(self, path: str, *, ttl: float | None = None) -> None:
+        super().__init__()
+        self.path = str(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)'
+            )
+
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, created FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                return self._count(null)
+
+            value, created = row
+            if self.ttl is not None and created + self.ttl <= time.time():
+                with self._connection:
+                    self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self.evictions += 1
+                return self._count(null)
+
+            self.hits += 1
+
+        return pickle.loads(value)
+
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)',
+                (key, blob, time.time())
+            )
+
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM cache')
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the copy connects to the same database file
+        state = self.__dict__.copy()
+        del state['_lock'], state['_connection']
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class TieredCache(Cache):
+    """Caches looked up in order, values found later are promoted
+
+    e.g. `TieredCache(LRUCache(), SQLiteCache('cache.db'))`
+    """
+
+    tiers: tuple[Cache, ...]
+
+    def __init__(self, *tiers: Cache) -> None:
+        super().__init__()
+        if not tiers:
+            raise ValueError('TieredCache needs at least one cache.')
+        self.tiers = tiers
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str) -> Any:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not null:
+                for upper in self.tiers[:i]:
+                    upper.set(key, value)
+                with self._lock:
+                    return self._count(value)
+
+        with self._lock:
+            return self._count(null)
+
+
+    def set(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+    def __len__(self) -> int:
+        return len(self.tiers[0])
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+    def stats(self) -> dict[str, Any]:
+        stats = super().stats()
+        stats['tiers'] = [tier.stats() for tier in self.tiers]
+        return stats
+
+
+class DiskCache(Cache):
+    """Content-addressed cache of compressed pickles in a directory
+
+    Each value is stored in a file named by its key, so the directory
+    can be shared by processes and survives restarts. Files are written
+    atomically. Reading a value renews its modification time, and the
+    least recently used files are removed first when the cache exceeds
+    `max_bytes`.
+
+    Attributes:
+        directory: the directory of cache files
+        max_bytes: the maximum total size of files, unbounded if None
+        max_age: seconds until a value expires, never if None
+        level: zlib compression level
+    """
+
+    directory: str
+    max_bytes: int | None
+    max_age: float | None
+    level: int
+
+    SUFFIX = '.pkl.z'
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        level: int = 6
+    ) -> None:
+        super().__init__()
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.level = level
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + self.SUFFIX)
+
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.max_age is not None and mtime + self.max_age <= now
+
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+
+        try:
+            if self._expired(os.path.getmtime(path), time.time()):
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+                    return self._count(null)
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+
+        except FileNotFoundError:
+            with self._lock:
+                return self._count(null)
+
+        with self._lock:
+            self.hits += 1
+
+        return pickle.loads(zlib.decompress(data))
+
+
+    def set(self, key: str, value: Any) -> None:
+        data = zlib.compress(
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.level
+        )
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+
+        if self.max_bytes is not None:
+            self.prune()
+
+
+    def _entries(self) -> Iterator[tuple[str, os.stat_result]]:
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(self.SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except FileNotFoundError:
+                        continue
+
+
+    def prune(self) -> int:
+        """Remove expired values, then least recently used values
+        until the total size is within `max_bytes`
+
+        Returns:
+            the number of removed values
+        """
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+
+        for path, stat in entries:
+            if not (
+                self._expired(stat.st_mtime, now)
+                or (self.max_bytes is not None and total > self.max_bytes)
+            ):
+                continue
+
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._entries())
+
+
+    def size(self) -> int:
+        """The total size of cache files in bytes"""
+        return sum(stat.st_size for _, stat in self._entries())
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Any
+import os
+import pickle
+import shutil
+import threading
+import warnings
+
+from sprinkler.cache import stable_hash
+
+
+class CheckpointStore:
+    """Local store of outputs of pipeline members during a run
+
+    Each run of pipeline has its own directory which holds the key of
+    the run input and one file per completed member. Files are written
+    atomically, so a crash never leaves a broken checkpoint.
+
+    Attributes:
+        directory: the directory of checkpoints
+    """
+
+    directory: str
+
+    META = 'meta.pkl'
+
+    def __init__(self, directory: str) -> None:
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def _run_dir(self, pipeline_id: str, run_id: str) -> str:
+        return os.path.join(self.directory, stable_hash(pipeline_id, run_id))
+
+
+    @staticmethod
+    def _write(path: str, value: Any) -> None:
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            os.remove(temp)
+            raise
+        os.replace(temp, path)
+
+
+    @staticmethod
+    def _read(path: str) -> Any:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+    def load(
+        self,
+        pipeline_id: str,
+        run_id: str,
+        input_key: str | None
+    ) -> list[tuple[str, str | None, Any]]:
+        """Records of completed members of the run
+
+        The run starts over if it was checkpointed with another input.
+
+        Returns:
+            list of (member id, member fingerprint, output) in order
+        """
+        run_dir = self._run_dir(pipeline_id, run_id)
+        meta = os.path.join(run_dir, self.META)
+
+        try:
+            if self._read(meta) == input_key:
+                records = []
+                while True:
+                    path = os.path.join(run_dir, f'{len(records)}.pkl')
+                    if not os.path.exists(path):
+                        return records
+                    records.append(self._read(path))
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass
+
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir)
+        self._write(meta, input_key)
+        return []
+
+
+    def save(
+        self,
+        pipeline_id: str,
+        run_id: str,
+        index: int,
+        record: tuple[str, str, Any]
+    ) -> bool:
+        """Save the record of member at index after its completion
+
+        Returns:
+            whether the record was saved, False with a warning if the
+            output can't be pickled
+        """
+        run_dir = self._run_dir(pipeline_id, run_id)
+
+        # records after a resumed point belong to an older run
+        stale = os.path.join(run_dir, f'{index + 1}.pkl')
+        if os.path.exists(stale):
+            for name in os.listdir(run_dir):
+                if name != self.META and int(name.split('.')[0]) > index:
+                    os.remove(os.path.join(run_dir, name))
+
+        path = os.path.join(run_dir, f'{index}.pkl')
+        try:
+            self._write(path, record)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # the record of an older run isn't the output of this run
+            if os.path.exists(path):
+                os.remove(path)
+            warnings.warn(
+                f'Output of \'{record[0]}\' can\'t be checkpointed: {e}',
+                RuntimeWarning
+            )
+            return False
+        return True
+
+
+    def clear(self, pipeline_id: str, run_id: str) -> None:
+        """Remove the checkpoint of the run"""
+        shutil.rmtree(self._run_dir(pipeline_id, run_id), ignore_errors=True)
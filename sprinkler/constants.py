@@ -4,7 +4,14 @@ DEFAULT_GROUP_INPUT_KEY = '__default__'
 
 class _Null:
     def __bool__(self): return False
+    def __reduce__(self): return 'null'
 
 null = _Null()
 
-DEFAULT_OPENAI_MODEL = 'gpt-3.5-turbo'
\ No newline at end of file
+DEFAULT_OPENAI_MODEL = 'gpt-3.5-turbo'
+
+DEFAULT_CHAT_CONCURRENCY = 8
+
+DEFAULT_BATCH_CONCURRENCY = 16
+
+DEFAULT_STREAM_BUFFER = 16
\ No newline at end of file
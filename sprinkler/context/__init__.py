@@ -1 +1,2 @@
-from sprinkler.context.base import Context
\ No newline at end of file
+from sprinkler.context.base import Context
+from sprinkler.context.query import Path, QueryPlan
\ No newline at end of file
@@ -1,28 +1,124 @@
 from __future__ import annotations
 
 from typing import Any
+from collections import ChainMap
 from collections.abc import Iterable
+from copy import deepcopy
 
 from sprinkler.constants import null
-from sprinkler.utils import recursive_search
+from sprinkler.context.query import Path
 
 
 class Context:
     """Context for task and pipline(process)
-    
+
+    Global context is a chain of read-only layers shared with its parents
+    plus a writable overlay of its own, so creating the context for
+    a run doesn't copy any value (see `child`). History context is
+    layered the same way, from id of runnable to its output.
+
+    Values of the context of a runnable are copied into the overlay of
+    the run when they are first read, so a run can't change them for
+    the other runs. Values given to a run are passed by reference.
+
     Attributes:
-        output: output of previous tasks
         global_context: context values for being used in entire process
         history_context: context values for recording context for specific task (monitoring)
+        copies: pairs of layer of a runnable and the overlay of run
+        its values are copied into, None if it is not a run
     """
 
-    global_context: dict
-    history_context: dict
-    
+    global_context: ChainMap
+    history_context: ChainMap
+    copies: list[tuple[dict, dict]] | None
+
     def __init__(self) -> None:
         """Initializes all contexts to empty dictionary"""
-        self.global_context = {} 
-        self.history_context = {}
+        self.global_context = ChainMap()
+        self.history_context = ChainMap()
+        self.copies = None
+
+
+    def child(self, context: dict[str, Any] | Context | None = None) -> Context:
+        """Create the context for a run on top of this context
+
+        The child shares the layers of this context (and of the given
+        context) without copying them. Values given by `context` take
+        priority over the values of this context, and writes on the child
+        never reach its parents. History is shared by layers as well, so
+        a pipeline of N members doesn't copy its history N times.
+
+        If this context belongs to a runnable, its values are copied
+        into the overlay of the child on their first read (see `resolve`).
+
+        Args:
+            context: values or context given to the run
+
+        Returns:
+            new context whose cost doesn't depend on the size of values
+        """
+        overlay = {}
+
+        if self.copies is None:
+            copies = [(m, overlay) for m in self.global_context.maps if m]
+        else:
+            copies = list(self.copies)
+        if isinstance(context, Context) and context.copies:
+            copies[:0] = context.copies
+
+        # overlays receiving copies are kept even if they are empty yet
+        targets = {id(target) for _, target in copies}
+        global_maps = [m for m in self.global_context.maps if m or id(m) in targets]
+        history_maps = [m for m in self.history_context.maps if m]
+
+        if isinstance(context, Context):
+            global_maps[:0] = [
+                m for m in context.global_context.maps if m or id(m) in targets
+            ]
+            history_maps[:0] = [m for m in context.history_context.maps if m]
+
+        child = Context.__new__(Context)
+        child.global_context = ChainMap(overlay, *global_maps)
+        child.history_context = ChainMap({}, *history_maps)
+        child.copies = copies
+
+        if isinstance(context, dict):
+            child.add_global(context)
+
+        return child
+
+
+    def resolve(self, path: Path) -> Any:
+        """Retrieve a value in context by compiled path
+
+        priority: history(if task_id is specifed) -> global
+
+        Values given to a run are returned by reference, so callbacks,
+        clients and collectors act on the objects given. A value of the
+        context of a runnable is deep-copied into the overlay of its run
+        on the first read, and later reads of the run share the copy.
+
+        Returns:
+            the value or `null` if it doesn't exist in context
+        """
+        head = path.head
+
+        if head in self.history_context:
+            result = path.follow(self.history_context[head])
+            if result is not null:
+                return result
+
+        for mapping in self.global_context.maps:
+            if head in mapping:
+                value = mapping[head]
+                for layer, overlay in self.copies or ():
+                    if layer is mapping:
+                        # concurrent readers of a run share one copy
+                        value = overlay.setdefault(head, deepcopy(value))
+                        break
+                return path.follow(value)
+
+        return null
 
 
     def query(self, queries: Iterable) -> dict[str, Any]:
@@ -30,7 +126,7 @@ class Context:
 
         result doesn't include value which doesn't exist in context
         priority: history(if task_id is specifed) -> global
-        
+
         Args:
             queries: key-value pair with {argument_name}: {source}
 
@@ -40,22 +136,17 @@ class Context:
         context = {}
 
         for query in queries:
-
-            result = recursive_search(query, self.history_context)
+            result = self.resolve(Path(query))
 
             if result is not null:
                 context[query] = result
-            else:
-                result = recursive_search(query, self.global_context)
-                if result is not null:
-                    context[query] = result
 
         return context
 
-    
+
     def add_global(self, context: dict[str, Any]) -> None:
         """Add some values to global context
-        
+
         Args:
             context: dictionary with {source}: {value}
         """
@@ -66,14 +157,14 @@ class Context:
 
     def add_history(self, output: Any, runnable_id: str) -> None:
         """Record specific tasks's output to history context
-        
+
         Args:
             output: output of task
             task_id: identifier of task
         """
         if runnable_id in self.history_context:
             raise Exception(f'{runnable_id} is already recorded in history context.')
-        self.history_context.update({runnable_id: output})
+        self.history_context[runnable_id] = output
 
 
     def update(self, context: Context) -> None:
@@ -89,6 +180,5 @@ class Context:
         Returns:
             dictionary representation of all contexts
         """
-        return (f'Global Context: {self.global_context}\n'
-                + f'History Context: {self.history_context}\n'
-                + f'Output: {self.output}\n')
\ No newline at end of file
+        return (f'Global Context: {dict(self.global_context)}\n'
+                + f'History Context: {dict(self.history_context)}\n')
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any
+from collections.abc import Iterable
+
+from sprinkler.constants import null
+
+
+class Path:
+    """Compiled key for searching a value in nested containers
+
+    The first element of key is looked up directly in the mapping
+    (e.g. id of runnable in history context) and the remaining
+    elements are followed from the found value.
+
+    Attributes:
+        key: original key (e.g. `K('t1', 0)`)
+        head: the first element of key, `null` for empty key
+        tail: the remaining elements of key
+    """
+
+    __slots__ = ('key', 'head', 'tail')
+
+    key: Any
+    head: Any
+    tail: tuple
+
+    def __init__(self, key: Iterable) -> None:
+        parts = tuple(key)
+
+        self.key = key
+        self.head = parts[0] if parts else null
+        self.tail = parts[1:]
+
+
+    def follow(self, target: Any) -> Any:
+        """Follow the tail of key from the target"""
+        try:
+            for k in self.tail:
+                target = target[k]
+        except (TypeError, KeyError):
+            return null
+
+        return target
+
+
+    def resolve(self, target: Any) -> Any:
+        """Search the whole key from the target, `null` if not exists"""
+        if self.head is null:
+            return target
+
+        try:
+            target = target[self.head]
+        except (TypeError, KeyError):
+            return null
+
+        return self.follow(target)
+
+
+class QueryPlan:
+    """Compiled queries of a task for context and its arguments
+
+    Built once per task from its static key maps
+    (`Task._ctx_with_key`, `Task._param_with_key`).
+
+    Attributes:
+        entries: tuple of compiled path and parameter names
+    """
+
+    __slots__ = ('entries',)
+
+    entries: tuple[tuple[Path, list[str]], ...]
+
+    def __init__(self, key_with_params: dict[Any, list[str]]) -> None:
+        self.entries = tuple(
+            (Path(key), params) for key, params in key_with_params.items()
+        )
+
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+from collections import deque
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+import asyncio
+import threading
+import time
+
+from sprinkler.runtime import Runtime, get_default_runtime
+
+
+class Hedge:
+    """Policy launching a duplicate attempt of slow calls
+
+    If the first attempt hasn't finished after the hedge delay, the same
+    call is attempted again and the output of whichever finishes first
+    is used. The other attempt is cancelled (asyncio) or its output is
+    dropped (threads, which can't be stopped). An attempt which fails
+    while the other is running is ignored, and the error of the first
+    attempt is raised if both fail.
+
+    The delay is the `percentile` of latencies of recent attempts, or
+    `initial_delay` until `min_samples` are recorded. Successful attempts
+    are recorded at their latency, and attempts cut short by the other
+    at the time they ran.
+
+    Attributes:
+        percentile: the percentile of latencies used as delay
+        initial_delay: seconds of delay before enough latencies are recorded
+        window: the number of recent latencies kept
+        min_samples: the number of latencies needed to use the percentile
+        calls: the number of hedged calls
+        fired: the number of duplicate attempts launched
+        won: the number of calls whose duplicate attempt finished first
+    """
+
+    percentile: float
+    initial_delay: float
+    window: int
+    min_samples: int
+    calls: int
+    fired: int
+    won: int
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        *,
+        initial_delay: float = 1.0,
+        window: int = 256,
+        min_samples: int = 16
+    ) -> None:
+        if not 0 < percentile <= 100:
+            raise ValueError('percentile must be in (0, 100].')
+        if initial_delay < 0:
+            raise ValueError('initial_delay must not be negative.')
+
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.window = window
+        self.min_samples = max(1, min_samples)
+        self.calls = self.fired = self.won = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+    def delay(self) -> float:
+        """Seconds to wait for the first attempt before hedging"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+
+        index = round(self.percentile / 100 * (len(latencies) - 1))
+        return latencies[index]
+
+
+    def record(self, latency: float) -> None:
+        """Record the latency of an attempt"""
+        with self._lock:
+            self._latencies.append(latency)
+
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'fired': self.fired,
+            'won': self.won,
+            'delay': self.delay()
+        }
+
+
+    def _winner(self, attempts: list[Any], done: set[Any]) -> Any:
+        """The first successful attempt in done, None if not decided yet
+
+        Raises:
+            the error of the first attempt if every attempt failed
+        """
+        for attempt in attempts:
+            if attempt in done and attempt.exception() is None:
+                if attempt is not attempts[0]:
+                    self._count('won')
+                return attempt
+
+        if all(attempt.done() for attempt in attempts):
+            raise attempts[0].exception()
+        return None
+
+
+    def _finish(self, attempts: list[Any], starts: list[float], winner: Any) -> None:
+        """Cancel attempts still running and record latencies
+
+        Attempts cut short by the winner are recorded at the time they
+        ran, a lower bound of their latency, so slow attempts stay in the
+        window and the delay doesn't drift down.
+        """
+        now = time.monotonic()
+        for attempt, start in zip(attempts, starts):
+            if attempt is winner:
+                self.record(now - start)
+            elif not attempt.done():
+                cancelled = attempt.cancel()
+                # an attempt in threads cancelled before it started never ran
+                if isinstance(attempt, asyncio.Future) or not cancelled:
+                    self.record(now - start)
+
+
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args,
+        executor: Executor | None = None
+    ) -> Any:
+        """Call the function with hedging in threads of the runtime
+
+        Attempts run in the executor of the run if it is a `Runtime`,
+        otherwise in the default runtime.
+        """
+        self._count('calls')
+        runtime = executor if isinstance(executor, Runtime) else get_default_runtime()
+        attempts: list[Future] = [runtime.submit(func, *args)]
+        starts = [time.monotonic()]
+        winner = None
+
+        try:
+            done, pending = wait(attempts, self.delay())
+            if not done:
+                self._count('fired')
+                attempts.append(runtime.submit(func, *args))
+                starts.append(time.monotonic())
+                pending = set(attempts)
+
+            winner = self._winner(attempts, done)
+            while winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                winner = self._winner(attempts, done)
+            return winner.result()
+        finally:
+            self._finish(attempts, starts, winner)
+
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Asynchronous version of `call`, the slower attempt is cancelled"""
+        self._count('calls')
+        attempts: list[asyncio.Future] = [asyncio.ensure_future(func(*args))]
+        starts = [time.monotonic()]
+        winner = None
+
+        try:
+            done, pending = await asyncio.wait(attempts, timeout=self.delay())
+            if not done:
+                self._count('fired')
+                attempts.append(asyncio.ensure_future(func(*args)))
+                starts.append(time.monotonic())
+                pending = set(attempts)
+
+            winner = self._winner(attempts, done)
+            while winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = self._winner(attempts, done)
+            return winner.result()
+        finally:
+            self._finish(attempts, starts, winner)
+
+
+    def __repr__(self) -> str:
+        return (
+            f'Hedge(percentile={self.percentile}, '
+            f'initial_delay={self.initial_delay}, window={self.window})'
+        )
@@ -1,15 +1,21 @@
+from __future__ import annotations
 
-
-from typing import Any, List, Dict, Union
+from typing import Any, Callable, List, Dict, Union
+from weakref import WeakKeyDictionary
+import asyncio
 import json
 
-import openai
-
 from sprinkler import constants
+from sprinkler.utils import LazyModule
+from sprinkler.cache import Cache, stable_hash
+from sprinkler.retry import RetryPolicy, is_transient
 from sprinkler.runnable.task.base import Ann, Ctx
 from sprinkler.prompt_template import PromptTemplate
 
 
+openai = LazyModule('openai')
+
+
 def construct_messages(
     messages: Ctx[List[Union[str, Dict, PromptTemplate]]],
     input_variables: Ann[Dict[str, Any]]
@@ -37,6 +43,198 @@ def construct_messages(
     return messages
 
 
+_concurrency_limits: Dict[str, int] = {}
+_semaphores: WeakKeyDictionary = WeakKeyDictionary()
+_sessions: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def set_concurrency_limit(model: str, limit: int) -> None:
+    """Limit the number of concurrent async chat completions of the model
+
+    The limit applies per event loop, `constants.DEFAULT_CHAT_CONCURRENCY`
+    is used for the models without limit.
+    """
+    if limit < 1:
+        raise ValueError('Concurrency limit must be positive.')
+    _concurrency_limits[model] = limit
+
+    for semaphores in _semaphores.values():
+        semaphores.pop(model, None)
+
+
+def _get_semaphore(model: str) -> asyncio.Semaphore:
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+
+    if model not in semaphores:
+        semaphores[model] = asyncio.Semaphore(
+            _concurrency_limits.get(model, constants.DEFAULT_CHAT_CONCURRENCY)
+        )
+    return semaphores[model]
+
+
+async def _close_on_shutdown(session: Any):
+    # async generators are closed by `loop.shutdown_asyncgens`
+    # (e.g. at the end of `asyncio.run`), closing the session with them
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+async def _get_session() -> Any:
+    """HTTP session shared by requests in the running loop (keep-alive)
+
+    The session is closed when the loop shuts down its async generators
+    or by `close_session`.
+    """
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session, closer = _sessions.get(loop, (None, None))
+
+    if session is None or session.closed:
+        session = aiohttp.ClientSession()
+        closer = _close_on_shutdown(session)
+        await closer.__anext__()
+        _sessions[loop] = (session, closer)
+    return session
+
+
+async def close_session() -> None:
+    """Close the HTTP session shared by requests in the running loop"""
+    _, closer = _sessions.pop(asyncio.get_running_loop(), (None, None))
+    if closer is not None:
+        await closer.aclose()
+
+
+def _completion_kwargs(**kwargs) -> Dict[str, Any]:
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Whether the error of OpenAI API is worth retrying"""
+    if isinstance(error, (
+        openai.error.RateLimitError,
+        openai.error.APIConnectionError,
+        openai.error.Timeout,
+        openai.error.ServiceUnavailableError,
+        openai.error.TryAgain
+    )):
+        return True
+    return is_transient(error)
+
+
+def _retry_policy(retry: RetryPolicy | None, retry_count: int) -> RetryPolicy:
+    if retry is not None:
+        return retry
+    return RetryPolicy(retry_count, retry_on=_is_retryable)
+
+
+def _cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    whole_output: bool,
+    kwargs: Dict[str, Any]
+) -> str:
+    # user does not change the response, but backends (api base)
+    # may serve different models under the same name
+    params = {k: v for k, v in kwargs.items() if k != 'user'}
+    return stable_hash(model, messages, whole_output, params)
+
+
+def _parse_completion(
+    response: Any,
+    whole_output: bool,
+    n: int | None,
+    functions: List[Dict] | None
+) -> Union[Dict, List, str]:
+    if whole_output:
+        return json.loads(json.dumps(response))
+
+    if n is None:
+        n = 1
+
+    msg_key = 'content' if functions is None else 'function_call'
+    output = [response['choices'][i]['message'][msg_key] for i in range(n)]
+        
+    if n == 1:
+        return output[0]
+    else:
+        return output
+
+
+class _StreamAssembler:
+    """Assemble chunks of streamed chat completion into a response
+
+    Each delta of content (arguments for function call) is passed to
+    `on_delta` as soon as its chunk arrives.
+    """
+
+    def __init__(self, on_delta: Callable[[str], Any] | None) -> None:
+        self.on_delta = on_delta
+        self.response = {}
+        self.content = []
+        self.function_call = None
+        self.finish_reason = None
+
+
+    def add(self, chunk: Any) -> None:
+        if not self.response:
+            self.response = {
+                k: chunk.get(k) for k in ('id', 'created', 'model')
+            }
+            self.response['object'] = 'chat.completion'
+
+        for choice in chunk['choices']:
+            delta = choice.get('delta', {})
+            text = delta.get('content')
+
+            if 'function_call' in delta:
+                call = delta['function_call']
+                if self.function_call is None:
+                    self.function_call = {'name': '', 'arguments': ''}
+                self.function_call['name'] += call.get('name') or ''
+                text = call.get('arguments')
+                self.function_call['arguments'] += text or ''
+            elif text:
+                self.content.append(text)
+
+            if text and self.on_delta is not None:
+                self.on_delta(text)
+
+            if choice.get('finish_reason') is not None:
+                self.finish_reason = choice['finish_reason']
+
+
+    def result(self) -> Dict[str, Any]:
+        message = {
+            'role': 'assistant',
+            'content': ''.join(self.content) if self.function_call is None else None
+        }
+        if self.function_call is not None:
+            message['function_call'] = self.function_call
+
+        self.response['choices'] = [{
+            'index': 0,
+            'message': message,
+            'finish_reason': self.finish_reason
+        }]
+        return self.response
+
+
+def _check_stream(n: int | None) -> None:
+    if n is not None and n > 1:
+        raise ValueError('Streamed chat completion supports only one choice.')
+
+
+def _cached(cache: Cache, key: str, on_delta: Callable[[str], Any] | None) -> Any:
+    output = cache.get(key)
+    # cached output arrives as one delta
+    if output is not constants.null and on_delta is not None and isinstance(output, str):
+        on_delta(output)
+    return output
+
+
 def chat_completion(
     messages: Ann[List[Dict[str, Any]]],
     whole_output: Ctx[bool] = False,
@@ -53,58 +251,171 @@ def chat_completion(
     stop: Ctx[Union[str, List]] = None,
     temperature: Ctx[float] = None,
     top_p: Ctx[float]= None,
-    user: Ctx[str] = None 
+    user: Ctx[str] = None,
+    api_base: Ctx[str] = None,
+    cache: Ctx[Cache] = None,
+    retry: Ctx[RetryPolicy] = None,
+    stream: Ctx[bool] = False,
+    on_delta: Ctx[Callable[[str], Any]] = None
 ) -> Union[Dict, List, str]:
     """OpenAI ChatGPT chat completion request
     
     Attributes:
         whole_output: if True, return whole output of response(dictonary),
         it not, return only content (function call if functions exsists)
-        retry_count: the number of retries if error exists API request,
-        default is 1.
+        retry_count: the maximum number of attempts of API request with
+        exponential backoff, default is 1.
+        api_base: base url of API, default is the url of OpenAI
+        cache: `Cache` for responses keyed by model, messages and
+        sampling parameters, not cached if None
+        retry: `RetryPolicy` for API request, overrides retry_count
+        stream: if True, receive the completion as a stream of deltas,
+        the output is assembled from them (only one choice)
+        on_delta: function called with each delta of content
+        (or function call arguments) as it arrives, if stream is True
+
+    Raises:
+        RetryError: if every attempt failed with retryable error
 
         other attributes is from 
         https://platform.openai.com/docs/api-reference/chat/create
     """
 
-    kwargs = {
-        'frequency_penalty': frequency_penalty,
-        'function_call': function_call,
-        'functions': functions,
-        'logit_bias': logit_bias,
-        'max_tokens': max_tokens,
-        'n': n,
-        'presence_penalty': presence_penalty,
-        'stop': stop,
-        'temperature': temperature,
-        'top_p': top_p,
-        'user': user
-    }   
-
-    for _ in range(retry_count):  
+    kwargs = _completion_kwargs(
+        frequency_penalty=frequency_penalty,
+        function_call=function_call,
+        functions=functions,
+        logit_bias=logit_bias,
+        max_tokens=max_tokens,
+        n=n,
+        presence_penalty=presence_penalty,
+        stop=stop,
+        temperature=temperature,
+        top_p=top_p,
+        user=user,
+        api_base=api_base
+    )
+
+    if stream:
+        _check_stream(n)
+
+    if cache is not None:
+        key = _cache_key(model, messages, whole_output, kwargs)
+        output = _cached(cache, key, on_delta if stream else None)
+        if output is not constants.null:
+            return output
+
+    response = _retry_policy(retry, retry_count).call(
+        openai.ChatCompletion.create,
+        model = model,
+        messages = messages,
+        stream = stream,
+        **kwargs
+    )
+
+    if stream:
+        # only opening the stream is retried
+        assembler = _StreamAssembler(on_delta)
+        for chunk in response:
+            assembler.add(chunk)
+        response = assembler.result()
+
+    output = _parse_completion(response, whole_output, n, functions)
+    if cache is not None:
+        cache.set(key, output)
+    return output
+
+
+async def achat_completion(
+    messages: Ann[List[Dict[str, Any]]],
+    whole_output: Ctx[bool] = False,
+    *,
+    model: Ctx[str] = constants.DEFAULT_OPENAI_MODEL,
+    retry_count: Ctx[int] = 1,
+    frequency_penalty: Ctx[float] = None,
+    function_call: Ctx[Union[str, dict]] = None,
+    functions: Ctx[List[Dict]] = None,
+    logit_bias: Ctx[Dict[int, float]] = None,
+    max_tokens: Ctx[int] = None,
+    n: Ctx[int] = None,
+    presence_penalty: Ctx[float] = None,
+    stop: Ctx[Union[str, List]] = None,
+    temperature: Ctx[float] = None,
+    top_p: Ctx[float]= None,
+    user: Ctx[str] = None,
+    api_base: Ctx[str] = None,
+    cache: Ctx[Cache] = None,
+    retry: Ctx[RetryPolicy] = None,
+    stream: Ctx[bool] = False,
+    on_delta: Ctx[Callable[[str], Any]] = None
+) -> Union[Dict, List, str]:
+    """OpenAI ChatGPT chat completion request without blocking event loop
+
+    Requests in the same event loop share an HTTP session (keep-alive),
+    and the number of concurrent requests for each model is limited by
+    `set_concurrency_limit`. Attributes are the same as `chat_completion`,
+    and a cached response is returned without waiting for the limit.
+    """
+
+    kwargs = _completion_kwargs(
+        frequency_penalty=frequency_penalty,
+        function_call=function_call,
+        functions=functions,
+        logit_bias=logit_bias,
+        max_tokens=max_tokens,
+        n=n,
+        presence_penalty=presence_penalty,
+        stop=stop,
+        temperature=temperature,
+        top_p=top_p,
+        user=user,
+        api_base=api_base
+    )
+
+    if stream:
+        _check_stream(n)
+
+    if cache is not None:
+        key = _cache_key(model, messages, whole_output, kwargs)
+        output = _cached(cache, key, on_delta if stream else None)
+        if output is not constants.null:
+            return output
+
+    openai.aiosession.set(await _get_session())
+
+    semaphore = _get_semaphore(model)
+
+    async def request():
+        # backoff waits outside of the concurrency limit,
+        # and stream holds the limit until its end
+        await semaphore.acquire()
         try:
-            response = openai.ChatCompletion.create(
+            response = await openai.ChatCompletion.acreate(
                 model = model,
                 messages = messages,
-                **{k: v for k, v in kwargs.items() if v is not None}
+                stream = stream,
+                **kwargs
             )
+        except BaseException:
+            semaphore.release()
+            raise
 
-        except Exception as e:
-            print(f'API Error: {e}')
-            continue
+        if not stream:
+            semaphore.release()
+        return response
 
-        if whole_output:
-            return json.loads(str(response))
+    response = await _retry_policy(retry, retry_count).acall(request)
 
-        if n is None:
-            n = 1
+    if stream:
+        try:
+            assembler = _StreamAssembler(on_delta)
+            async for chunk in response:
+                assembler.add(chunk)
+            response = assembler.result()
+        finally:
+            semaphore.release()
 
-        msg_key = 'content' if functions is None else 'function_call'
-        output = [response['choices'][i]['message'][msg_key] for i in range(n)]
-            
-        if n == 1:
-            return output[0]
-        else:
-            return output
-    
-    
\ No newline at end of file
+    output = _parse_completion(response, whole_output, n, functions)
+    if cache is not None:
+        cache.set(key, output)
+    return output
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from pydantic import create_model, ValidationError
+from sprinkler.utils import LazyModule
+
+
+pydantic = LazyModule('pydantic')
 
 
 class PromptTemplate:
@@ -45,7 +48,7 @@ class PromptTemplate:
                     _input_config[input_name] = {'type': config}
 
             # create input pydantic model for validation
-            self._input_model = create_model(
+            self._input_model = pydantic.create_model(
                 'PromptInput',
                 **{
                     name: (config['type'], config.get('default') or ...)
@@ -62,7 +65,7 @@ class PromptTemplate:
                     .model_validate(kwargs)
                     .model_dump())
         
-            except ValidationError as e:
+            except pydantic.ValidationError as e:
                 raise Exception(f'PromptTemplate input: {e}')
         else:
             return kwargs
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from typing import Any
+from collections import deque
+import asyncio
+import os
+import threading
+
+
+class _Waiter:
+    """Thread or coroutine waiting for units of resource"""
+
+    __slots__ = ('weight', 'granted', 'event', 'loop', 'future')
+
+    def __init__(self, weight: int, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        self.weight = weight
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._set_future)
+
+
+    def _set_future(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class Resource:
+    """Weighted semaphore shared by threads and event loops
+
+    Waiters are served in order, so a heavy request isn't starved by
+    light ones. Coroutines wait without blocking their event loop, and
+    units can be released from any thread or loop.
+
+    Attributes:
+        name: the name of resource
+        capacity: the total units of resource
+    """
+
+    name: str
+    capacity: int
+
+    def __init__(self, name: str, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be positive.')
+
+        self.name = name
+        self.capacity = capacity
+        self._available = capacity
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+
+    @property
+    def available(self) -> int:
+        """Units not held now"""
+        return self._available
+
+
+    def _check(self, weight: int) -> None:
+        if not 0 < weight <= self.capacity:
+            raise ValueError(
+                f'Resource \'{self.name}\' of capacity {self.capacity} '
+                f'can\'t be acquired by {weight}'
+            )
+
+
+    def _try_acquire(self, weight: int) -> bool:
+        # called with lock, waiters go first
+        if not self._waiters and self._available >= weight:
+            self._available -= weight
+            return True
+        return False
+
+
+    def acquire(self, weight: int = 1) -> None:
+        """Acquire units, blocking the thread until they are available"""
+        self._check(weight)
+        with self._lock:
+            if self._try_acquire(weight):
+                return
+            waiter = _Waiter(weight)
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+
+    async def aacquire(self, weight: int = 1) -> None:
+        """Acquire units without blocking the event loop"""
+        self._check(weight)
+        with self._lock:
+            if self._try_acquire(weight):
+                return
+            waiter = _Waiter(weight, asyncio.get_running_loop())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._available += weight
+                    self._wake_waiters()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+
+    def release(self, weight: int = 1) -> None:
+        with self._lock:
+            self._available += weight
+            self._wake_waiters()
+
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity, units already held stay held"""
+        if capacity < 1:
+            raise ValueError('capacity must be positive.')
+        with self._lock:
+            self._available += capacity - self.capacity
+            self.capacity = capacity
+            self._wake_waiters()
+
+
+    def _wake_waiters(self) -> None:
+        # called with lock
+        while self._waiters and self._waiters[0].weight <= self._available:
+            waiter = self._waiters.popleft()
+            self._available -= waiter.weight
+            waiter.granted = True
+            try:
+                waiter.wake()
+            except RuntimeError:
+                # the loop of waiter is closed
+                self._available += waiter.weight
+
+
+    def _reset(self) -> None:
+        # units held by threads of parent don't exist in the child process
+        self._available = self.capacity
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+
+    def __repr__(self) -> str:
+        return (
+            f'Resource({self.name!r}, capacity={self.capacity}, '
+            f'available={self._available})'
+        )
+
+
+class ResourceRegistry:
+    """Named resources bounding concurrency of tasks across a process
+
+    Tasks declare the units they hold while their operation runs, e.g.
+    `Task(..., resources={'openai': 1})`. The limits apply to every
+    nesting level, thread and event loop of the process. Resources are
+    acquired in order of names, so tasks holding several resources
+    never deadlock. Names without capacity are not limited.
+    """
+
+    def __init__(self) -> None:
+        self._resources = {}
+        self._lock = threading.Lock()
+
+
+    def set(self, name: str, capacity: int) -> Resource:
+        """Define the resource, or change its capacity"""
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                resource = self._resources[name] = Resource(name, capacity)
+            else:
+                resource.resize(capacity)
+        return resource
+
+
+    def get(self, name: str) -> Resource | None:
+        return self._resources.get(name)
+
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._resources.pop(name, None)
+
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resources
+
+
+    def _requested(self, requests: dict[str, int]) -> list[tuple[Resource, int]]:
+        return [
+            (self._resources[name], requests[name])
+            for name in sorted(requests) if name in self._resources
+        ]
+
+
+    def acquire(self, requests: dict[str, int]) -> list[tuple[Resource, int]]:
+        """Acquire units of resources in order of names
+
+        Returns:
+            the units held, given to `release`
+        """
+        held = []
+        try:
+            for resource, weight in self._requested(requests):
+                resource.acquire(weight)
+                held.append((resource, weight))
+        except BaseException:
+            self.release(held)
+            raise
+        return held
+
+
+    async def aacquire(self, requests: dict[str, int]) -> list[tuple[Resource, int]]:
+        """Asynchronous version of `acquire`"""
+        held = []
+        try:
+            for resource, weight in self._requested(requests):
+                await resource.aacquire(weight)
+                held.append((resource, weight))
+        except BaseException:
+            self.release(held)
+            raise
+        return held
+
+
+    @staticmethod
+    def release(held: list[tuple[Resource, int]]) -> None:
+        for resource, weight in reversed(held):
+            resource.release(weight)
+
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        for resource in self._resources.values():
+            resource._reset()
+
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {'capacity': resource.capacity, 'available': resource.available}
+            for name, resource in self._resources.items()
+        }
+
+
+_resource_registry = ResourceRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_resource_registry._reset_after_fork)
+
+
+def get_resource_registry() -> ResourceRegistry:
+    """The resource registry shared by the process"""
+    return _resource_registry
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+from email.utils import parsedate_to_datetime
+import asyncio
+import random
+import time
+
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class RetryError(Exception):
+    """Every attempt allowed by `RetryPolicy` failed
+
+    Attributes:
+        attempts: the number of attempts made
+        last_error: the error of the last attempt
+    """
+
+    attempts: int
+    last_error: BaseException
+
+    def __init__(self, message: str, attempts: int, last_error: BaseException) -> None:
+        super().__init__(message)
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+def _status(error: BaseException) -> int | None:
+    for name in ('http_status', 'status_code', 'status'):
+        status = getattr(error, name, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds to wait given by the error (Retry-After header), if any"""
+    value = getattr(error, 'retry_after', None)
+
+    if value is None:
+        headers = getattr(error, 'headers', None) or {}
+        for key in ('Retry-After', 'retry-after'):
+            if key in headers:
+                value = headers[key]
+                break
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error: BaseException) -> bool:
+    """Default classifier of retryable errors
+
+    Errors with HTTP status are retryable for timeouts, conflicts,
+    rate limits and server errors. Errors without status are retryable
+    if they are connection errors or timeouts.
+    """
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+
+    return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+class RetryPolicy:
+    """Policy retrying failed calls with exponential backoff
+
+    The n-th retry waits a random time up to
+    `min(max_delay, base_delay * multiplier ** (n - 1))` (full jitter),
+    or at least as long as Retry-After of the error.
+    Fatal errors are raised at once, `RetryError` is raised when
+    attempts or time budget run out.
+
+    Attributes:
+        max_attempts: the maximum number of attempts including the first
+        base_delay: seconds to wait before the first retry
+        max_delay: the maximum seconds to wait before a retry
+        multiplier: growth of delay between retries
+        jitter: whether to randomize delays, so that clients failed at
+        the same time do not retry at the same time
+        budget: the maximum seconds from the first attempt until the last
+        retry begins, unlimited if None
+        retry_on: exception types or function deciding whether an error
+        is retryable, `is_transient` if None
+    """
+
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    multiplier: float
+    jitter: bool
+    budget: float | None
+    retry_on: tuple[type[BaseException], ...] | Callable[[BaseException], bool] | None
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        *,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        budget: float | None = None,
+        retry_on: (
+            tuple[type[BaseException], ...]
+            | Callable[[BaseException], bool]
+            | None
+        ) = None
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be positive.')
+        if base_delay < 0 or max_delay < 0:
+            raise ValueError('Delays must not be negative.')
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.budget = budget
+        self.retry_on = retry_on
+
+
+    @classmethod
+    def of(cls, value: RetryPolicy | int | None) -> RetryPolicy | None:
+        """Convert the value given to `Task` into policy
+
+        int is the maximum number of attempts.
+        """
+        if value is None or isinstance(value, RetryPolicy):
+            return value
+        if isinstance(value, int):
+            return cls(value)
+        raise TypeError(f'Invalid retry policy: {value!r}')
+
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if self.retry_on is None:
+            return is_transient(error)
+        if isinstance(self.retry_on, tuple):
+            return isinstance(error, self.retry_on)
+        return self.retry_on(error)
+
+
+    def delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """Seconds to wait after the failure of the attempt (from 1)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        if error is not None:
+            after = retry_after(error)
+            if after is not None:
+                delay = max(delay, after)
+
+        return delay
+
+
+    def _delay_after(
+        self,
+        attempt: int,
+        error: BaseException,
+        start: float
+    ) -> float | None:
+        """Delay before the next attempt, None if the error is fatal
+
+        Raises:
+            RetryError: if no attempt is left in the policy
+        """
+        if not self.is_retryable(error):
+            return None
+
+        if attempt >= self.max_attempts:
+            raise RetryError(
+                f'{attempt} attempts failed: {error!r}', attempt, error
+            ) from error
+
+        delay = self.delay(attempt, error)
+
+        if self.budget is not None and time.monotonic() - start + delay > self.budget:
+            raise RetryError(
+                f'Retry budget of {self.budget}s exhausted after '
+                f'{attempt} attempts: {error!r}',
+                attempt,
+                error
+            ) from error
+
+        return delay
+
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call the function until it succeeds following the policy"""
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._delay_after(attempt, e, start)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Asynchronous version of `call`, waits without blocking event loop"""
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._delay_after(attempt, e, start)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+
+    def __repr__(self) -> str:
+        return (
+            f'RetryPolicy(max_attempts={self.max_attempts}, '
+            f'base_delay={self.base_delay}, max_delay={self.max_delay}, '
+            f'budget={self.budget})'
+        )
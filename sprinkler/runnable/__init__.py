@@ -1,4 +1,7 @@
 from sprinkler.runnable.base import Runnable
+from sprinkler.runnable.batch import BatchResult
 from sprinkler.runnable.task import Task, Ann, Ctx, K
 from sprinkler.runnable.pipeline import Pipeline
-from sprinkler.runnable.group import Group
\ No newline at end of file
+from sprinkler.runnable.group import Group
+from sprinkler.runnable.dag import DAG
+from sprinkler.runnable.plan import Plan
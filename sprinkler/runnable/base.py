@@ -1,13 +1,24 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, Iterator
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+import asyncio
 
 from sprinkler.context.base import Context
+from sprinkler.context.query import Path
+from sprinkler.cache import stable_hash
+from sprinkler.constants import OUTPUT_KEY, DEFAULT_BATCH_CONCURRENCY
+from sprinkler.runtime import Runtime, get_default_runtime
+from sprinkler.runnable.batch import BatchResult
+
+if TYPE_CHECKING:
+    from sprinkler.runnable.plan import Plan
 
 
 class Runnable:
 
     id: str
+    streaming: bool = False
 
     def run(self, *args, **kwargs) -> Any:
         raise NotImplementedError
@@ -35,6 +46,190 @@ class Runnable:
         raise NotImplementedError
     
 
+    def stream_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *args,
+        **kwargs
+    ) -> Iterator[Any]:
+        """Run and yield items of output, the output itself by default"""
+        yield self.run_with_context(context_, *args, **kwargs)
+
+
+    async def astream_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *args,
+        **kwargs
+    ) -> AsyncIterator[Any]:
+        """Run and yield items of output asynchronously"""
+        yield await self.arun_with_context(context_, *args, **kwargs)
+
+
+    def run_batch(
+        self,
+        inputs: Iterable,
+        *,
+        context: dict[str, Any] | Context | None = None,
+        concurrency: int | None = None,
+        __executor__: Executor | None = None
+    ) -> Iterator[BatchResult]:
+        """Run with each of inputs and yield results as they finish
+
+        Each input is given like the output of the previous runnable in
+        pipeline (tuple is distributed to parameters). Inputs are consumed
+        lazily and at most `concurrency` runs are in flight. A failure of
+        a run is reported by its result instead of being raised.
+
+        Args:
+            inputs: iterable of inputs
+            context: context shared by every run
+            concurrency: maximum number of concurrent runs, the number of
+            workers of runtime by default
+        """
+        if __executor__ is None:
+            __executor__ = get_default_runtime()
+
+        if concurrency is None:
+            concurrency = (
+                __executor__.max_workers if isinstance(__executor__, Runtime)
+                else DEFAULT_BATCH_CONCURRENCY
+            )
+
+        member_executor = (
+            __executor__ if isinstance(__executor__, Runtime) else 'asyncio'
+        )
+        context = {} if context is None else context
+        iterator = enumerate(inputs)
+        futures = {}
+
+        def fill():
+            for index, input_ in iterator:
+                future = __executor__.submit(
+                    self.run_with_context,
+                    context,
+                    __executor__=member_executor,
+                    **{OUTPUT_KEY: input_}
+                )
+                futures[future] = (index, input_)
+                if len(futures) >= concurrency:
+                    break
+
+        try:
+            fill()
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index, input_ = futures.pop(future)
+                    try:
+                        yield BatchResult(index, input_, output=future.result())
+                    except Exception as e:
+                        yield BatchResult(index, input_, error=e)
+
+                fill()
+
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+    async def arun_batch(
+        self,
+        inputs: Iterable,
+        *,
+        context: dict[str, Any] | Context | None = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> AsyncIterator[BatchResult]:
+        """Run asynchronously with each of inputs (see `run_batch`)"""
+        context = {} if context is None else context
+        iterator = enumerate(inputs)
+        tasks = {}
+
+        def fill():
+            for index, input_ in iterator:
+                task = asyncio.ensure_future(self.arun_with_context(
+                    context, **{OUTPUT_KEY: input_}
+                ))
+                tasks[task] = (index, input_)
+                if len(tasks) >= concurrency:
+                    break
+
+        try:
+            fill()
+
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    index, input_ = tasks.pop(task)
+                    try:
+                        yield BatchResult(index, input_, output=task.result())
+                    except Exception as e:
+                        yield BatchResult(index, input_, error=e)
+
+                fill()
+
+        finally:
+            # runs left by an early exit finish before the generator closes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+    def compile(self) -> Plan:
+        """Compile the tree into a plan reused by runs of fixed structure
+
+        The plan runs like the runnable (see `plan.Plan`), without
+        walking the tree on every run. Compile after the tree is built,
+        later changes of members or policies aren't reflected.
+        """
+        from sprinkler.runnable.plan import Plan
+        return Plan(self)
+
+
+    def references(self) -> set[str]:
+        """Ids of runnables whose outputs this runnable reads from history"""
+        return set()
+
+
+    def input_references(self) -> set[Any]:
+        """Heads of keys which this runnable reads from its input
+
+        They refer to outputs of other runnables only where the input
+        is made of those outputs (e.g. members of `DAG`).
+        """
+        return set()
+
+
+    def context_paths(self) -> list[Path]:
+        """Paths of context values which this runnable reads"""
+        return []
+
+
+    def context_values(self, context: Context) -> list[Any]:
+        """Values at `context_paths` read by a run with the context
+
+        Values of the context of this runnable are included, like
+        the run reads them on top of the given context.
+        """
+        own = getattr(self, 'context', None)
+        if isinstance(own, Context):
+            context = own.child(context)
+        return [context.resolve(path) for path in self.context_paths()]
+
+
+    def fingerprint(self) -> str:
+        """Hash of what this runnable computes, used as a part of cache keys
+
+        It changes when the structure or the operation changes, so outputs
+        cached by older versions are not reused. Context values aren't
+        included, they are keyed by `context_values` (see `Pipeline`).
+        """
+        return stable_hash(type(self).__module__, type(self).__qualname__, self.id)
+
+
     def make_graph(self, parent=None) -> Any:
         raise NotImplementedError
     
@@ -43,4 +238,54 @@ class Runnable:
         graph = self.make_graph()
 
         graph.layout(prog='dot', args='-Nshape=box')
-        graph.draw(file_path)
\ No newline at end of file
+        graph.draw(file_path)
+
+
+class Container(Runnable):
+    """Runnable made of member runnables (e.g. Pipeline, Group, DAG)
+
+    Attributes:
+        members: the list of `Runnable`
+        member_id_set: the set which contains id of `Runnable`
+    """
+
+    members: list[Runnable]
+    member_id_set: set[str]
+
+    def references(self) -> set[str]:
+        references = set()
+        for runnable in self.members:
+            references |= runnable.references()
+        return references - self.member_id_set
+
+
+    def input_references(self) -> set[Any]:
+        # every member receives the input of container
+        references = set()
+        for runnable in self.members:
+            references |= runnable.input_references()
+        return references
+
+
+    def context_paths(self) -> list[Path]:
+        paths = []
+        for runnable in self.members:
+            paths.extend(runnable.context_paths())
+        return paths
+
+
+    def context_values(self, context: Context) -> list[Any]:
+        # members read their own context on top of the container's
+        context_for_run = self.context.child(context)
+        values = []
+        for runnable in self.members:
+            values.extend(runnable.context_values(context_for_run))
+        return values
+
+
+    def fingerprint(self) -> str:
+        return stable_hash(
+            type(self).__qualname__,
+            self.id,
+            [runnable.fingerprint() for runnable in self.members]
+        )
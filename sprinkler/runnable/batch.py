@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class BatchResult:
+    """Result of one input of `Runnable.run_batch`
+
+    Attributes:
+        index: position of the input in the given inputs
+        input: the input itself
+        output: output of the run, None if it failed
+        error: exception raised by the run, None if it succeeded
+    """
+
+    __slots__ = ('index', 'input', 'output', 'error')
+
+    index: int
+    input: Any
+    output: Any
+    error: BaseException | None
+
+    def __init__(
+        self,
+        index: int,
+        input_: Any,
+        output: Any = None,
+        error: BaseException | None = None
+    ) -> None:
+        self.index = index
+        self.input = input_
+        self.output = output
+        self.error = error
+
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+    def unwrap(self) -> Any:
+        """Output of the run, raise the error if it failed"""
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f'BatchResult(index={self.index}, error={self.error!r})'
+        return f'BatchResult(index={self.index}, output={self.output!r})'
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+from functools import partial
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+import asyncio
+
+from sprinkler.runnable.base import Runnable, Container
+from sprinkler.context.base import Context
+from sprinkler.constants import OUTPUT_KEY
+from sprinkler.validation import Validation
+from sprinkler.tracing import traced
+from sprinkler.runtime import Runtime, get_default_runtime
+
+
+class DAG(Container):
+    """The graph of `Runnable` running as soon as their inputs exist
+
+    Dependencies are inferred from the keys of `Ann` and `Ctx` annotations
+    (e.g. `Ann[str, 't1']`, `Ctx[int, K('t1', 0)]`) which refer to other
+    members. `Ctx` keys read outputs from history, while `Ann` keys of
+    input count only if every key the member reads from its input refers
+    to a member. Members reading `Ann` keys of members receive those
+    outputs as dictionary of {id}: {output}, the others receive inputs
+    like `Group` (after their `Ctx` dependencies finish). Independent
+    members run concurrently.
+
+    Attributes:
+        id: identifer of `Runnable`.
+        members: the list of `Runnable`.
+        member_id_set: the set which contains id of `Runnable`
+        context: the global context values for dag instance
+    """
+
+    id: str
+    members: list[Runnable]
+    member_id_set: set[str]
+    context: Context
+
+    def __init__(
+        self,
+        id_: str,
+        *,
+        context: dict[str, Any] | None = None
+    ) -> None:
+        """Initializes the dag instance with context
+
+        Args:
+            context:
+        """
+        self.id = id_
+        self.members = []
+        self.member_id_set = set()
+        self.context = Context()
+
+        if context:
+            self.context.add_global(context)
+
+
+    def add(self, *args: Runnable) -> DAG:
+        """Add the `Runnable` instance to dag"""
+        for runnable in args:
+            if not isinstance(runnable, Runnable):
+                raise TypeError('Given task parameter is not `Runnable` instance')
+
+            if runnable.id in self.member_id_set:
+                raise Exception(f'`Runnable` \'{runnable.id}\' is already exsists')
+
+            self.members.append(runnable)
+            self.member_id_set.add(runnable.id)
+
+        return self
+
+
+    def _output_keys(self, runnable: Runnable) -> set[str]:
+        """Keys of input of member which refer to outputs of members
+
+        Input of member is made of outputs of members only if every key
+        it reads refers to a member, otherwise (e.g. `Ann[str, 'name']`
+        reading a field of given input) the keys aren't dependencies.
+        """
+        keys = runnable.input_references() - {runnable.id}
+        return keys if keys <= self.member_id_set else set()
+
+
+    def input_references(self) -> set[Any]:
+        # members not reading outputs of members receive the input of dag
+        references = set()
+        for runnable in self.members:
+            if not self._output_keys(runnable):
+                references |= runnable.input_references()
+        return references
+
+
+    def dependencies(self) -> dict[str, set[str]]:
+        """Ids of members which each member depends on
+
+        Raises:
+            Exception: if dependencies of members have a cycle
+        """
+        dependencies = {
+            runnable.id: (
+                (runnable.references() | self._output_keys(runnable)) & self.member_id_set
+            ) - {runnable.id}
+            for runnable in self.members
+        }
+
+        # check cycle by removing members without dependencies
+        remaining = {id_: set(deps) for id_, deps in dependencies.items()}
+        while remaining:
+            roots = [id_ for id_, deps in remaining.items() if not deps]
+            if not roots:
+                raise Exception(f'DAG {self.id}: cycle in {sorted(remaining)}')
+            for id_ in roots:
+                del remaining[id_]
+            for deps in remaining.values():
+                deps.difference_update(roots)
+
+        return dependencies
+
+
+    def _scheduler_for_run(
+        self,
+        context_: dict[str, Any] | Context,
+        inputs: dict[str, Any],
+        default: Any,
+        method_name: str,
+        validation: Validation | None = None
+    ) -> _Scheduler:
+
+        context_for_run = self.context.child(context_)
+
+        if OUTPUT_KEY in inputs:
+            default = inputs[OUTPUT_KEY]
+
+        dependencies = self.dependencies()
+        # dependencies only in context read history instead of input
+        output_keys = {runnable.id: self._output_keys(runnable) for runnable in self.members}
+
+        def make_call(runnable: Runnable, outputs: dict[str, Any]) -> Callable:
+            keys = output_keys[runnable.id]
+            input_ = (
+                {id_: outputs[id_] for id_ in keys} if keys
+                else inputs.get(runnable.id, default)
+            )
+
+            return partial(
+                getattr(runnable, method_name),
+                context_for_run.child(),
+                __validation__=validation,
+                **{OUTPUT_KEY: input_}
+            )
+
+        return _Scheduler(self.members, dependencies, context_for_run, make_call)
+
+
+    def run(
+        self,
+        *,
+        __executor__: Executor | None = None,
+        __default__: Any = None,
+        **inputs
+    ) -> dict[str, Any]:
+        """Run the dag and return outputs of members nothing depends on"""
+        return self.run_with_context(
+            {},
+            __executor__=__executor__,
+            __default__=__default__,
+            **inputs
+        )
+
+
+    @traced('dag')
+    def run_with_context(
+        self,
+        context: dict[str, Any] | Context,
+        *,
+        __executor__: Executor | None = None,
+        __default__: Any = None,
+        __validation__: Validation | None = None,
+        **inputs
+    ) -> dict[str, Any]:
+
+        if __executor__ is None:
+            __executor__ = get_default_runtime()
+
+        if __executor__ == 'asyncio':
+            return asyncio.run(self.arun_with_context(
+                context,
+                __default__=__default__,
+                __validation__=__validation__,
+                **inputs
+            ))
+
+        scheduler = self._scheduler_for_run(
+            context, inputs, __default__, 'run_with_context', __validation__
+        )
+        member_executor = (
+            __executor__ if isinstance(__executor__, Runtime) else 'asyncio'
+        )
+        futures = {}
+
+        def submit_ready():
+            for id_, func in scheduler.ready():
+                future = __executor__.submit(func, __executor__=member_executor)
+                futures[future] = id_
+
+        submit_ready()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                id_ = futures.pop(future)
+                try:
+                    scheduler.complete(id_, future.result())
+                except BaseException:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+
+            submit_ready()
+
+        return scheduler.result()
+
+
+    async def arun(
+        self,
+        *,
+        __default__: Any = None,
+        **inputs
+    ) -> Any:
+        return await self.arun_with_context(
+            {},
+            __default__=__default__,
+            **inputs
+        )
+
+
+    @traced('dag')
+    async def arun_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *,
+        __default__: Any = None,
+        __validation__: Validation | None = None,
+        **inputs
+    ) -> Any:
+
+        scheduler = self._scheduler_for_run(
+            context_, inputs, __default__, 'arun_with_context', __validation__
+        )
+        tasks = {}
+
+        def create_ready():
+            for id_, func in scheduler.ready():
+                tasks[asyncio.ensure_future(func())] = id_
+
+        create_ready()
+
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                id_ = tasks.pop(task)
+                try:
+                    scheduler.complete(id_, task.result())
+                except BaseException:
+                    for pending in tasks:
+                        pending.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+
+            create_ready()
+
+        return scheduler.result()
+
+
+    def __call__(
+        self,
+        *,
+        __executor__: Executor | None = None,
+        __default__: Any = None,
+        **inputs
+    ) -> Any:
+        return self.run(
+            __executor__=__executor__,
+            __default__=__default__,
+            **inputs
+        )
+
+
+    def make_graph(self, parent=None) -> Any:
+        from pygraphviz import AGraph
+
+        if parent is None:
+            graph = AGraph(directed=True, name=f'cluster_{self.id}', label=self.id, compound='true')
+        else:
+            graph = parent.add_subgraph(name=f'cluster_{self.id}', label=self.id)
+
+        children = {
+            runnable.id: runnable.make_graph(graph) for runnable in self.members
+        }
+
+        for id_, deps in self.dependencies().items():
+            child = children[id_]
+            for dep in deps:
+                dep_child = children[dep]
+                attrs = {}
+                if dep_child.name is not None:
+                    attrs['ltail'] = dep_child.name
+                if child.name is not None:
+                    attrs['lhead'] = child.name
+
+                graph.add_edge(
+                    dep_child.nodes()[-1],
+                    child.nodes()[-1],
+                    **attrs
+                )
+
+        return graph
+
+
+class _Scheduler:
+    """Tracks which members of dag are ready during a run"""
+
+    def __init__(
+        self,
+        members: list[Runnable],
+        dependencies: dict[str, set[str]],
+        context: Context,
+        make_call: Callable[[Runnable, dict[str, Any]], Callable]
+    ) -> None:
+        self.members = members
+        self.context = context
+        self.make_call = make_call
+        self.outputs = {}
+        self.waiting = {id_: set(deps) for id_, deps in dependencies.items()}
+        self.dependents = {id_: [] for id_ in dependencies}
+        self.sinks = set(dependencies)
+
+        for id_, deps in dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(id_)
+                self.sinks.discard(dep)
+
+
+    def ready(self) -> list[tuple[str, Callable]]:
+        """Calls of members whose dependencies are all completed"""
+        calls = []
+
+        for runnable in self.members:
+            if self.waiting.get(runnable.id) == set():
+                del self.waiting[runnable.id]
+                calls.append((runnable.id, self.make_call(runnable, self.outputs)))
+
+        return calls
+
+
+    def complete(self, id_: str, output: Any) -> None:
+        self.outputs[id_] = output
+        self.context.add_history(output, id_)
+
+        for dependent in self.dependents[id_]:
+            self.waiting[dependent].discard(id_)
+
+
+    def result(self) -> dict[str, Any]:
+        return {
+            runnable.id: self.outputs[runnable.id]
+            for runnable in self.members if runnable.id in self.sinks
+        }
@@ -1,43 +1,97 @@
 from __future__ import annotations
 
-from typing import Any, Generator
+from typing import Any, Generator, Literal
 from functools import partial
-from concurrent.futures import (
-    ThreadPoolExecutor,
-    Executor
-)
-import copy
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
 import asyncio
+import time
 
-from sprinkler.runnable.base import Runnable
+from sprinkler.runnable.base import Runnable, Container
 from sprinkler.context.base import Context
+from sprinkler.cache import stable_hash
 from sprinkler.constants import OUTPUT_KEY
+from sprinkler.validation import Validation
+from sprinkler.tracing import traced
+from sprinkler.runtime import Runtime, get_default_runtime
 
 
-class Group(Runnable):
-    """The group of parallel running `Runnable`"""
+# detached asyncio tasks of stragglers, referenced until they finish
+_detached: set[asyncio.Task] = set()
+
+
+def _forget(task: asyncio.Task) -> None:
+    _detached.discard(task)
+    if not task.cancelled():
+        # retrieve the error, which nobody waits for
+        task.exception()
+
+
+class Group(Container):
+    """The group of parallel running `Runnable`
+
+    By default the group waits for every member. With `mode`, it returns
+    the outputs of the first member ('first') or the first N members
+    (int) which succeeded, and failures of other members are ignored
+    until the quorum can't be reached. Members still running when the
+    group returns or fails (stragglers) are cancelled or detached.
+    Running threads can't be stopped, so cancelled members in threads
+    run to the end and only their outputs are dropped. Detached asyncio
+    members run until the event loop stops.
+
+    Attributes:
+        timeout: the maximum seconds of the group, `TimeoutError` is raised
+        if the quorum isn't reached in time
+        member_timeout: the maximum seconds of each member from its
+        submission, a member timed out fails with `TimeoutError`
+        mode: 'all', 'first' or the number of members to wait for
+        on_straggler: 'cancel' or 'detach'
+    """
 
     id: str
     members: list[Runnable]
     member_id_set: set[str]
     context: Context
+    timeout: float | None
+    member_timeout: float | None
+    mode: Literal['all', 'first'] | int
+    on_straggler: Literal['cancel', 'detach']
     
 
     def __init__(
         self,
         id_: str,
         *,
-        context: dict[str, Any] = None
+        context: dict[str, Any] = None,
+        timeout: float | None = None,
+        member_timeout: float | None = None,
+        mode: Literal['all', 'first'] | int = 'all',
+        on_straggler: Literal['cancel', 'detach'] = 'cancel'
     ) -> None:
         """Initialize the Group with context.
         
         Args:
             context: 
+            timeout: the maximum seconds of the group
+            member_timeout: the maximum seconds of each member
+            mode: 'all', 'first' or the number of members to wait for
+            on_straggler: 'cancel' or 'detach' members left running
         """
+        if not (
+            mode in ('all', 'first')
+            or isinstance(mode, int) and not isinstance(mode, bool) and mode > 0
+        ):
+            raise ValueError(f'Invalid mode: {mode!r}')
+        if on_straggler not in ('cancel', 'detach'):
+            raise ValueError(f'Invalid on_straggler: {on_straggler!r}')
+
         self.id = id_
         self.members = []
         self.member_id_set = set()
         self.context = Context()
+        self.timeout = timeout
+        self.member_timeout = member_timeout
+        self.mode = mode
+        self.on_straggler = on_straggler
 
         if context:
             self.context.add_global(context)
@@ -63,15 +117,11 @@ class Group(Runnable):
         context_: dict[str, Any] | Context,
         inputs: dict[str, Any],
         default: Any,
-        method_name: str
+        method_name: str,
+        validation: Validation | None = None
     ) -> Generator[tuple[str, Any], None, None]:
         
-        context_for_run = copy.deepcopy(self.context)
-
-        if isinstance(context_, dict):
-            context_for_run.add_global(context_)
-        elif isinstance(context_, Context):
-            context_for_run.update(context_)
+        context_for_run = self.context.child(context_)
 
         if OUTPUT_KEY in inputs:
             default = inputs[OUTPUT_KEY]
@@ -82,12 +132,141 @@ class Group(Runnable):
             func = partial(
                 getattr(runnable, method_name), 
                 context_for_run,
+                __validation__=validation,
                 **{OUTPUT_KEY: input_}
             )
 
             yield runnable.id, func
 
 
+    def _waits_all(self) -> bool:
+        return self.mode == 'all' and self.timeout is None and self.member_timeout is None
+
+
+    def _quorum(self) -> int:
+        if self.mode == 'all':
+            return len(self.members)
+        # empty group has nothing to wait for
+        if self.mode == 'first':
+            return min(1, len(self.members))
+        return min(self.mode, len(self.members))
+
+
+    def _next_timeout(
+        self,
+        deadline: float | None,
+        pending: dict[Any, tuple[str, float]]
+    ) -> float | None:
+        ends = [] if deadline is None else [deadline]
+        if self.member_timeout is not None:
+            ends.extend(start + self.member_timeout for _, start in pending.values())
+        return max(0.0, min(ends) - time.monotonic()) if ends else None
+
+
+    def _settle(
+        self,
+        done: set[Any],
+        pending: dict[Any, tuple[str, float]],
+        outputs: dict[str, Any],
+        errors: list[BaseException],
+        deadline: float | None
+    ) -> bool:
+        """Collect finished members, and drop members timed out
+
+        Returns:
+            whether the quorum is reached
+
+        Raises:
+            the error of member in 'all' mode or when the quorum can't be
+            reached, `TimeoutError` when the group timed out
+        """
+        for future in done:
+            id_, _ = pending.pop(future)
+            try:
+                outputs[id_] = future.result()
+            except Exception as e:
+                if self.mode == 'all':
+                    raise
+                errors.append(e)
+
+        now = time.monotonic()
+
+        if self.member_timeout is not None:
+            for future, (id_, start) in list(pending.items()):
+                if now >= start + self.member_timeout:
+                    del pending[future]
+                    self._drop([future])
+                    error = TimeoutError(
+                        f'Member \'{id_}\' of group \'{self.id}\' '
+                        f'timed out after {self.member_timeout}s'
+                    )
+                    if self.mode == 'all':
+                        raise error
+                    errors.append(error)
+
+        if len(outputs) >= self._quorum():
+            return True
+
+        if deadline is not None and now >= deadline:
+            raise TimeoutError(f'Group \'{self.id}\' timed out after {self.timeout}s')
+
+        if len(outputs) + len(pending) < self._quorum():
+            raise errors[0]
+
+        return False
+
+
+    def _drop(self, futures: list[Any]) -> None:
+        """Cancel or detach stragglers"""
+        for future in futures:
+            if self.on_straggler == 'cancel':
+                future.cancel()
+            elif isinstance(future, asyncio.Task):
+                _detached.add(future)
+                future.add_done_callback(_forget)
+
+
+    def _ordered(self, outputs: dict[str, Any]) -> dict[str, Any]:
+        return {
+            runnable.id: outputs[runnable.id]
+            for runnable in self.members if runnable.id in outputs
+        }
+
+
+    def _wait(
+        self,
+        pending: dict[Future, tuple[str, float]],
+        deadline: float | None
+    ) -> dict[str, Any]:
+        outputs, errors, done = {}, [], set()
+        try:
+            while not self._settle(done, pending, outputs, errors, deadline):
+                done, _ = wait(
+                    pending, self._next_timeout(deadline, pending), FIRST_COMPLETED
+                )
+        finally:
+            self._drop(list(pending))
+        return self._ordered(outputs)
+
+
+    async def _await(
+        self,
+        pending: dict[asyncio.Task, tuple[str, float]],
+        deadline: float | None
+    ) -> dict[str, Any]:
+        outputs, errors, done = {}, [], set()
+        try:
+            while not self._settle(done, pending, outputs, errors, deadline):
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self._next_timeout(deadline, pending),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            self._drop(list(pending))
+        return self._ordered(outputs)
+
+
     def run(
         self,
         *,
@@ -105,40 +284,59 @@ class Group(Runnable):
         )
 
 
+    @traced('group')
     def run_with_context(
         self, 
         context: dict[str, Any] | Context,
         *,
         __executor__: Executor | None = None,
         __default__: Any = None,
+        __validation__: Validation | None = None,
         **inputs
     ) -> dict[str, Any]:
 
-        needs_shutdown = False
-
         if __executor__ is None:
-            __executor__ = ThreadPoolExecutor()
-            needs_shutdown = True
+            __executor__ = get_default_runtime()
         
         if __executor__ == 'asyncio':
             results = asyncio.run(self.arun_with_context(
-                context, __default__=__default__, **inputs
+                context,
+                __default__=__default__,
+                __validation__=__validation__,
+                **inputs
             ))
 
         else:
             gen = self._generator_for_run(
-                context, inputs, __default__, 'run_with_context'
+                context, inputs, __default__, 'run_with_context', __validation__
             )
             results = {}
 
-            for id_, func in gen:
-                future = __executor__.submit(func, __executor__='asyncio')
-                results[id_] = future
-            
-            if needs_shutdown:
-                __executor__.shutdown()
-            
-            results = {id_: future.result() for id_, future in results.items()}
+            # runtime is shared with nested runnables, other executors
+            # (e.g. process pool) can't be passed to members
+            member_executor = (
+                __executor__ if isinstance(__executor__, Runtime) else 'asyncio'
+            )
+
+            if self._waits_all():
+                for id_, func in gen:
+                    future = __executor__.submit(func, __executor__=member_executor)
+                    results[id_] = future
+                
+                results = {id_: future.result() for id_, future in results.items()}
+
+            else:
+                deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                pending = {}
+                try:
+                    for id_, func in gen:
+                        future = __executor__.submit(func, __executor__=member_executor)
+                        pending[future] = id_, time.monotonic()
+                except BaseException:
+                    self._drop(list(pending))
+                    raise
+
+                results = self._wait(pending, deadline)
 
         return results
 
@@ -156,19 +354,29 @@ class Group(Runnable):
         )
 
 
+    @traced('group')
     async def arun_with_context(
         self, 
         context_: dict[str, Any] | Context,
         *,
         __default__: Any = None,
+        __validation__: Validation | None = None,
         **inputs
     ) -> Any:
 
-        results = await asyncio.gather(*[
-            func() for _, func in self._generator_for_run(
-                context_, inputs, __default__, 'arun_with_context'
-            )
-        ])
+        gen = self._generator_for_run(
+            context_, inputs, __default__, 'arun_with_context', __validation__
+        )
+
+        if not self._waits_all():
+            start = time.monotonic()
+            deadline = None if self.timeout is None else start + self.timeout
+            pending = {
+                asyncio.ensure_future(func()): (id_, start) for id_, func in gen
+            }
+            return await self._await(pending, deadline)
+
+        results = await asyncio.gather(*[func() for _, func in gen])
         
         results = {
             self.members[i].id: result 
@@ -192,6 +400,10 @@ class Group(Runnable):
         )
 
 
+    def fingerprint(self) -> str:
+        return stable_hash(super().fingerprint(), self.mode)
+
+
     def make_graph(self, parent=None) -> Any:
         from pygraphviz import AGraph
 
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
 from concurrent.futures import Executor
-from typing import Any, Generator
+from typing import Any, AsyncIterator, Generator, Iterator
 from functools import partial
-import copy
+from copy import deepcopy
+import asyncio
+import pickle
+import warnings
 
-from sprinkler.runnable.base import Runnable
+from sprinkler.runnable.base import Runnable, Container
+from sprinkler.runnable.stream import stream_stages, astream_stages
 from sprinkler.context import Context
-from sprinkler.constants import OUTPUT_KEY
+from sprinkler.constants import OUTPUT_KEY, DEFAULT_STREAM_BUFFER, null
+from sprinkler.cache import Cache, stable_hash
+from sprinkler.checkpoint import CheckpointStore
+from sprinkler.validation import Validation
+from sprinkler.tracing import traced
+from sprinkler.runtime import Runtime, get_default_runtime
 
 
-class Pipeline(Runnable):
+class _Blocking(partial):
+    """Blocking I/O of a run (e.g. checkpoint), in a thread for async runs"""
+
+
+class Pipeline(Container):
     """The pipeline which executes `Runnable` serially
 
     Attributes:
@@ -18,28 +31,57 @@ class Pipeline(Runnable):
         members: the list of `Runnable`.
         member_id_set: the set which contains id of `Runnable`
         context: the global context values for pipeline instance
+        validation: the validation policy for tasks in pipeline
+        stream_buffer: the maximum number of items waiting between
+        two streaming stages
+        stage_cache: the cache of outputs of members by their inputs
+        checkpoint: the store of outputs of members during a run
     """
 
     id: str
     members: list[Runnable]
     member_id_set: set[str]
     context: Context
+    validation: Validation | None
+    stream_buffer: int
+    stage_cache: Cache | None
+    checkpoint: CheckpointStore | None
 
     def __init__(
         self,
         id_: str,
         *,
-        context: dict[str, Any] | None = None
+        context: dict[str, Any] | None = None,
+        validation: Validation | str | float | None = None,
+        stream_buffer: int = DEFAULT_STREAM_BUFFER,
+        stage_cache: Cache | None = None,
+        checkpoint: CheckpointStore | None = None
     ) -> None:
         """Initializes the pipeline instance with context
 
         Args:
             context: 
+            validation: the validation policy applied to members which
+            don't have their own policy. With boundary mode, only the input
+            of first member and the output of last member are validated.
+            stream_buffer: the size of queues between streaming stages
+            stage_cache: if given, members whose fingerprint, input and
+            context values are unchanged are skipped and their cached
+            outputs are used, like a build system (e.g. `DiskCache`).
+            Streaming runs don't use the cache.
+            checkpoint: if given, runs with `__run_id__` save the output
+            of each member, and a later run with the same run id and input
+            resumes after the last completed member. The checkpoint is
+            removed when the run succeeds. Streaming runs aren't checkpointed.
         """
         self.id = id_
         self.members= []
         self.member_id_set = set()
         self.context = Context()
+        self.validation = Validation.of(validation)
+        self.stream_buffer = stream_buffer
+        self.stage_cache = stage_cache
+        self.checkpoint = checkpoint
         
         if context:
             self.context.add_global(context)
@@ -62,37 +104,145 @@ class Pipeline(Runnable):
             self.member_id_set.add(runnable.id)
         
         return self
+
+
+    @property
+    def streaming(self) -> bool:
+        """Whether any member yields items into the next members"""
+        return any(runnable.streaming for runnable in self.members)
+
+
+    def _member_validation(
+        self,
+        validation: Validation | None,
+        index: int
+    ) -> Validation | None:
+        """Validation policy given to the member at index"""
+        if validation is None:
+            return None
+
+        return validation.bind(
+            validation.entry and index == 0,
+            validation.exit and index == len(self.members) - 1
+        )
     
 
+    def _stage_key(
+        self,
+        runnable: Runnable,
+        context: Context,
+        args: tuple,
+        kwargs: dict
+    ) -> str | None:
+        """Key of the output of member in stage cache
+
+        None if there is no stage cache or the input can't be hashed.
+        """
+        if self.stage_cache is None:
+            return None
+
+        return self._hash_or_none(lambda: stable_hash(
+            runnable.id,
+            runnable.fingerprint(),
+            args,
+            kwargs,
+            runnable.context_values(context)
+        ))
+
+
+    @staticmethod
+    def _hash_or_none(func, *args) -> str | None:
+        """Result of hashing function, None if the values can't be hashed"""
+        try:
+            return func(*args)
+        except (TypeError, AttributeError, pickle.PicklingError):
+            return None
+
+
     def _generator_for_run(
         self, 
         context: dict[str, Any], 
         args: tuple,
         kwargs: dict,
-        method_name: str
-    ) -> Generator[Any, Any, None]:
+        method_name: str,
+        validation: Validation | None = None,
+        run_id: str | None = None
+    ) -> Generator[Any, Any, Any]:
         
-        context_for_run = copy.deepcopy(self.context)
+        context_for_run = self.context.child(context)
 
-        # add to global context in pipeline
-        if isinstance(context, dict):
-            context_for_run.add_global(context)
-        elif isinstance(context, Context):
-            context_for_run.update(context)
+        # the pipeline declaring its own policy is the boundary
+        if self.validation is not None:
+            validation = self.validation
+
+        output = None
+        checkpointing = run_id is not None and self.checkpoint is not None
+        records = []
+
+        if checkpointing:
+            input_key = self._hash_or_none(stable_hash, args, kwargs)
+            if input_key is None:
+                warnings.warn(
+                    f'Input of pipeline \'{self.id}\' can\'t be hashed, '
+                    'the run isn\'t checkpointed',
+                    RuntimeWarning
+                )
+                checkpointing = False
+            else:
+                records = yield _Blocking(self.checkpoint.load, self.id, run_id, input_key)
+        saving = checkpointing
 
         # run tasks as chain with context
-        for runnable in self.members:
-            func = getattr(runnable, method_name)
-            output = yield partial(
-                func,
-                context_for_run,
-                *args,
-                **kwargs
-            )
+        for i, runnable in enumerate(self.members):
+            if checkpointing:
+                fingerprint = self._hash_or_none(runnable.fingerprint)
+
+                # resume while members are the same as the checkpointed run
+                if (
+                    fingerprint is not None
+                    and i < len(records)
+                    and records[i][:2] == (runnable.id, fingerprint)
+                ):
+                    output = records[i][2]
+                    context_for_run.add_history(output, runnable.id)
+                    args = ()
+                    kwargs = {OUTPUT_KEY: output}
+                    continue
+                del records[i:]
+
+            key = self._stage_key(runnable, context_for_run, args, kwargs)
+            output = null if key is None else self.stage_cache.get(key)
+
+            if output is null:
+                func = getattr(runnable, method_name)
+                output = yield partial(
+                    func,
+                    context_for_run,
+                    *args,
+                    __validation__=self._member_validation(validation, i),
+                    **kwargs
+                )
+                if key is not None:
+                    self.stage_cache.set(key, deepcopy(output))
+            else:
+                output = deepcopy(output)
+
+            if saving:
+                # later members can't resume without the record of this one
+                saving = fingerprint is not None and (yield _Blocking(
+                    self.checkpoint.save,
+                    self.id, run_id, i, (runnable.id, fingerprint, output)
+                ))
+
             context_for_run.add_history(output, runnable.id)
             args = ()
             kwargs = {OUTPUT_KEY: output}
 
+        if checkpointing:
+            yield _Blocking(self.checkpoint.clear, self.id, run_id)
+
+        return output
+
 
     def run(
         self,
@@ -115,23 +265,45 @@ class Pipeline(Runnable):
         )
     
 
+    @traced('pipeline')
     def run_with_context(
         self,
         context: dict[str, Any],
         *args,
         __executor__: Executor | None = None,
+        __validation__: Validation | None = None,
+        __run_id__: str | None = None,
         **kwargs
     ) -> Any:
+        """Run the pipeline with given context synchronously.
+
+        With `checkpoint` of pipeline, `__run_id__` identifies the run
+        to resume.
+        """
+
+        if self.streaming:
+            return list(self.stream_with_context(
+                context,
+                *args,
+                __executor__=__executor__,
+                __validation__=__validation__,
+                **kwargs
+            ))
 
         gen = self._generator_for_run(
-            context, args, kwargs, 'run_with_context'
+            context, args, kwargs, 'run_with_context', __validation__, __run_id__
         )
         output = None
         
         while True:
             try:
-                output = gen.send(output)(__executor__=__executor__)
-            except StopIteration:
+                call = gen.send(output)
+                if isinstance(call, _Blocking):
+                    output = call()
+                else:
+                    output = call(__executor__=__executor__)
+            except StopIteration as stop:
+                output = stop.value
                 break
 
         return output
@@ -149,27 +321,230 @@ class Pipeline(Runnable):
         )
 
 
+    @traced('pipeline')
     async def arun_with_context(
         self,
         context: dict[str, Any] | Context,
         *args,
+        __validation__: Validation | None = None,
+        __run_id__: str | None = None,
         **kwargs
     ) -> Any:
+
+        if self.streaming:
+            return [output async for output in self.astream_with_context(
+                context, *args, __validation__=__validation__, **kwargs
+            )]
         
         gen = self._generator_for_run(
-            context, args, kwargs, 'arun_with_context'
+            context, args, kwargs, 'arun_with_context', __validation__, __run_id__
         )
         output = None
         
         while True:
             try:
-                output = await gen.send(output)()
-            except StopIteration:
+                call = gen.send(output)
+                if isinstance(call, _Blocking):
+                    output = await asyncio.get_running_loop().run_in_executor(None, call)
+                else:
+                    output = await call()
+            except StopIteration as stop:
+                output = stop.value
                 break
 
         return output
 
 
+    def _prepare_stream(
+        self,
+        context: dict[str, Any] | Context,
+        validation: Validation | None
+    ) -> tuple[Context, Validation | None, int]:
+        """Context, validation policy and index of first streaming member"""
+        context_for_run = self.context.child(context)
+
+        if self.validation is not None:
+            validation = self.validation
+
+        start = next(
+            i for i, runnable in enumerate(self.members) if runnable.streaming
+        )
+
+        return context_for_run, validation, start
+
+
+    @staticmethod
+    def _record(context: Context, runnable: Runnable, item: Any) -> tuple[Context, Any]:
+        """Context of one item in which the item is recorded as history"""
+        context_for_item = context.child()
+        context_for_item.add_history(item, runnable.id)
+        return context_for_item, item
+
+
+    def stream(
+        self,
+        *args,
+        __executor__: Executor | None = None,
+        **kwargs
+    ) -> Iterator[Any]:
+        """Run the pipeline and yield outputs of items synchronously"""
+        return self.stream_with_context(
+            {},
+            *args,
+            __executor__=__executor__,
+            **kwargs
+        )
+
+
+    def stream_with_context(
+        self,
+        context: dict[str, Any] | Context,
+        *args,
+        __executor__: Executor | None = None,
+        __validation__: Validation | None = None,
+        **kwargs
+    ) -> Iterator[Any]:
+        """Run the pipeline and yield outputs of items synchronously
+
+        Members before the first streaming member run once. From the
+        streaming member on, each member runs in a worker of the runtime
+        for each item, connected by channels of `stream_buffer` items, and the
+        outputs of last member are yielded as they are produced.
+        Pipeline without streaming member yields its output as one item.
+        """
+        if not self.streaming:
+            yield self.run_with_context(
+                context,
+                *args,
+                __executor__=__executor__,
+                __validation__=__validation__,
+                **kwargs
+            )
+            return
+
+        context_for_run, validation, start = self._prepare_stream(
+            context, __validation__
+        )
+
+        for i, runnable in enumerate(self.members[:start]):
+            output = runnable.run_with_context(
+                context_for_run,
+                *args,
+                __executor__=__executor__,
+                __validation__=self._member_validation(validation, i),
+                **kwargs
+            )
+            context_for_run.add_history(output, runnable.id)
+            args = ()
+            kwargs = {OUTPUT_KEY: output}
+
+        first = self.members[start]
+        source = (
+            self._record(context_for_run, first, item)
+            for item in first.stream_with_context(
+                context_for_run,
+                *args,
+                __executor__=__executor__,
+                __validation__=self._member_validation(validation, start),
+                **kwargs
+            )
+        )
+
+        def make_stage(index: int, runnable: Runnable):
+            def stage(entry: tuple[Context, Any]) -> Iterator[tuple[Context, Any]]:
+                context_for_item, item = entry
+                for output in runnable.stream_with_context(
+                    context_for_item,
+                    __executor__=__executor__,
+                    __validation__=self._member_validation(validation, index),
+                    **{OUTPUT_KEY: item}
+                ):
+                    yield self._record(context_for_item, runnable, output)
+            return stage
+
+        stages = [
+            make_stage(i, runnable)
+            for i, runnable in enumerate(self.members)
+            if i > start
+        ]
+
+        runtime = (
+            __executor__ if isinstance(__executor__, Runtime) else get_default_runtime()
+        )
+        for _, output in stream_stages(source, stages, self.stream_buffer, runtime):
+            yield output
+
+
+    def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        """Run the pipeline and yield outputs of items asynchronously"""
+        return self.astream_with_context({}, *args, **kwargs)
+
+
+    async def astream_with_context(
+        self,
+        context: dict[str, Any] | Context,
+        *args,
+        __validation__: Validation | None = None,
+        **kwargs
+    ) -> AsyncIterator[Any]:
+        """Run the pipeline and yield outputs of items asynchronously
+
+        Asynchronous version of `stream_with_context`, each streaming
+        stage runs in its own asyncio task.
+        """
+        if not self.streaming:
+            yield await self.arun_with_context(
+                context, *args, __validation__=__validation__, **kwargs
+            )
+            return
+
+        context_for_run, validation, start = self._prepare_stream(
+            context, __validation__
+        )
+
+        for i, runnable in enumerate(self.members[:start]):
+            output = await runnable.arun_with_context(
+                context_for_run,
+                *args,
+                __validation__=self._member_validation(validation, i),
+                **kwargs
+            )
+            context_for_run.add_history(output, runnable.id)
+            args = ()
+            kwargs = {OUTPUT_KEY: output}
+
+        first = self.members[start]
+
+        async def source():
+            async for item in first.astream_with_context(
+                context_for_run,
+                *args,
+                __validation__=self._member_validation(validation, start),
+                **kwargs
+            ):
+                yield self._record(context_for_run, first, item)
+
+        def make_stage(index: int, runnable: Runnable):
+            async def stage(entry: tuple[Context, Any]) -> AsyncIterator[tuple[Context, Any]]:
+                context_for_item, item = entry
+                async for output in runnable.astream_with_context(
+                    context_for_item,
+                    __validation__=self._member_validation(validation, index),
+                    **{OUTPUT_KEY: item}
+                ):
+                    yield self._record(context_for_item, runnable, output)
+            return stage
+
+        stages = [
+            make_stage(i, runnable)
+            for i, runnable in enumerate(self.members)
+            if i > start
+        ]
+
+        async for _, output in astream_stages(source(), stages, self.stream_buffer):
+            yield output
+
+
     def __call__(
         self,
         *args,
@@ -183,6 +558,11 @@ class Pipeline(Runnable):
         )
 
 
+    def input_references(self) -> set[Any]:
+        # only the first member receives the input of pipeline
+        return self.members[0].input_references() if self.members else set()
+
+
     def make_graph(self, parent=None) -> Any:
         from pygraphviz import AGraph
 
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+from typing import Any
+from concurrent.futures import Executor
+from inspect import iscoroutinefunction
+import asyncio
+
+from sprinkler import tracing
+from sprinkler.runnable.base import Runnable
+from sprinkler.runnable.task import Task
+from sprinkler.runnable.pipeline import Pipeline
+from sprinkler.runnable.group import Group
+from sprinkler.context.base import Context
+from sprinkler.constants import OUTPUT_KEY
+from sprinkler.validation import Validation
+from sprinkler.runtime import Runtime, run_coroutine, get_default_runtime
+
+
+def _overrides(runnable: Runnable, base: type, *names: str) -> bool:
+    """Whether the class of runnable overrides any of the methods"""
+    return any(getattr(type(runnable), name) is not getattr(base, name) for name in names)
+
+
+class _Step:
+    """Step of plan running a runnable as its `run_with_context` does
+
+    Steps are built by `compile_step` and never modified after that.
+    Subclasses precompute what the runnable decides on every run.
+    The base step runs the runnable as it is.
+    """
+
+    __slots__ = ('runnable', 'id', 'scope')
+
+    def __init__(self, runnable: Runnable, scope: Validation | None) -> None:
+        self.runnable = runnable
+        self.id = runnable.id
+        self.scope = scope
+
+
+    def run(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any],
+        executor: Executor | str | None
+    ) -> Any:
+        return self.runnable.run_with_context(
+            context, *args, __executor__=executor, __validation__=self.scope, **kwargs
+        )
+
+
+    async def arun(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any]
+    ) -> Any:
+        return await self.runnable.arun_with_context(
+            context, *args, __validation__=self.scope, **kwargs
+        )
+
+
+class _TaskStep(_Step):
+    """Task with its validation policy and operation call resolved"""
+
+    __slots__ = ('policy', 'uses_context', 'direct', 'coroutine')
+
+    def __init__(self, task: Task, scope: Validation | None) -> None:
+        super().__init__(task, scope)
+        self.policy = task._resolve_validation(scope)
+        # only context parameters read the context
+        self.uses_context = len(task._ctx_plan) > 0
+        # operation without memo, retry, hedge or resources is called as it is
+        self.direct = (
+            task.cache is None
+            and task.retry is None
+            and task.hedge is None
+            and task.resources is None
+            and not _overrides(task, Task, '_run_operation', '_arun_operation')
+        )
+        self.coroutine = iscoroutinefunction(task.operation)
+
+
+    def _input(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any]
+    ) -> tuple[dict[str, Any], bool]:
+        task = self.runnable
+        if self.uses_context:
+            context = task.context.child(context)
+
+        validate_input, validate_output = (
+            self.policy.decide() if self.policy is not None else (True, True)
+        )
+        return task._validate_input(context, args, kwargs, validate_input), validate_output
+
+
+    def run(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any],
+        executor: Executor | str | None
+    ) -> Any:
+        task = self.runnable
+        input_, validate_output = self._input(context, args, kwargs)
+
+        if not self.direct:
+            output = task._call_operation(input_, executor)
+        elif self.coroutine:
+            output = run_coroutine(task.operation(**input_))
+        else:
+            output = task.operation(**input_)
+
+        return task._validate_output(output, validate_output)
+
+
+    async def arun(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any]
+    ) -> Any:
+        task = self.runnable
+        input_, validate_output = self._input(context, args, kwargs)
+
+        if not self.direct:
+            output = await task._acall_operation(input_)
+        elif self.coroutine:
+            output = await task.operation(**input_)
+        else:
+            output = task.operation(**input_)
+
+        return task._validate_output(output, validate_output)
+
+
+class _PipelineStep(_Step):
+    """Pipeline with its members compiled in order"""
+
+    __slots__ = ('steps',)
+
+    def __init__(self, pipeline: Pipeline, scope: Validation | None) -> None:
+        super().__init__(pipeline, scope)
+
+        # the pipeline declaring its own policy is the boundary
+        validation = pipeline.validation if pipeline.validation is not None else scope
+        self.steps = tuple(
+            compile_step(runnable, pipeline._member_validation(validation, i))
+            for i, runnable in enumerate(pipeline.members)
+        )
+
+
+    def run(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any],
+        executor: Executor | str | None
+    ) -> Any:
+        context_for_run = self.runnable.context.child(context)
+        output = None
+
+        for step in self.steps:
+            output = step.run(context_for_run, args, kwargs, executor)
+            context_for_run.add_history(output, step.id)
+            args = ()
+            kwargs = {OUTPUT_KEY: output}
+
+        return output
+
+
+    async def arun(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any]
+    ) -> Any:
+        context_for_run = self.runnable.context.child(context)
+        output = None
+
+        for step in self.steps:
+            output = await step.arun(context_for_run, args, kwargs)
+            context_for_run.add_history(output, step.id)
+            args = ()
+            kwargs = {OUTPUT_KEY: output}
+
+        return output
+
+
+class _GroupStep(_Step):
+    """Group waiting for every member, with its members compiled"""
+
+    __slots__ = ('steps',)
+
+    def __init__(self, group: Group, scope: Validation | None) -> None:
+        super().__init__(group, scope)
+        self.steps = tuple(compile_step(runnable, scope) for runnable in group.members)
+
+
+    @staticmethod
+    def _default(kwargs: dict[str, Any]) -> Any:
+        return kwargs[OUTPUT_KEY] if OUTPUT_KEY in kwargs else kwargs.get('__default__')
+
+
+    def run(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any],
+        executor: Executor | str | None
+    ) -> Any:
+        if executor is None:
+            executor = get_default_runtime()
+
+        if executor == 'asyncio':
+            return asyncio.run(self.arun(context, args, kwargs))
+
+        # other executors (e.g. process pool) run members of the group
+        if not isinstance(executor, Runtime):
+            return super().run(context, args, kwargs, executor)
+
+        context_for_run = self.runnable.context.child(context)
+        default = self._default(kwargs)
+
+        futures = [
+            (step.id, executor.submit(
+                step.run,
+                context_for_run,
+                (),
+                {OUTPUT_KEY: kwargs.get(step.id, default)},
+                executor
+            ))
+            for step in self.steps
+        ]
+        return {id_: future.result() for id_, future in futures}
+
+
+    async def arun(
+        self,
+        context: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict[str, Any]
+    ) -> Any:
+        context_for_run = self.runnable.context.child(context)
+        default = self._default(kwargs)
+
+        outputs = await asyncio.gather(*[
+            step.arun(context_for_run, (), {OUTPUT_KEY: kwargs.get(step.id, default)})
+            for step in self.steps
+        ])
+        return {step.id: output for step, output in zip(self.steps, outputs)}
+
+
+_RUN_METHODS = ('run_with_context', 'arun_with_context')
+
+
+def compile_step(runnable: Runnable, scope: Validation | None = None) -> _Step:
+    """Step running the runnable under the validation policy of scope
+
+    Runnables whose runs depend on more than their structure (streaming,
+    stage cache, checkpoint, completion modes, DAG, or overridden run
+    methods) are kept as they are.
+    """
+    if isinstance(runnable, Task):
+        if not (runnable.streaming or _overrides(runnable, Task, *_RUN_METHODS)):
+            return _TaskStep(runnable, scope)
+
+    elif isinstance(runnable, Pipeline):
+        if not (
+            runnable.streaming
+            or runnable.stage_cache is not None
+            or runnable.checkpoint is not None
+            or _overrides(runnable, Pipeline, *_RUN_METHODS)
+        ):
+            return _PipelineStep(runnable, scope)
+
+    elif isinstance(runnable, Group):
+        if runnable._waits_all() and not _overrides(runnable, Group, *_RUN_METHODS):
+            return _GroupStep(runnable, scope)
+
+    return _Step(runnable, scope)
+
+
+class Plan:
+    """Execution plan of a runnable tree (see `Runnable.compile`)
+
+    The tree is walked once at compile time: member order, validation
+    policies of members, how each task binds its input and calls its
+    operation, and how outputs flow to the next members are resolved
+    into steps. A run only follows the steps, so it skips generators,
+    `partial`s, policy resolution and contexts of tasks which don't read
+    context. The plan holds no state of runs and can be shared by runs
+    and threads.
+
+    The plan reflects the structure and policies of the tree at compile
+    time, while context values are read on each run. With tracing
+    enabled, runs go through the runnables as they are, so their spans
+    are recorded.
+
+    Attributes:
+        runnable: the root of compiled tree
+        root: the step of root
+    """
+
+    __slots__ = ('runnable', 'root')
+
+    runnable: Runnable
+    root: _Step
+
+    def __init__(self, runnable: Runnable) -> None:
+        self.runnable = runnable
+        self.root = compile_step(runnable)
+
+
+    def run(self, *args, __executor__: Executor | None = None, **kwargs) -> Any:
+        return self.run_with_context({}, *args, __executor__=__executor__, **kwargs)
+
+
+    def run_with_context(
+        self,
+        context: dict[str, Any] | Context,
+        *args,
+        __executor__: Executor | None = None,
+        __validation__: Validation | None = None,
+        __run_id__: str | None = None,
+        **kwargs
+    ) -> Any:
+        if tracing._active or __validation__ is not None or __run_id__ is not None:
+            if __run_id__ is not None:
+                kwargs['__run_id__'] = __run_id__
+            return self.runnable.run_with_context(
+                context,
+                *args,
+                __executor__=__executor__,
+                __validation__=__validation__,
+                **kwargs
+            )
+
+        return self.root.run(context, args, kwargs, __executor__)
+
+
+    async def arun(self, *args, **kwargs) -> Any:
+        return await self.arun_with_context({}, *args, **kwargs)
+
+
+    async def arun_with_context(
+        self,
+        context: dict[str, Any] | Context,
+        *args,
+        __validation__: Validation | None = None,
+        __run_id__: str | None = None,
+        **kwargs
+    ) -> Any:
+        if tracing._active or __validation__ is not None or __run_id__ is not None:
+            if __run_id__ is not None:
+                kwargs['__run_id__'] = __run_id__
+            return await self.runnable.arun_with_context(
+                context, *args, __validation__=__validation__, **kwargs
+            )
+
+        return await self.root.arun(context, args, kwargs)
+
+
+    def __call__(self, *args, __executor__: Executor | None = None, **kwargs) -> Any:
+        return self.run(*args, __executor__=__executor__, **kwargs)
+
+
+    def __repr__(self) -> str:
+        return f'Plan({type(self.runnable).__name__} {self.runnable.id!r})'
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Callable, Iterator
+from concurrent.futures import wait
+import asyncio
+import queue
+import threading
+
+from sprinkler.runtime import Runtime
+
+
+Stage = Callable[[Any], Iterator[Any]]
+AsyncStage = Callable[[Any], AsyncIterator[Any]]
+
+_END = object()
+_STOPPED = object()
+
+
+class _Failure:
+    """Exception raised in a stage, passed downstream in place of items"""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class _Stopped(Exception):
+    """The consumer of stream stopped before the end"""
+
+
+class _Channel:
+    """Items between two stages, at most `buffer` of them waiting
+
+    Closing the channel wakes both of its ends: the consumer gets
+    `_STOPPED` and the producer gets room for one more item.
+    """
+
+    __slots__ = ('items', 'room')
+
+    def __init__(self, buffer: int) -> None:
+        self.items = queue.SimpleQueue()
+        self.room = threading.Semaphore(buffer)
+
+
+    def put(self, item: Any) -> None:
+        self.room.acquire()
+        self.items.put(item)
+
+
+    def get(self) -> Any:
+        item = self.items.get()
+        self.room.release()
+        return item
+
+
+    def close(self) -> None:
+        self.items.put(_STOPPED)
+        self.room.release()
+
+
+def stream_stages(
+    source: Iterator[Any],
+    stages: list[Stage],
+    buffer: int,
+    runtime: Runtime
+) -> Iterator[Any]:
+    """Connect stages by bounded channels and run each of them in a worker
+
+    While a stage processes item N, the stage before it produces item N+1.
+    Each stage maps one item to an iterator of items, and at most `buffer`
+    items wait between two stages. Stages run in workers of the runtime,
+    and a stage which gets no free worker runs in the thread consuming
+    its outputs instead, so streams never wait for workers.
+
+    Args:
+        source: items flowing into the first stage
+        stages: functions from an item to iterator of items
+        buffer: maximum number of items in each channel
+        runtime: the runtime whose workers run the stages
+
+    Returns:
+        iterator of items from the last stage
+    """
+    stop = threading.Event()
+    channels = []
+    futures = []
+
+    def produce(items: Iterator[Any], out: _Channel) -> None:
+        try:
+            for item in items:
+                out.put(item)
+                if stop.is_set():
+                    return
+            if not stop.is_set():
+                out.put(_END)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            if not stop.is_set():
+                out.put(_Failure(e))
+
+    def consume(channel: _Channel) -> Iterator[Any]:
+        while True:
+            item = channel.get()
+            if item is _END:
+                return
+            if item is _STOPPED:
+                raise _Stopped
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def apply(stage: Stage, items: Iterator[Any]) -> Iterator[Any]:
+        for item in items:
+            yield from stage(item)
+
+    def hand_off(items: Iterator[Any]) -> Iterator[Any]:
+        channel = _Channel(buffer)
+        future = runtime.try_submit(produce, items, channel)
+        if future is None:
+            return items
+        channels.append(channel)
+        futures.append(future)
+        return consume(channel)
+
+    items = hand_off(iter(source))
+    for stage in stages:
+        items = hand_off(apply(stage, items))
+
+    try:
+        yield from items
+    finally:
+        stop.set()
+        for channel in channels:
+            channel.close()
+        wait(futures)
+
+
+async def astream_stages(
+    source: AsyncIterator[Any],
+    stages: list[AsyncStage],
+    buffer: int
+) -> AsyncIterator[Any]:
+    """Connect stages by bounded queues and run each of them in a task
+
+    Asynchronous version of `stream_stages`.
+    """
+    queues = [asyncio.Queue(buffer) for _ in range(len(stages) + 1)]
+
+    async def produce(items: AsyncIterator[Any], out: asyncio.Queue) -> None:
+        try:
+            async for item in items:
+                await out.put(item)
+            await out.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await out.put(_Failure(e))
+
+    async def consume(q: asyncio.Queue) -> AsyncIterator[Any]:
+        while True:
+            item = await q.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    async def apply(stage: AsyncStage, in_: asyncio.Queue) -> AsyncIterator[Any]:
+        async for item in consume(in_):
+            async for output in stage(item):
+                yield output
+
+    tasks = [asyncio.ensure_future(produce(source, queues[0]))]
+    for i, stage in enumerate(stages):
+        tasks.append(asyncio.ensure_future(
+            produce(apply(stage, queues[i]), queues[i + 1])
+        ))
+
+    try:
+        async for item in consume(queues[-1]):
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,8 +1,36 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import importlib
+
 from sprinkler.runnable.task.base import Task, Ann, Ctx, K
-from sprinkler.runnable.task.prompt import PromptTask
-from sprinkler.runnable.task.chat import ChatCompletionTask
+
+if TYPE_CHECKING:
+    from sprinkler.runnable.task.prompt import PromptTask
+    from sprinkler.runnable.task.chat import ChatCompletionTask
+
+
+# tasks of chat backend are imported on first access (PEP 562)
+_exports = {
+    'PromptTask': 'sprinkler.runnable.task.prompt',
+    'ChatCompletionTask': 'sprinkler.runnable.task.chat'
+}
 
 __all__ = [
     'PromptTask',
     'ChatCompletionTask'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
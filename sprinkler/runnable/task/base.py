@@ -1,31 +1,157 @@
 from __future__ import annotations
 
-from typing import Callable, Any, Generator
-from inspect import Parameter, iscoroutinefunction, Signature
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Any,
+    Generator,
+    Iterator,
+    AsyncIterator,
+    Literal,
+    get_origin,
+    get_args
+)
+from inspect import (
+    Parameter,
+    Signature,
+    iscoroutinefunction,
+    isgeneratorfunction,
+    isasyncgenfunction
+)
+from concurrent.futures import Executor
 from collections import OrderedDict
+from functools import partial, reduce
 from itertools import chain
-from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 import asyncio
-import copy
-
-from pydantic import create_model, ValidationError, ConfigDict
+import collections.abc
+import importlib
+import sys
+import threading
 
 from sprinkler.constants import OUTPUT_KEY, null
-from sprinkler.utils import recursive_search, distribute_value
+from sprinkler.utils import distribute_value, LazyModule
 from sprinkler.runnable.base import Runnable
 from sprinkler.context.base import Context
+from sprinkler.context.query import Path, QueryPlan
+from sprinkler.validation import Validation
+from sprinkler.retry import RetryPolicy
+from sprinkler.hedge import Hedge
+from sprinkler.resources import get_resource_registry
+from sprinkler.cache import Cache, LRUCache, stable_hash, function_digest
+from sprinkler.runtime import run_coroutine, iterate_async
+from sprinkler.tracing import phase, aphase, traced
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+
+pydantic = LazyModule('pydantic')
+
+_ITERATOR_TYPES = (
+    collections.abc.Iterator,
+    collections.abc.Iterable,
+    collections.abc.Generator,
+    collections.abc.AsyncIterator,
+    collections.abc.AsyncIterable,
+    collections.abc.AsyncGenerator
+)
+_TYPING_MODULES = ('typing', 'typing_extensions', 'types')
+
+# models of every task are built once, so one lock is enough
+# (and a task holding no lock stays picklable)
+_models_lock = threading.Lock()
+
+
+class _TaskOperation:
+    """Operation of a task defined by the `Task` decorator, pickled by name
+
+    The decorator binds the task to the name of its operation, so pickle
+    can't find the function by its name. The receiver takes the operation
+    of the task bound to the name instead.
+    """
+
+    __slots__ = ('module', 'qualname')
+
+    def __init__(self, module: str, qualname: str) -> None:
+        self.module = module
+        self.qualname = qualname
+
+
+    @classmethod
+    def of(cls, task: Task) -> _TaskOperation | None:
+        operation = task.operation
+        module = sys.modules.get(getattr(operation, '__module__', None))
+        qualname = getattr(operation, '__qualname__', '')
+
+        if module is None or '<locals>' in qualname:
+            return None
+        try:
+            bound = reduce(getattr, qualname.split('.'), module)
+        except AttributeError:
+            return None
+        return cls(module.__name__, qualname) if bound is task else None
+
+
+    def resolve(self) -> Callable:
+        module = importlib.import_module(self.module)
+        return reduce(getattr, self.qualname.split('.'), module).operation
+
+
+def _is_type_like(type_: Any) -> bool:
+    """Whether the annotation can be a type of pydantic field
+
+    It is checked without pydantic, so the task definition fails early
+    on annotations like `x: 5` while models are built on first run.
+    """
+    if type_ is None or type_ is Ellipsis or isinstance(type_, (type, str)):
+        return True
+    if isinstance(type_, list):
+        # parameters of Callable
+        return all(map(_is_type_like, type_))
+    if hasattr(type_, '__metadata__'):
+        # Annotated[type, metadata...]
+        return _is_type_like(type_.__origin__)
+    if get_origin(type_) is Literal:
+        return True
+    if get_origin(type_) is not None:
+        return all(map(_is_type_like, get_args(type_)))
+    # special forms, type variables, NewType and aliases of typing
+    return (
+        type(type_).__module__ in _TYPING_MODULES
+        or hasattr(type_, '__supertype__')
+    )
 
 
 class Task(Runnable):
-    """The unit of operation in pipeline."""
+    """The unit of operation in pipeline.
+
+    If the operation is a generator (or async generator) function,
+    the task is streaming: its items are validated one by one against
+    the item type of the return annotation (e.g. `Iterator[int]`) and
+    flow into the next members of pipeline as they are produced.
+    """
 
     id: str = 'Unnamed Task'
     operation: Callable
     context: Context
+    validation: Validation | None
+    retry: RetryPolicy | None
+    hedge: Hedge | None
+    resources: dict[str, int] | None
+    cache: Cache | None
+    cache_key: Callable[[dict[str, Any]], Any] | None
+    streaming: bool = False
     _input_model_config: dict[str, tuple]
     _output_model_config: dict[str, tuple]
+    _input_model: type[BaseModel] | None
+    _output_model: type[BaseModel] | None
+    _required_any: list[str]
     _param_with_key: dict[K, list[str]]
     _ctx_with_key: dict[K, list[str]]
+    _ctx_plan: QueryPlan
+    _param_plan: QueryPlan
+    _params: list[str]
     
 
     def __init__(
@@ -33,13 +159,33 @@ class Task(Runnable):
         id_: str,
         operation: Callable | None = None,
         *,
-        context: dict[str, Any] | None = None
+        context: dict[str, Any] | None = None,
+        validation: Validation | str | float | None = None,
+        retry: RetryPolicy | int | None = None,
+        hedge: Hedge | None = None,
+        resources: dict[str, int] | None = None,
+        cache: Cache | int | None = None,
+        cache_key: Callable[[dict[str, Any]], Any] | None = None
     ) -> None:
         """Initialize the task class.
 
         Args:
             id: A task identifier. It should be following the python variable naming rule.
             operation: A callbale object defining the operation of task.
+            validation: A validation policy of task. If None, the policy of
+            the enclosing pipeline is used (strict by default).
+            retry: A retry policy (or the maximum number of attempts)
+            for failed operation. Streaming task is not retried.
+            hedge: A hedging policy launching a duplicate operation when
+            it is slow. Each attempt of retry is hedged. Streaming task is
+            not hedged.
+            resources: Units of named resources held while each attempt
+            of operation runs, limited by capacities in the registry
+            (see `resources.ResourceRegistry`). Streaming task is not limited.
+            cache: A cache (or the maximum size of `LRUCache`) memoizing
+            outputs by validated input. Streaming task is not memoized.
+            cache_key: A function from validated input to the value
+            hashed as the key of cache. If None, the whole input is hashed.
         """
         
         if not isinstance(id_, str):
@@ -48,6 +194,14 @@ class Task(Runnable):
         self.id = id_
         self.operation = operation
         self.context = Context()
+        self.validation = Validation.of(validation)
+        self.retry = RetryPolicy.of(retry)
+        self.hedge = hedge
+        self.resources = resources or None
+        if isinstance(cache, bool):
+            raise TypeError(f'Task {id_}: cache must be Cache, int or None.')
+        self.cache = LRUCache(cache) if isinstance(cache, int) else cache
+        self.cache_key = cache_key
 
         if context:
             self.context.add_global(context)
@@ -61,9 +215,14 @@ class Task(Runnable):
             raise TypeError(f'Task {self.id}: operation must be callable.')
 
         signature = Signature.from_callable(self.operation)
+        self.streaming = (
+            isgeneratorfunction(self.operation)
+            or isasyncgenfunction(self.operation)
+        )
 
         self._set_input_config(signature.parameters)
         self._set_output_config(signature.return_annotation)
+        self._set_models()
 
 
     def _set_input_config(self, params: OrderedDict[str, Parameter]):
@@ -92,17 +251,112 @@ class Task(Runnable):
                 else:
                     self._param_with_key[config.key] = [param.name]
 
+        # compile the static keys once, they are resolved on every run
+        self._ctx_plan = QueryPlan(self._ctx_with_key)
+        self._param_plan = QueryPlan(self._param_with_key)
+        self._params = list(chain.from_iterable(self._param_with_key.values()))
+
 
     def _set_output_config(self, return_ann: Any):
         config = self._parse_annotation(
             '', return_ann
         )
+        type_ = config.type
+
+        # streaming task validates each item instead of the generator
+        if self.streaming:
+            args = get_args(type_)
+            type_ = (
+                args[0] if get_origin(type_) in _ITERATOR_TYPES and args
+                else Any
+            )
         
         self._output_model_config = {
-            OUTPUT_KEY: (config.type, ...)
+            OUTPUT_KEY: (type_, ...)
         }
 
 
+    def _set_models(self):
+        """Prepare validation once per operation
+
+        Annotations are checked when the operation is set, but pydantic
+        models are built on their first access (see `__getattr__`), so
+        defining tasks neither imports pydantic nor builds models until
+        the task runs. Parameters annotated with
+        `Any` are left out of the model, they are only checked for
+        their presence.
+        """
+        self._required_any = [
+            name for name, (type_, default) in self._input_model_config.items()
+            if type_ is Any and default is ...
+        ]
+        self.__dict__.pop('_input_model', None)
+        self.__dict__.pop('_output_model', None)
+
+
+    def _build_models(self):
+        """Build pydantic models for validation
+
+        Models are immutable after creation, so they are shared by
+        every run of the task (and every thread running it).
+        """
+        typed_config = {
+            name: config for name, config in self._input_model_config.items()
+            if config[0] is not Any
+        }
+        input_model = output_model = None
+
+        if typed_config:
+            input_model = pydantic.create_model(
+                f'TaskInput_{self.id}',
+                **typed_config,
+                __config__=pydantic.ConfigDict(arbitrary_types_allowed=True)
+            )
+
+        if self._output_model_config[OUTPUT_KEY][0] is not Any:
+            output_model = pydantic.create_model(
+                f'TaskOutput_{self.id}',
+                **self._output_model_config,
+                __config__=pydantic.ConfigDict(arbitrary_types_allowed=True)
+            )
+
+        self._input_model = input_model
+        self._output_model = output_model
+
+
+    def __getattr__(self, name: str) -> Any:
+        # called only for missing attributes, models are built on first access
+        if name in ('_input_model', '_output_model') and '_input_model_config' in self.__dict__:
+            with _models_lock:
+                # concurrent first runs build the models once
+                if name not in self.__dict__:
+                    self._build_models()
+            return self.__dict__[name]
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        # models created by `create_model` can't be pickled,
+        # so they are rebuilt from configs after unpickling
+        state = self.__dict__.copy()
+        state.pop('_input_model', None)
+        state.pop('_output_model', None)
+
+        if self.operation is not None:
+            operation = _TaskOperation.of(self)
+            if operation is not None:
+                state['operation'] = operation
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        if isinstance(state.get('operation'), _TaskOperation):
+            state['operation'] = state['operation'].resolve()
+        self.__dict__.update(state)
+        if self.operation is not None:
+            self._set_models()
+
+
     def _parse_annotation(self, param_name: str, ann: Any) -> Any:
         ann = ann if ann is not Parameter.empty else Any
 
@@ -113,6 +367,11 @@ class Task(Runnable):
             ann = Ann[ann]
         if ann.is_ctx and not ann.key:
             ann.key = K(param_name)
+        if not _is_type_like(ann.type):
+            raise TypeError(
+                f'Task {self.id}: invalid annotation of '
+                f'{param_name or "output"}: {ann.type!r}'
+            )
 
         return ann
 
@@ -126,23 +385,51 @@ class Task(Runnable):
             return self.run(*args, **kwargs)
 
 
+    def _resolve_validation(self, scope: Validation | None) -> Validation | None:
+        """Combine the policy of task and the policy given by runnable above"""
+        if self.validation is None:
+            return scope
+        if scope is None:
+            return self.validation
+        return self.validation.bind(scope.entry, scope.exit)
+
+
+    def _prepare_run(
+        self,
+        context_: dict[str, Any] | Context,
+        args: tuple,
+        kwargs: dict,
+        validation: Validation | None = None
+    ) -> tuple[dict[str, Any], bool]:
+        """Validated input and whether to validate output of a run"""
+
+        context_for_run = phase('context', self.context.child, context_)
+
+        policy = self._resolve_validation(validation)
+        validate_input, validate_output = (
+            policy.decide() if policy is not None else (True, True)
+        )
+        
+        input_ = self._validate_input(
+            context_for_run, args, kwargs, validate_input
+        )
+
+        return input_, validate_output
+
+
     def _generator_for_run(
         self,
         context_: dict[str, Any] | Context,
         args: tuple,
-        kwargs: dict
+        kwargs: dict,
+        validation: Validation | None = None
     ) -> Generator[dict[str, Any], Any, Any]:
-        
-        context_for_run = copy.deepcopy(self.context)
 
-        if isinstance(context_, dict):
-            context_for_run.add_global(context_)
-        elif isinstance(context_, Context):
-            context_for_run.update(context_)
-        
-        input_ = self._validate_input(context_for_run, args, kwargs)
+        input_, validate_output = self._prepare_run(
+            context_, args, kwargs, validation
+        )
         output = yield input_
-        output = self._validate_output(output)
+        output = self._validate_output(output, validate_output)
 
         return output
     
@@ -152,38 +439,128 @@ class Task(Runnable):
         return self.run_with_context({}, *args, **kwargs)
 
 
+    @traced('task')
     def run_with_context(
         self,
         context_: dict[str, Any] | Context,
         *args,
+        __executor__: Executor | None = None,
+        __validation__: Validation | None = None,
         **kwargs
     ) -> Any:
         """Run the task with given context synchronously."""
 
-        gen = self._generator_for_run(context_, args, kwargs)
+        if self.streaming:
+            return list(self.stream_with_context(
+                context_, *args, __validation__=__validation__, **kwargs
+            ))
+
+        gen = self._generator_for_run(context_, args, kwargs, __validation__)
         input_ = next(gen)
         try:
-            gen.send(self._run_operation(input_))
+            gen.send(self._call_operation(input_, __executor__))
         except StopIteration as output:
             return output.value
     
 
+    def _memo_key(self, input_: dict[str, Any]) -> str | None:
+        """Key of cache for the input, None if it can't be hashed
+
+        The fingerprint is a part of the key, so persistent caches don't
+        return outputs of the operation before its code is changed.
+        """
+        key = input_ if self.cache_key is None else self.cache_key(input_)
+        try:
+            return stable_hash(self.fingerprint(), key)
+        except TypeError:
+            return None
+
+
+    def _call_operation(
+        self,
+        input_: dict[str, Any],
+        executor: Executor | None = None
+    ) -> Any:
+        key = None if self.cache is None else self._memo_key(input_)
+        if key is not None:
+            output = self.cache.get(key)
+            if output is not null:
+                return deepcopy(output)
+
+        if self.hedge is None:
+            run = self._attempt_operation
+        else:
+            run = partial(self._run_hedged, executor=executor)
+
+        if self.retry is None:
+            output = phase('operation', run, input_)
+        else:
+            output = phase('operation', self.retry.call, run, input_)
+
+        if key is not None:
+            self.cache.set(key, deepcopy(output))
+        return output
+
+
+    def _attempt_operation(self, input_: dict[str, Any]) -> Any:
+        if self.resources is None:
+            return self._run_operation(input_)
+
+        registry = get_resource_registry()
+        held = phase('acquire', registry.acquire, self.resources)
+        try:
+            return self._run_operation(input_)
+        finally:
+            registry.release(held)
+
+
     def _run_operation(self, input_: dict[str, Any]) -> Any:
         if iscoroutinefunction(self.operation):
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(
-                    Task._run_coroutine_in_another_thread,
-                    self.operation,
-                    input_
-                )
-            return future.result()
+            # runs in the event loop shared by the process
+            return run_coroutine(self.operation(**input_))
         else:
             return self.operation(**input_)
 
 
-    @staticmethod
-    def _run_coroutine_in_another_thread(coro, input_) -> Any:
-        return asyncio.run(coro(**input_))
+    def _run_hedged(self, input_: dict[str, Any], executor: Executor | None) -> Any:
+        if iscoroutinefunction(self.operation):
+            return run_coroutine(self.hedge.acall(self._aattempt_operation, input_))
+        else:
+            return self.hedge.call(self._attempt_operation, input_, executor=executor)
+
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        """Run the task and yield its items synchronously."""
+        return self.stream_with_context({}, *args, **kwargs)
+
+
+    def stream_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *args,
+        __validation__: Validation | None = None,
+        **kwargs
+    ) -> Iterator[Any]:
+        """Run the task with given context and yield its items synchronously.
+
+        Task which is not streaming yields its output as one item.
+        """
+        if not self.streaming:
+            yield self.run_with_context(
+                context_, *args, __validation__=__validation__, **kwargs
+            )
+            return
+
+        input_, validate_output = self._prepare_run(
+            context_, args, kwargs, __validation__
+        )
+        items = self.operation(**input_)
+
+        if isasyncgenfunction(self.operation):
+            items = iterate_async(items)
+
+        for item in items:
+            yield self._validate_output(item, validate_output)
 
 
     async def arun(self, *args, **kwargs) -> Any:
@@ -191,21 +568,91 @@ class Task(Runnable):
         return await self.arun_with_context({}, *args, **kwargs)
 
 
+    @traced('task')
     async def arun_with_context(
         self,
         context_: dict[str, Any] | Context,
         *args,
+        __validation__: Validation | None = None,
         **kwargs
     ) -> Any:
+
+        if self.streaming:
+            return [item async for item in self.astream_with_context(
+                context_, *args, __validation__=__validation__, **kwargs
+            )]
         
-        gen = self._generator_for_run(context_, args, kwargs)
+        gen = self._generator_for_run(context_, args, kwargs, __validation__)
         input_ = next(gen)
         try: 
-            gen.send(await self._arun_operation(input_))
+            gen.send(await self._acall_operation(input_))
         except StopIteration as output:
             return output.value
 
 
+    def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        """Run the task and yield its items asynchronously."""
+        return self.astream_with_context({}, *args, **kwargs)
+
+
+    async def astream_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *args,
+        __validation__: Validation | None = None,
+        **kwargs
+    ) -> AsyncIterator[Any]:
+        """Run the task with given context and yield its items asynchronously."""
+        if not self.streaming:
+            yield await self.arun_with_context(
+                context_, *args, __validation__=__validation__, **kwargs
+            )
+            return
+
+        input_, validate_output = self._prepare_run(
+            context_, args, kwargs, __validation__
+        )
+        items = self.operation(**input_)
+
+        if isasyncgenfunction(self.operation):
+            async for item in items:
+                yield self._validate_output(item, validate_output)
+        else:
+            for item in items:
+                yield self._validate_output(item, validate_output)
+
+
+    async def _acall_operation(self, input_: dict[str, Any]) -> Any:
+        key = None if self.cache is None else self._memo_key(input_)
+        if key is not None:
+            output = self.cache.get(key)
+            if output is not null:
+                return deepcopy(output)
+
+        run = self._aattempt_operation if self.hedge is None else self._arun_hedged
+
+        if self.retry is None:
+            output = await aphase('operation', run, input_)
+        else:
+            output = await aphase('operation', self.retry.acall, run, input_)
+
+        if key is not None:
+            self.cache.set(key, deepcopy(output))
+        return output
+
+
+    async def _aattempt_operation(self, input_: dict[str, Any]) -> Any:
+        if self.resources is None:
+            return await self._arun_operation(input_)
+
+        registry = get_resource_registry()
+        held = await aphase('acquire', registry.aacquire, self.resources)
+        try:
+            return await self._arun_operation(input_)
+        finally:
+            registry.release(held)
+
+
     async def _arun_operation(self, input_: dict[str, Any]) -> Any:
         if iscoroutinefunction(self.operation):
             return await self.operation(**input_)
@@ -213,27 +660,42 @@ class Task(Runnable):
             return self.operation(**input_)
 
 
+    async def _arun_hedged(self, input_: dict[str, Any]) -> Any:
+        # async operations (or tasks overriding `_arun_operation`,
+        # e.g. chat completion) are hedged on the loop
+        if (
+            iscoroutinefunction(self.operation)
+            or type(self)._arun_operation is not Task._arun_operation
+        ):
+            return await self.hedge.acall(self._aattempt_operation, input_)
+        else:
+            # sync attempts wait in a thread instead of blocking the loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, partial(self.hedge.call, self._attempt_operation, input_)
+            )
+
+
     def _bind_input(self, context: Context, args: tuple, kwargs: dict) -> dict[str, Any]:
-        ctx = context.query(self._ctx_with_key.keys())
         input_ = {}
 
-        for key, value in ctx.items():
-            input_.update(distribute_value(
-                self._ctx_with_key[key],
-                value
-            ))
+        for path, params in self._ctx_plan:
+            value = context.resolve(path)
+            if value is not null:
+                input_.update(distribute_value(
+                    params, value
+                ))
 
         if OUTPUT_KEY in kwargs:
             target = kwargs[OUTPUT_KEY]
-            for key, params in self._param_with_key.items():
-                result = recursive_search(key, target) if key else target
+            for path, params in self._param_plan:
+                result = path.resolve(target)
                 if result is not null:
                     input_.update(distribute_value(
                         params, result
                     ))
 
         else:
-            params = list(chain.from_iterable(self._param_with_key.values()))
+            params = self._params
 
             for param, arg in zip(params, args):
                 input_[param] = arg
@@ -243,52 +705,108 @@ class Task(Runnable):
         return input_
 
 
-    def _validate_input(self, context: Context, args: tuple, kwargs: dict) -> dict[str, Any]:
+    def _validate_input(
+        self,
+        context: Context,
+        args: tuple,
+        kwargs: dict,
+        validate: bool = True
+    ) -> dict[str, Any]:
         """Validate input arguemnts
 
         Returns:
             keyword arguments of validated arguments
         """
-        arguments = self._bind_input(context, args, kwargs)
-       
-        input_model = create_model(
-            f'TaskInput_{self.id}',
-            **self._input_model_config,
-            __config__=ConfigDict(arbitrary_types_allowed=True)
-        )
+        arguments = phase('bind', self._bind_input, context, args, kwargs)
+
+        if not validate:
+            return arguments
+
+        missing = [name for name in self._required_any if name not in arguments]
+        if missing:
+            raise Exception(f'Task {self.id} input: missing required arguments {missing}')
+
+        if self._input_model is None:
+            return arguments
 
         try:
-            return (input_model
-                .model_validate(arguments)
-                .model_dump())
+            arguments.update(
+                phase('validate_input', self._input_model.model_validate, arguments)
+                .model_dump()
+            )
+            return arguments
         
-        except ValidationError as e:
+        except pydantic.ValidationError as e:
             raise Exception(f'Task {self.id} input: {e}')
     
     
-    def _validate_output(self, output: Any) -> Any:
+    def _validate_output(self, output: Any, validate: bool = True) -> Any:
         """Validate output
 
         Returns:
             validated output
         """
+        if not validate or self._output_model is None:
+            return output
 
         output = {OUTPUT_KEY: output}
-        output_model = create_model(
-            f'TaskOutput_{self.id}',
-            **self._output_model_config,
-            __config__=ConfigDict(arbitrary_types_allowed=True)
-        )
 
         try:
-            return (output_model
-                .model_validate(output)
-                .model_dump()[OUTPUT_KEY])
+            return (
+                phase('validate_output', self._output_model.model_validate, output)
+                .model_dump()[OUTPUT_KEY]
+            )
         
-        except ValidationError as e:
+        except pydantic.ValidationError as e:
             raise Exception(f'Task {self.id} output: {e}')
 
 
+    def references(self) -> set[str]:
+        if self.operation is None:
+            return set()
+
+        # context parameters read outputs from history by id
+        return {
+            path.head for path, _ in self._ctx_plan if isinstance(path.head, str)
+        }
+
+
+    def input_references(self) -> set[Any]:
+        if self.operation is None:
+            return set()
+
+        return {path.head for path, _ in self._param_plan if path.head is not null}
+
+
+    def context_paths(self) -> list[Path]:
+        if self.operation is None:
+            return []
+
+        return [path for path, _ in self._ctx_plan]
+
+
+    def fingerprint(self) -> str:
+        """Hash of the task id and operation
+
+        The operation is identified by its qualified name, its
+        `__version__` attribute if exists, and `function_digest` of its
+        code, closure and the Python functions it calls by global name.
+        Changes which the digest doesn't follow (e.g. methods of objects
+        or values it reads from globals) need a new `__version__` to
+        invalidate outputs cached before.
+        """
+        operation = self.operation
+
+        return stable_hash(
+            type(self).__qualname__,
+            self.id,
+            getattr(operation, '__module__', None),
+            getattr(operation, '__qualname__', type(operation).__qualname__),
+            getattr(operation, '__version__', None),
+            function_digest(operation)
+        )
+
+
     def make_graph(self, parent=None) -> Any:
         from pygraphviz import AGraph
 
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+import asyncio
+from typing import Any, AsyncIterator, Coroutine, Dict
 
+from sprinkler.constants import null
+from sprinkler.context.base import Context
+from sprinkler.validation import Validation
 from sprinkler.runnable.task import Task
-from sprinkler.operations import chat_completion
+from sprinkler.operations import chat_completion, achat_completion
 
 
 class ChatCompletionTask(Task):
-    """Task Class for chat completion with LLM"""
+    """Task Class for chat completion with LLM
+
+    `run` requests synchronously, `arun` requests without blocking
+    the event loop (see `operations.achat_completion`).
+    `astream_deltas` yields deltas of the completion as they arrive.
+    """
     def __init__(
         self, 
         id_: str, 
@@ -20,4 +29,106 @@ class ChatCompletionTask(Task):
         super().__init__(id_, 
                         chat_completion,
                         context=context_,
-                    )
\ No newline at end of file
+                    )
+
+
+    async def _arun_operation(self, input_: dict[str, Any]) -> Any:
+        return await achat_completion(**input_)
+
+
+    def astream_deltas(self, *args, **kwargs) -> TokenStream:
+        """Run the task and iterate deltas of the completion asynchronously."""
+        return self.astream_deltas_with_context({}, *args, **kwargs)
+
+
+    def astream_deltas_with_context(
+        self,
+        context_: dict[str, Any] | Context,
+        *args,
+        __validation__: Validation | None = None,
+        **kwargs
+    ) -> TokenStream:
+        """Run the task with given context and iterate deltas of the completion.
+
+        The request starts when iteration starts. After the iteration,
+        `TokenStream.output` is the assembled and validated output,
+        which is the same as the output of `arun_with_context`.
+        """
+        queue = asyncio.Queue()
+
+        def on_delta(delta: str) -> None:
+            queue.put_nowait(delta)
+
+        streaming = {'stream': True, 'on_delta': on_delta}
+        if isinstance(context_, Context):
+            context_ = context_.child(streaming)
+        else:
+            context_ = {**context_, **streaming}
+
+        return TokenStream(
+            self.arun_with_context(
+                context_, *args, __validation__=__validation__, **kwargs
+            ),
+            queue
+        )
+
+
+class TokenStream:
+    """Asynchronous iterator of deltas of a chat completion
+
+    Attributes:
+        output: the assembled and validated output after the iteration
+        ends, `null` before that
+    """
+
+    output: Any
+
+    def __init__(self, run: Coroutine, queue: asyncio.Queue) -> None:
+        self._run = run
+        self._queue = queue
+        self._task = None
+        self.output = null
+
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self
+
+
+    async def __anext__(self) -> str:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run)
+
+        if self._queue.empty() and not self._task.done():
+            getter = asyncio.ensure_future(self._queue.get())
+            done, _ = await asyncio.wait(
+                {getter, self._task}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                return getter.result()
+            getter.cancel()
+
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+
+        self.output = self._task.result()
+        raise StopAsyncIteration
+
+
+    async def result(self) -> Any:
+        """Consume the remaining deltas and return the output"""
+        async for _ in self:
+            pass
+        return self.output
+
+
+    async def aclose(self) -> None:
+        """Stop the request before the end of the stream"""
+        if self._task is None:
+            self._run.close()
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
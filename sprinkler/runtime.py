@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Coroutine, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import asyncio
+import atexit
+import os
+import sys
+import threading
+
+from sprinkler.tracing import propagate
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+def shutdown_executor(executor: Executor, wait: bool, cancel_futures: bool) -> None:
+    """Shut down the executor, cancelling pending futures if supported
+
+    `cancel_futures` is new in Python 3.9, before that pending futures
+    run before the executor shuts down.
+    """
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait, cancel_futures=cancel_futures)
+    else:
+        executor.shutdown(wait)
+
+
+class EventLoopThread:
+    """Event loop running forever in a daemon thread
+
+    Sync callers submit coroutines to the loop and wait for the results,
+    so the loop (and clients or connection pools bound to it) survives
+    across calls. The loop is started on first use and restarted in
+    a forked child process.
+    """
+
+    name: str
+
+    def __init__(self, name: str = 'sprinkler-event-loop') -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running event loop, started if it isn't yet"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    self._start()
+        return self._loop
+
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run_forever():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run_forever, name=self.name, daemon=True)
+        thread.start()
+        started.wait()
+
+        self._thread = thread
+        self._loop = loop
+
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run the coroutine in the loop and wait for the result
+
+        If it is called from the loop thread itself (e.g. sync `Task.run`
+        in an async operation), waiting would block the loop forever,
+        so the coroutine is run by a new loop in another thread instead.
+        """
+        if self.in_loop_thread():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                return executor.submit(asyncio.run, coro).result()
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+    def close(self) -> None:
+        """Stop the loop and wait for its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join()
+        loop.close()
+
+
+    def _reset_after_fork(self) -> None:
+        # the thread running loop doesn't exist in the child process
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+
+_event_loop_thread = EventLoopThread()
+
+atexit.register(_event_loop_thread.close)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_event_loop_thread._reset_after_fork)
+
+
+def get_event_loop_thread() -> EventLoopThread:
+    """The event loop thread shared by the process"""
+    return _event_loop_thread
+
+
+def run_coroutine(coro: Coroutine) -> Any:
+    """Run the coroutine from sync code in the shared event loop thread"""
+    return _event_loop_thread.run(coro)
+
+
+async def _anext(items: AsyncIterator) -> Any:
+    return await items.__anext__()
+
+
+def iterate_async(items: AsyncIterator) -> Iterator:
+    """Iterate the async iterator from sync code in the shared event loop thread"""
+    try:
+        while True:
+            try:
+                yield run_coroutine(_anext(items))
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(items, 'aclose', None)
+        if aclose is not None:
+            run_coroutine(aclose())
+
+
+class Runtime(Executor):
+    """Bounded execution resources shared by every runnable in a run tree
+
+    `Runtime` is given as `__executor__` and passed down to nested groups
+    and pipelines, so every level shares the same threads instead of
+    creating its own pool. At most `max_workers` callables are queued or
+    running at once. When a worker thread submits nested work and all
+    workers are busy, the work is run in the submitting thread, so
+    nested groups never wait for a worker that can't be freed.
+
+    Attributes:
+        max_workers: the maximum number of threads
+        max_processes: the maximum number of processes for `processes`
+        event_loop: the event loop thread for coroutines from sync code
+    """
+
+    max_workers: int
+    max_processes: int | None
+    event_loop: EventLoopThread
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        *,
+        max_processes: int | None = None,
+        event_loop: EventLoopThread | None = None
+    ) -> None:
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_processes = max_processes
+        self.event_loop = event_loop or get_event_loop_thread()
+
+        self._threads = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix='sprinkler-runtime'
+        )
+        self._slots = threading.Semaphore(self.max_workers)
+        self._local = threading.local()
+        self._processes = None
+        self._lock = threading.Lock()
+
+
+    def in_worker(self) -> bool:
+        """Whether the current thread is a worker of this runtime"""
+        return getattr(self._local, 'worker', False)
+
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if self.in_worker():
+            if not self._slots.acquire(blocking=False):
+                return self._run_inline(fn, args, kwargs)
+        else:
+            self._slots.acquire()
+        return self._start(fn, args, kwargs)
+
+
+    def try_submit(self, fn: Callable, /, *args, **kwargs) -> Future | None:
+        """Submit the callable only if a worker is free now
+
+        For callables which must run alongside the caller (e.g. stages of
+        stream connected by queues), as running them inline would block.
+
+        Returns:
+            the future, or None if every worker is busy
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        return self._start(fn, args, kwargs)
+
+
+    def _start(self, fn: Callable, args: tuple, kwargs: dict) -> Future:
+        # called with a slot acquired
+        try:
+            future = self._threads.submit(self._run_worker, propagate(fn), args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+
+    def _run_worker(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        self._local.worker = True
+        return fn(*args, **kwargs)
+
+
+    def _release(self, _: Future) -> None:
+        self._slots.release()
+
+
+    @staticmethod
+    def _run_inline(fn: Callable, args: tuple, kwargs: dict) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        """Process pool of runtime, created on first use"""
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    # the process pool imports multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._processes = ProcessPoolExecutor(self.max_processes)
+        return self._processes
+
+
+    def run_coroutine(self, coro: Coroutine) -> Any:
+        """Run the coroutine in the event loop of runtime"""
+        return self.event_loop.run(coro)
+
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        shutdown_executor(self._threads, wait, cancel_futures)
+        if self._processes is not None:
+            shutdown_executor(self._processes, wait, cancel_futures)
+
+
+_default_runtime = None
+_default_runtime_lock = threading.Lock()
+
+
+def get_default_runtime() -> Runtime:
+    """The runtime shared by the process when no executor is given"""
+    global _default_runtime
+
+    if _default_runtime is None:
+        with _default_runtime_lock:
+            if _default_runtime is None:
+                _default_runtime = Runtime()
+    return _default_runtime
+
+
+def _reset_default_runtime_after_fork() -> None:
+    global _default_runtime, _default_runtime_lock
+    _default_runtime = None
+    _default_runtime_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_default_runtime_after_fork)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from inspect import iscoroutinefunction
+from itertools import count
+import json
+import os
+import threading
+import time
+
+
+_tracer: ContextVar[Tracer | None] = ContextVar('sprinkler_tracer', default=None)
+_span: ContextVar[Span | None] = ContextVar('sprinkler_span', default=None)
+
+# the number of tracers in use, checked before anything else so that
+# disabled tracing costs one global lookup
+_active = 0
+_active_lock = threading.Lock()
+
+
+class Span:
+    """Timed section of a run
+
+    Attributes:
+        id: identifier of span in tracer
+        parent: id of the enclosing span, None for the root
+        name: id of runnable, or name of phase
+        category: 'task', 'pipeline', 'group', 'dag', 'phase' or 'queue'
+        start: start time in nanoseconds (`time.perf_counter_ns`)
+        end: end time in nanoseconds
+        thread: identifier of thread which ran the span
+        attributes: extra values (e.g. error)
+    """
+
+    __slots__ = (
+        'tracer', 'id', 'parent', 'name', 'category',
+        'start', 'end', 'thread', 'attributes', '_outer'
+    )
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        name: str,
+        category: str,
+        attributes: dict[str, Any] | None = None
+    ) -> None:
+        self.tracer = tracer
+        self.id = next(tracer._ids)
+        self.name = name
+        self.category = category
+        self.attributes = attributes or {}
+
+
+    def __enter__(self) -> Span:
+        self._outer = _span.get()
+        self.parent = None if self._outer is None else self._outer.id
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter_ns()
+        _span.set(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end = time.perf_counter_ns()
+        # set instead of reset, the span may end in a copied context
+        _span.set(self._outer)
+        if exc is not None:
+            self.attributes['error'] = repr(exc)
+        self.tracer._record(self)
+        return False
+
+
+    def record(self, parent: Span | None, start: int, end: int) -> None:
+        """Record the span measured outside of `with` block"""
+        self.parent = None if parent is None else parent.id
+        self.thread = threading.get_ident()
+        self.start = start
+        self.end = end
+        self.tracer._record(self)
+
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return (self.end - self.start) / 1e9
+
+
+class _NoopSpan:
+    """Span used when tracing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, category: str = 'phase', **attributes) -> Span | _NoopSpan:
+    """Span in the current tracer, which does nothing without tracer"""
+    tracer = _tracer.get() if _active else None
+    if tracer is None:
+        return _NOOP
+    return Span(tracer, name, category, attributes)
+
+
+def phase(name: str, fn: Callable, *args) -> Any:
+    """Call the function in a phase span if tracing is enabled"""
+    if _active:
+        tracer = _tracer.get()
+        if tracer is not None:
+            with Span(tracer, name, 'phase'):
+                return fn(*args)
+    return fn(*args)
+
+
+async def aphase(name: str, fn: Callable, *args) -> Any:
+    """Asynchronous version of `phase`"""
+    if _active:
+        tracer = _tracer.get()
+        if tracer is not None:
+            with Span(tracer, name, 'phase'):
+                return await fn(*args)
+    return await fn(*args)
+
+
+def traced(category: str) -> Callable[[Callable], Callable]:
+    """Decorate run methods of runnable to record spans named by its id"""
+
+    def decorator(method: Callable) -> Callable:
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def wrapper(self, *args, **kwargs):
+                tracer = _tracer.get() if _active else None
+                if tracer is None:
+                    return await method(self, *args, **kwargs)
+                with Span(tracer, self.id, category):
+                    return await method(self, *args, **kwargs)
+
+        else:
+            @wraps(method)
+            def wrapper(self, *args, **kwargs):
+                tracer = _tracer.get() if _active else None
+                if tracer is None:
+                    return method(self, *args, **kwargs)
+                with Span(tracer, self.id, category):
+                    return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _name_of(fn: Callable) -> str:
+    """Id of runnable whose method is called, or name of function"""
+    func = getattr(fn, 'func', fn)
+    owner = getattr(func, '__self__', None)
+    return getattr(owner, 'id', None) or getattr(func, '__name__', 'call')
+
+
+def propagate(fn: Callable) -> Callable:
+    """Function running in the current tracing context on another thread
+
+    The time until the function starts is recorded as a queue span.
+    The function is returned as it is if tracing is disabled.
+    """
+    tracer = _tracer.get() if _active else None
+    if tracer is None:
+        return fn
+
+    context = copy_context()
+    submitted = time.perf_counter_ns()
+    parent = _span.get()
+
+    def run(*args, **kwargs):
+        Span(tracer, _name_of(fn), 'queue').record(
+            parent, submitted, time.perf_counter_ns()
+        )
+        return fn(*args, **kwargs)
+
+    return lambda *args, **kwargs: context.run(run, *args, **kwargs)
+
+
+class Tracer:
+    """Recorder of spans of runs in its scope
+
+    Runs inside `with Tracer() as tracer:` (including members running
+    in threads of `Runtime` and asyncio tasks) record nested spans of
+    runnables and phases of tasks: context, bind, validate_input,
+    acquire (of resources), operation and validate_output. Members in
+    process pools are not traced.
+
+    Attributes:
+        spans: finished spans in order of their ends
+    """
+
+    spans: list[Span]
+
+    def __init__(self) -> None:
+        self.spans = []
+        self._ids = count()
+        self._lock = threading.Lock()
+        self._token = None
+        self._origin = time.perf_counter_ns()
+
+
+    def __enter__(self) -> Tracer:
+        global _active
+        with _active_lock:
+            _active += 1
+        self._token = _tracer.set(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        global _active
+        _tracer.reset(self._token)
+        with _active_lock:
+            _active -= 1
+        return False
+
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+    def to_json(self) -> list[dict[str, Any]]:
+        """Spans as JSON-compatible dictionaries, times in seconds from
+        the creation of tracer"""
+        return [{
+            'id': span.id,
+            'parent': span.parent,
+            'name': span.name,
+            'category': span.category,
+            'start': (span.start - self._origin) / 1e9,
+            'duration': span.duration,
+            'thread': span.thread,
+            'attributes': span.attributes
+        } for span in sorted(self.spans, key=lambda span: span.start)]
+
+
+    def to_chrome(self) -> dict[str, Any]:
+        """Spans in Chrome trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        return {
+            'traceEvents': [{
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self._origin) / 1e3,
+                'dur': (span.end - span.start) / 1e3,
+                'pid': pid,
+                'tid': span.thread,
+                'args': {'id': span.id, 'parent': span.parent, **span.attributes}
+            } for span in sorted(self.spans, key=lambda span: span.start)],
+            'displayTimeUnit': 'ms'
+        }
+
+
+    def dump_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f, indent=2, default=repr)
+
+
+    def dump_chrome(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome(), f, default=repr)
+
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Total time and count of spans for each category and name,
+        e.g. 'phase:validate_input'"""
+        summary = {}
+        for span in self.spans:
+            entry = summary.setdefault(
+                f'{span.category}:{span.name}', {'count': 0, 'total': 0.0}
+            )
+            entry['count'] += 1
+            entry['total'] += span.duration
+        return summary
@@ -1,5 +1,6 @@
 from typing import Any, List, Dict
 from collections.abc import Iterable
+import importlib
 
 from sprinkler.constants import null
 
@@ -24,4 +25,29 @@ def distribute_value(targets: List[str], value: Any) -> Dict[str, Any]:
         for t in targets:
             result[t] = value
 
-    return result
\ No newline at end of file
+    return result
+
+
+class LazyModule:
+    """Module imported on first access of its attribute
+
+    Optional or heavy dependencies (e.g. openai, pydantic) are bound
+    at module level as `openai = LazyModule('openai')`, so importing
+    sprinkler doesn't import them until they are used.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.__name = name
+        self.__module = None
+
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self.__module
+        if module is None:
+            # thread-safe, import system holds the lock of module
+            module = self.__module = importlib.import_module(self.__name)
+        return getattr(module, attr)
+
+
+    def __repr__(self) -> str:
+        return f'<lazy module {self.__name!r}>'
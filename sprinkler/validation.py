@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import random
+
+
+class Validation:
+    """Policy deciding when a task validates its input and output
+
+    Modes:
+        strict: validate every call (default)
+        sampled: validate a random fraction (`rate`) of calls
+        boundary: validate only at the entry and exit of the pipeline
+        which declares the policy
+        off: never validate, arguments are passed as they are
+
+    Attributes:
+        mode: one of the modes above
+        rate: the fraction of validated calls for sampled mode
+        entry: whether the runnable receiving this policy is at the entry
+        of the pipeline declaring the policy
+        exit: whether the runnable receiving this policy is at the exit
+        of the pipeline declaring the policy
+    """
+
+    STRICT = 'strict'
+    SAMPLED = 'sampled'
+    BOUNDARY = 'boundary'
+    OFF = 'off'
+    MODES = (STRICT, SAMPLED, BOUNDARY, OFF)
+
+    mode: str
+    rate: float
+    entry: bool
+    exit: bool
+
+    def __init__(
+        self,
+        mode: str = STRICT,
+        *,
+        rate: float = 1.0
+    ) -> None:
+        if mode not in Validation.MODES:
+            raise ValueError(f'Validation mode must be one of {Validation.MODES}.')
+        if not 0 <= rate <= 1:
+            raise ValueError('Validation rate must be between 0 and 1.')
+
+        self.mode = mode
+        self.rate = rate
+        self.entry = True
+        self.exit = True
+
+
+    @classmethod
+    def sampled(cls, rate: float) -> Validation:
+        return cls(cls.SAMPLED, rate=rate)
+
+
+    @classmethod
+    def of(cls, value: Validation | str | float | None) -> Validation | None:
+        """Convert the value given to `Task` or `Pipeline` into policy
+
+        Args:
+            value: policy itself, name of mode or rate of sampled mode
+        """
+        if value is None or isinstance(value, Validation):
+            return value
+        if isinstance(value, str):
+            return cls(value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return cls.sampled(value)
+        raise TypeError('validation must be Validation, str or float.')
+
+
+    def bind(self, entry: bool, exit: bool) -> Validation:
+        """Copy of this policy with the position in the pipeline"""
+        bound = Validation.__new__(Validation)
+        bound.mode = self.mode
+        bound.rate = self.rate
+        bound.entry = entry
+        bound.exit = exit
+        return bound
+
+
+    def decide(self) -> tuple[bool, bool]:
+        """Decide whether to validate (input, output) for one call"""
+        if self.mode == Validation.STRICT:
+            return True, True
+        if self.mode == Validation.OFF:
+            return False, False
+        if self.mode == Validation.BOUNDARY:
+            return self.entry, self.exit
+
+        sampled = random.random() < self.rate
+        return sampled, sampled
+
+
+    def __repr__(self) -> str:
+        if self.mode == Validation.SAMPLED:
+            return f'Validation({self.mode!r}, rate={self.rate})'
+        return f'Validation({self.mode!r})'
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator
+from collections import ChainMap
+from concurrent.futures import Executor, Future
+from functools import partial
+import io
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import uuid
+
+from sprinkler.context.base import Context
+from sprinkler.runnable.base import Runnable
+from sprinkler.runtime import shutdown_executor
+from sprinkler.utils import LazyModule
+
+
+multiprocessing = LazyModule('multiprocessing')
+
+
+# runnables registered in the worker process, indexed in DFS order
+_runnables: list[Runnable] = []
+# layers of context of registered runnables, in order of `context_layers`
+_layers: list[dict[str, Any]] = []
+
+
+def walk(runnable: Runnable) -> Iterator[Runnable]:
+    """Runnables of the tree in DFS order, the root first"""
+    yield runnable
+    for member in getattr(runnable, 'members', ()):
+        yield from walk(member)
+
+
+def context_layers(runnables: list[Runnable]) -> list[dict[str, Any]]:
+    """Layers of global context of runnables, the same order in workers"""
+    return [
+        layer
+        for runnable in runnables
+        if isinstance(getattr(runnable, 'context', None), Context)
+        for layer in runnable.context.global_context.maps
+    ]
+
+
+def default_mp_context() -> Any:
+    """Start method of workers, fork where it is safe
+
+    Fork is safe only while no other thread runs, since a thread
+    (e.g. the event loop thread or workers of runtime) may hold a lock
+    which is never released in the child. It is not used on macOS,
+    where system libraries aren't fork-safe.
+    """
+    methods = multiprocessing.get_all_start_methods()
+
+    if 'fork' in methods and sys.platform != 'darwin' and threading.active_count() == 1:
+        return multiprocessing.get_context('fork')
+    if 'forkserver' in methods:
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _initialize(runnables: list[Runnable]) -> None:
+    global _runnables, _layers
+    _runnables = runnables
+    _layers = context_layers(runnables)
+
+
+class _ContextRef:
+    """Context sent to a worker, registered layers replaced by indices"""
+
+    __slots__ = ('global_maps', 'history_maps', 'copies')
+
+    def __init__(
+        self,
+        global_maps: list[dict | int],
+        history_maps: list[dict],
+        copies: list[tuple[dict | int, dict]] | None
+    ) -> None:
+        self.global_maps = global_maps
+        self.history_maps = history_maps
+        self.copies = copies
+
+
+    def restore(self) -> Context:
+        context = Context()
+        context.global_context = ChainMap(*map(_layer, self.global_maps))
+        context.history_context = ChainMap(*self.history_maps)
+        if self.copies is not None:
+            context.copies = [
+                (_layer(layer), overlay) for layer, overlay in self.copies
+            ]
+        return context
+
+
+def _layer(layer: dict | int) -> dict:
+    return _layers[layer] if isinstance(layer, int) else layer
+
+
+def _restore(value: Any) -> Any:
+    return value.restore() if isinstance(value, _ContextRef) else value
+
+
+def _call(index: int, method_name: str, args: tuple, kwargs: dict) -> Any:
+    args = tuple(_restore(arg) for arg in args)
+    kwargs = {key: _restore(value) for key, value in kwargs.items()}
+    return getattr(_runnables[index], method_name)(*args, **kwargs)
+
+
+def _call_packed(
+    index: int,
+    method_name: str,
+    packed: Packed,
+    transport: SharedMemoryTransport
+) -> Packed:
+    args, kwargs = transport.unpack(packed)
+    return transport.pack(_call(index, method_name, args, kwargs))
+
+
+class Packed:
+    """Pickled value whose large buffers are in shared memory files
+
+    Attributes:
+        data: the pickle
+        paths: files of large buffers
+        buffers: indices of paths of out-of-band buffers in order
+    """
+
+    __slots__ = ('data', 'paths', 'buffers')
+
+    def __init__(self, data: bytes, paths: list[str], buffers: list[int]) -> None:
+        self.data = data
+        self.paths = paths
+        self.buffers = buffers
+
+
+    def discard(self) -> None:
+        """Remove the files which were not unpacked"""
+        for path in self.paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class _Pickler(pickle.Pickler):
+    """Pickler writing large buffers to files
+
+    bytes and bytearray are always pickled in-band by pickle, so they
+    are written by persistent id. Buffers of other objects (e.g. numpy
+    array) are out-of-band buffers of protocol 5.
+    """
+
+    def __init__(self, file: io.BytesIO, transport: SharedMemoryTransport) -> None:
+        super().__init__(file, protocol=5, buffer_callback=self._out_of_band)
+        self.transport = transport
+        self.paths = []
+        self.buffers = []
+
+
+    def _write(self, buffer: memoryview) -> int:
+        path = os.path.join(self.transport.directory, f'sprinkler-{uuid.uuid4().hex}')
+        self.paths.append(path)
+        # inputs may be private, so only the user can read the file
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(buffer)
+        return len(self.paths) - 1
+
+
+    def persistent_id(self, obj: Any) -> Any:
+        type_ = type(obj)
+        if (type_ is bytes or type_ is bytearray) and len(obj) >= self.transport.threshold:
+            return type_.__name__, self._write(memoryview(obj))
+        return None
+
+
+    def _out_of_band(self, buffer: pickle.PickleBuffer) -> bool:
+        try:
+            raw = buffer.raw()
+        except BufferError:
+            # not contiguous
+            return True
+        if raw.nbytes < self.transport.threshold:
+            return True
+        self.buffers.append(self._write(raw))
+        return False
+
+
+class _Unpickler(pickle.Unpickler):
+
+    def __init__(self, file: io.BytesIO, maps: list[mmap.mmap], buffers: list[int]) -> None:
+        super().__init__(file, buffers=[maps[i] for i in buffers])
+        self.maps = maps
+
+
+    def persistent_load(self, pid: Any) -> Any:
+        type_, index = pid
+        return (bytes if type_ == 'bytes' else bytearray)(self.maps[index])
+
+
+class SharedMemoryTransport:
+    """Transport of large buffers between processes by shared memory
+
+    Values are pickled with protocol 5, and each bytes, bytearray or
+    out-of-band buffer (e.g. of numpy array) of at least `threshold`
+    bytes is written to a file in shared memory (/dev/shm) instead of
+    being sent through the pipe of process pool. The receiver maps and
+    removes the file. Objects with out-of-band buffers are reconstructed
+    on the mapping without copy, bytes and bytearray are copied once.
+
+    Attributes:
+        threshold: the minimum size of buffer in bytes to be shared
+        directory: the directory of files, /dev/shm if it exists
+    """
+
+    threshold: int
+    directory: str
+
+    def __init__(self, threshold: int = 1 << 20, directory: str | None = None) -> None:
+        if directory is None:
+            directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+        self.threshold = max(1, threshold)
+        self.directory = str(directory)
+
+
+    def pack(self, value: Any) -> Packed:
+        file = io.BytesIO()
+        pickler = _Pickler(file, self)
+        try:
+            pickler.dump(value)
+        except BaseException:
+            Packed(b'', pickler.paths, []).discard()
+            raise
+        return Packed(file.getvalue(), pickler.paths, pickler.buffers)
+
+
+    def unpack(self, packed: Packed) -> Any:
+        maps = []
+        try:
+            for path in packed.paths:
+                with open(path, 'rb') as f:
+                    # private writable mapping, alive while objects use it
+                    maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        finally:
+            packed.discard()
+
+        return _Unpickler(io.BytesIO(packed.data), maps, packed.buffers).load()
+
+
+class WorkerPool(Executor):
+    """Process pool whose workers hold the runnables given at creation
+
+    The runnable trees and the layers of their context are registered
+    once in each worker by the pool initializer. Calls of registered
+    runnables send only the index of runnable, the layers of context
+    given to the run and its inputs to workers. Other calls are
+    submitted to the process pool as they are.
+
+    Workers are forked while the process runs no other thread, then
+    they are started at creation of the pool and inherit the runnables
+    without pickling, so tasks of closures or lambdas work. Otherwise
+    they are started by forkserver (spawn where unavailable) and the
+    runnables are pickled once per worker (see `default_mp_context`).
+    Tasks defined by the `Task` decorator work with every start method.
+
+    With `transport`, large buffers in inputs and outputs of registered
+    runnables are passed through shared memory (see `SharedMemoryTransport`).
+
+    e.g.
+        with WorkerPool(pipeline) as pool:
+            pipeline.run(text, __executor__=pool)
+
+    Attributes:
+        runnables: registered runnables in DFS order
+        max_workers: the maximum number of processes
+    """
+
+    runnables: list[Runnable]
+    max_workers: int | None
+    transport: SharedMemoryTransport | None
+
+    def __init__(
+        self,
+        *runnables: Runnable,
+        max_workers: int | None = None,
+        mp_context: Any = None,
+        transport: SharedMemoryTransport | None = None
+    ) -> None:
+        """Initialize the pool with runnable trees
+
+        Args:
+            runnables: roots of runnable trees run by the pool
+            max_workers: the maximum number of processes
+            mp_context: multiprocessing context, `default_mp_context`
+            if None
+            transport: transport of large buffers, pickled through
+            the pipe of process pool if None
+        """
+        # the process pool imports multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        if mp_context is None:
+            mp_context = default_mp_context()
+
+        self.runnables = [
+            runnable for root in runnables for runnable in walk(root)
+        ]
+        self.max_workers = max_workers
+        self.transport = transport
+        self._indices = {id(runnable): i for i, runnable in enumerate(self.runnables)}
+        self._layer_indices = {
+            id(layer): i for i, layer in enumerate(context_layers(self.runnables))
+        }
+        self._pool = ProcessPoolExecutor(
+            max_workers,
+            mp_context=mp_context,
+            initializer=_initialize,
+            initargs=(self.runnables,)
+        )
+
+        if mp_context.get_start_method() == 'fork':
+            # fork every worker now, before the process starts threads
+            self._pool.submit(int).result()
+
+
+    def _send(self, value: Any) -> Any:
+        """Value sent to workers, context without its registered layers"""
+        if not isinstance(value, Context):
+            return value
+
+        def ref(layer):
+            return self._layer_indices.get(id(layer), layer)
+
+        return _ContextRef(
+            [ref(layer) for layer in value.global_context.maps],
+            list(value.history_context.maps),
+            None if value.copies is None else [
+                (ref(layer), overlay) for layer, overlay in value.copies
+            ]
+        )
+
+
+    def index(self, runnable: Runnable) -> int | None:
+        """Index of registered runnable, None if not registered"""
+        return self._indices.get(id(runnable))
+
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        func, bound_args, bound_kwargs = fn, (), {}
+        if isinstance(fn, partial):
+            func, bound_args, bound_kwargs = fn.func, fn.args, fn.keywords
+
+        index = self.index(getattr(func, '__self__', None))
+        if index is None:
+            return self._pool.submit(fn, *args, **kwargs)
+
+        args = tuple(self._send(arg) for arg in bound_args + args)
+        kwargs = {
+            key: self._send(value) for key, value in {**bound_kwargs, **kwargs}.items()
+        }
+
+        if self.transport is None:
+            return self._pool.submit(_call, index, func.__name__, args, kwargs)
+
+        packed = self.transport.pack((args, kwargs))
+        try:
+            inner = self._pool.submit(
+                _call_packed, index, func.__name__, packed, self.transport
+            )
+        except BaseException:
+            packed.discard()
+            raise
+
+        # result is unpacked before the caller sees it
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def unpack(inner: Future) -> None:
+            # files of inputs remain if the worker failed before unpacking
+            packed.discard()
+            try:
+                future.set_result(self.transport.unpack(inner.result()))
+            except BaseException as e:
+                future.set_exception(e)
+
+        inner.add_done_callback(unpack)
+        return future
+
+
+    def map(self, fn: Callable, *iterables, timeout: float | None = None, chunksize: int = 1):
+        return self._pool.map(fn, *iterables, timeout=timeout, chunksize=chunksize)
+
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        shutdown_executor(self._pool, wait, cancel_futures)
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubOpenAI:
+    """Local server answering chat completion requests like OpenAI API"""
+
+    def __init__(self):
+        self.requests = []
+        self.delay = 0
+        # delays of the first requests, `delay` after them
+        self.delays = []
+        self.active = 0
+        self.peak = 0
+        # (status, headers) answered before completions
+        self.failures = []
+        self.lock = threading.Lock()
+
+
+    def completion(self, body):
+        content = body['messages'][-1]['content']
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body['model'],
+            'choices': [{
+                'index': i,
+                'message': {'role': 'assistant', 'content': f'echo: {content}'},
+                'finish_reason': 'stop'
+            } for i in range(body.get('n', 1))],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+        }
+
+
+    def chunks(self, body):
+        content = self.completion(body)['choices'][0]['message']['content']
+        for i, word in enumerate(content.split(' ')):
+            yield {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'created': 0,
+                'model': body['model'],
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if i == 0 else ' ' + word},
+                    'finish_reason': None
+                }]
+            }
+        yield {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion.chunk',
+            'created': 0,
+            'model': body['model'],
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+        }
+
+
+@pytest.fixture
+def stub_openai(monkeypatch):
+    import openai
+
+    stub = StubOpenAI()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with stub.lock:
+                stub.requests.append(body)
+                stub.active += 1
+                stub.peak = max(stub.peak, stub.active)
+                failure = stub.failures.pop(0) if stub.failures else None
+                delay = stub.delays.pop(0) if stub.delays else stub.delay
+            time.sleep(delay)
+            with stub.lock:
+                stub.active -= 1
+
+            if failure is None and body.get('stream'):
+                status, headers = 200, {'Content-Type': 'text/event-stream'}
+                payload = b''.join(
+                    b'data: ' + json.dumps(chunk).encode() + b'\n\n'
+                    for chunk in stub.chunks(body)
+                ) + b'data: [DONE]\n\n'
+            elif failure is None:
+                status, headers = 200, {'Content-Type': 'application/json'}
+                payload = json.dumps(stub.completion(body)).encode()
+            else:
+                status, headers = failure
+                headers = {'Content-Type': 'application/json', **headers}
+                payload = json.dumps({'error': {
+                    'message': f'stub error {status}', 'type': 'stub'
+                }}).encode()
+
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    stub.api_base = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setattr(openai, 'api_key', 'sk-stub')
+
+    yield stub
+
+    server.shutdown()
+    server.server_close()
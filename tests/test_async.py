@@ -62,4 +62,40 @@ async def test_async_pipeline_of_group():
     assert output == {
         't3': 'helloworldhelloworldhelloworld',
         't4': 'helloworld-3'
-    }
\ No newline at end of file
+    }
+
+def test_async_operation_shares_event_loop():
+    loops = []
+
+    @Task('task1')
+    async def task1(a: int) -> int:
+        loops.append(asyncio.get_running_loop())
+        return a
+
+    task1.run(1)
+    task1.run(2)
+
+    assert loops[0] is loops[1]
+
+
+@pytest.mark.asyncio
+async def test_async_operation_in_running_loop():
+    @Task('task1')
+    async def task1(a: int) -> str:
+        await asyncio.sleep(0)
+        return str(a)
+
+    assert task1.run(3) == '3'
+
+
+def test_async_operation_calling_sync_run():
+    @Task('inner')
+    async def inner(a: int) -> int:
+        await asyncio.sleep(0)
+        return a * 2
+
+    @Task('outer')
+    async def outer(a: int) -> int:
+        return inner.run(a) + 1
+
+    assert outer.run(3) == 7
@@ -0,0 +1,79 @@
+import pytest
+
+from sprinkler import Pipeline, Group, Task, Ctx, Runtime
+
+
+def divide(a: int, b: int) -> float:
+    return a / b
+
+
+def add(a: float, c: Ctx[int]) -> float:
+    return a + c
+
+
+def test_run_batch():
+    pipeline = Pipeline('pipeline').add(
+        Task('divide', divide), Task('add', add)
+    )
+
+    results = pipeline.run_batch(
+        [(4, 2), (1, 0), (9, 3)], context={'c': 1}, concurrency=2
+    )
+    results = sorted(results, key=lambda result: result.index)
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].output == 3
+    assert results[2].output == 4
+    assert isinstance(results[1].error, Exception)
+
+
+def test_run_batch_with_runtime():
+    group = Group('group').add(
+        Task('divide', divide),
+        Task('swap', lambda a, b: (b, a))
+    )
+
+    with Runtime(2) as runtime:
+        results = list(group.run_batch(
+            ((i, 1) for i in range(20)), __executor__=runtime
+        ))
+
+    assert sorted(result.unwrap()['divide'] for result in results) == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_arun_batch():
+    task = Task('divide', divide)
+
+    results = [result async for result in task.arun_batch(
+        [(4, 2), (1, 0)], concurrency=1
+    )]
+
+    assert [result.index for result in results] == [0, 1]
+    assert results[0].output == 2
+    with pytest.raises(Exception):
+        results[1].unwrap()
+
+
+@pytest.mark.asyncio
+async def test_arun_batch_closes_remaining_runs():
+    import asyncio
+
+    cancelled = []
+
+    async def wait(a: float) -> float:
+        try:
+            await asyncio.sleep(a)
+        except asyncio.CancelledError:
+            cancelled.append(a)
+            raise
+        return a
+
+    results = Task('wait', wait).arun_batch([0, 5, 5], concurrency=3)
+    async for result in results:
+        assert result.output == 0
+        break
+    await results.aclose()
+
+    # cancelled runs are awaited, not left pending
+    assert cancelled == [5, 5]
@@ -0,0 +1,145 @@
+import time
+
+import pytest
+
+from sprinkler.cache import LRUCache, SQLiteCache, TieredCache, stable_hash
+from sprinkler.constants import null
+from sprinkler.runnable.task import ChatCompletionTask
+
+
+MESSAGES = [{'role': 'user', 'content': 'hello'}]
+
+
+def test_stable_hash():
+    assert stable_hash({'a': 1, 'b': [1, 2]}) == stable_hash({'b': [1, 2], 'a': 1})
+    assert stable_hash('m', MESSAGES) != stable_hash('m', MESSAGES, {'n': 2})
+
+
+def test_stable_hash_tags_types():
+    assert stable_hash({1: 'a'}) != stable_hash({'1': 'a'})
+    assert stable_hash((1, 2)) != stable_hash([1, 2])
+    assert stable_hash(True) != stable_hash(1)
+    assert stable_hash({1: 'a', 'b': 2}) == stable_hash({'b': 2, 1: 'a'})
+    assert stable_hash({1, 'b'}) == stable_hash({'b', 1})
+
+    with pytest.raises(TypeError):
+        stable_hash(lambda x: x)
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is null
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2}
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(ttl=0.05)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is null
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    path = tmp_path / 'cache.db'
+    cache = SQLiteCache(path)
+    cache.set('a', {'content': 'hello'})
+    cache.close()
+
+    cache = SQLiteCache(path)
+    assert cache.get('a') == {'content': 'hello'}
+    assert len(cache) == 1
+
+
+def test_tiered_cache_promotes(tmp_path):
+    memory, disk = LRUCache(), SQLiteCache(tmp_path / 'cache.db')
+    disk.set('a', 1)
+    cache = TieredCache(memory, disk)
+
+    assert cache.get('a') == 1
+    assert memory.get('a') == 1
+    assert cache.get('b') is null
+
+
+def test_chat_completion_task_cache(stub_openai):
+    cache = LRUCache()
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base})
+
+    for _ in range(2):
+        assert task.run_with_context({'cache': cache}, MESSAGES) == 'echo: hello'
+    assert task.run_with_context({'cache': cache, 'n': 2}, MESSAGES) == ['echo: hello'] * 2
+
+    assert len(stub_openai.requests) == 2
+    assert cache.stats()['hits'] == 1
+
+    # without cache in context
+    task.run(MESSAGES)
+    assert len(stub_openai.requests) == 3
+
+
+def test_chat_completion_cache_keyed_by_api_base(stub_openai):
+    cache = LRUCache()
+    task = ChatCompletionTask('chat', {'cache': cache})
+    # another backend serving the same model name
+    other_base = stub_openai.api_base.replace('127.0.0.1', 'localhost')
+
+    task.run_with_context({'api_base': stub_openai.api_base}, MESSAGES)
+    task.run_with_context({'api_base': other_base}, MESSAGES)
+    task.run_with_context({'api_base': other_base}, MESSAGES)
+
+    assert len(stub_openai.requests) == 2
+    assert cache.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_achat_completion_task_cache(stub_openai):
+    from sprinkler.operations import close_session
+
+    cache = LRUCache()
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base, 'cache': cache})
+
+    assert await task.arun(MESSAGES) == 'echo: hello'
+    assert await task.arun(MESSAGES) == 'echo: hello'
+    await close_session()
+
+    assert len(stub_openai.requests) == 1
+
+
+def test_disk_cache(tmp_path):
+    from sprinkler.cache import DiskCache
+
+    cache = DiskCache(tmp_path)
+    cache.set('ab' * 32, {'output': 'x' * 1000})
+
+    assert DiskCache(tmp_path).get('ab' * 32) == {'output': 'x' * 1000}
+    assert cache.get('cd' * 32) is null
+    # compressed
+    assert cache.size() < 1000
+
+
+def test_disk_cache_prune(tmp_path):
+    from sprinkler.cache import DiskCache
+
+    cache = DiskCache(tmp_path, max_age=60)
+    for i in range(4):
+        cache.set(f'{i:02}' * 32, 'x' * 1000)
+    size = cache.size() // 4
+
+    cache.max_bytes = size * 2
+    cache.get('00' * 32)
+    assert cache.prune() == 2
+    # recently read value is kept
+    assert cache.get('00' * 32) == 'x' * 1000
+    assert cache.get('01' * 32) is null
+
+    cache.max_age = 0
+    assert cache.prune() == 2
+    assert len(cache) == 0
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from sprinkler import Group
+from sprinkler.operations import achat_completion, close_session, set_concurrency_limit
+from sprinkler.runnable.task import ChatCompletionTask
+
+
+MESSAGES = [{'role': 'user', 'content': 'hello'}]
+
+
+def test_chat_completion_with_stub(stub_openai):
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base})
+
+    assert task.run(MESSAGES) == 'echo: hello'
+
+
+@pytest.mark.asyncio
+async def test_achat_completion_with_stub(stub_openai):
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base})
+
+    assert await task.arun(MESSAGES) == 'echo: hello'
+    assert await task.arun_with_context({'n': 2}, MESSAGES) == ['echo: hello'] * 2
+    await close_session()
+
+
+@pytest.mark.asyncio
+async def test_achat_completion_concurrency_limit(stub_openai):
+    stub_openai.delay = 0.05
+    set_concurrency_limit('stub-model', 2)
+
+    outputs = await asyncio.gather(*[
+        achat_completion(
+            [{'role': 'user', 'content': str(i)}],
+            model='stub-model',
+            api_base=stub_openai.api_base
+        ) for i in range(6)
+    ])
+    await close_session()
+
+    assert outputs == [f'echo: {i}' for i in range(6)]
+    assert stub_openai.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_task_in_async_group(stub_openai):
+    stub_openai.delay = 0.1
+    group = Group('group', context={'api_base': stub_openai.api_base}).add(*[
+        ChatCompletionTask(f'chat{i}') for i in range(4)
+    ])
+
+    output = await group.arun(__default__=MESSAGES)
+    await close_session()
+
+    assert output == {f'chat{i}': 'echo: hello' for i in range(4)}
+    # requests overlapped instead of blocking the loop one by one
+    assert stub_openai.peak > 1
+
+
+def test_chat_completion_stream(stub_openai):
+    deltas = []
+    task = ChatCompletionTask('chat', {
+        'api_base': stub_openai.api_base,
+        'stream': True,
+        'on_delta': deltas.append
+    })
+
+    assert task.run(MESSAGES) == 'echo: hello'
+    assert deltas == ['echo:', ' hello']
+    assert stub_openai.requests[0]['stream'] is True
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_task_astream_deltas(stub_openai):
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base})
+
+    stream = task.astream_deltas(MESSAGES)
+    deltas = [delta async for delta in stream]
+
+    assert deltas == ['echo:', ' hello']
+    assert stream.output == 'echo: hello'
+
+    stream = task.astream_deltas_with_context({'whole_output': True}, MESSAGES)
+    output = await stream.result()
+    await close_session()
+
+    assert output['choices'][0]['message']['content'] == 'echo: hello'
+
+
+def test_session_closed_with_loop(stub_openai):
+    import openai
+
+    async def run():
+        await achat_completion(MESSAGES, model='stub-model', api_base=stub_openai.api_base)
+        return openai.aiosession.get()
+
+    # asyncio.run shuts down async generators before closing the loop
+    session = asyncio.run(run())
+    assert session.closed
+
+
+@pytest.mark.asyncio
+async def test_achat_completion_task_hedged_on_loop(stub_openai, monkeypatch):
+    from sprinkler import Hedge
+
+    def blocking_completion(**kwargs):
+        raise AssertionError('sync completion blocks a thread')
+
+    stub_openai.delays = [1]
+    task = ChatCompletionTask('chat', {'api_base': stub_openai.api_base})
+    task.hedge = Hedge(initial_delay=0.05)
+    monkeypatch.setattr(task, 'operation', blocking_completion)
+
+    assert await task.arun(MESSAGES) == 'echo: hello'
+    await close_session()
+
+    assert (task.hedge.fired, task.hedge.won) == (1, 1)
+    assert len(stub_openai.requests) == 2
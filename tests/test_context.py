@@ -0,0 +1,140 @@
+from typing import Any
+
+from sprinkler import Context, Task, Pipeline, Ctx, K
+from sprinkler.context import Path
+
+
+def test_context_child_shares_values():
+    context = Context()
+    document = {'text': 'sprinkler' * 1000}
+    context.add_global({'document': document})
+
+    child = context.child()
+
+    assert child.global_context['document'] is document
+
+
+def test_context_child_shares_history():
+    context = Context()
+    context.add_history({'text': 'sprinkler'}, 't1')
+
+    child = context.child()
+    child.add_history(2, 't2')
+
+    # layers of history are shared, not copied
+    assert context.history_context.maps[0] in child.history_context.maps
+    assert dict(child.history_context) == {'t1': {'text': 'sprinkler'}, 't2': 2}
+    assert 't2' not in context.history_context
+
+
+def test_context_child_priority():
+    context = Context()
+    context.add_global({'a': 1, 'b': 1})
+
+    given = Context()
+    given.add_global({'a': 2})
+    given.add_history(3, 'task')
+
+    child = context.child(given)
+    child.add_global({'b': 4})
+
+    assert child.query([K('a'), K('b'), K('task')]) == {
+        K('a'): 2, K('b'): 4, K('task'): 3
+    }
+
+
+def test_context_child_isolation():
+    context = Context()
+    context.add_global({'a': 1})
+
+    child = context.child({'b': 2})
+    child.add_history(3, 'task')
+
+    assert dict(context.global_context) == {'a': 1}
+    assert dict(context.history_context) == {}
+
+
+def test_context_values_by_reference():
+    class Collector:
+        def __init__(self) -> None:
+            self.items = []
+
+        def add(self, item: int) -> None:
+            self.items.append(item)
+
+    def operation(a: int, sink: Ctx[Any]) -> int:
+        sink(a)
+        return a
+
+    collector = Collector()
+    p = Pipeline('p').add(Task('t', operation))
+
+    assert p.run_with_context({'sink': collector.add}, 1) == 1
+    assert collector.items == [1]
+
+
+def test_context_writes_stay_in_overlay():
+    context = Context()
+    context.add_global({'a': [1]})
+
+    child = context.child()
+    child.add_global({'a': [2]})
+
+    assert context.resolve(Path(K('a'))) == [1]
+    assert child.resolve(Path(K('a'))) == [2]
+
+
+def test_runnable_context_is_not_leaked_across_runs():
+    def append(a: int, acc: Ctx[Any]) -> int:
+        acc.append(a)
+        return len(acc)
+
+    task = Task('t', append, context={'acc': []})
+    assert [task.run(1) for _ in range(3)] == [1, 1, 1]
+
+    # members of a run share the copy of pipeline's context
+    p = Pipeline('p', context={'acc': []}).add(Task('t1', append), Task('t2', append))
+    assert [p.run(1) for _ in range(3)] == [2, 2, 2]
+    assert p.context.global_context['acc'] == []
+
+    # values given to a run are passed by reference
+    acc = []
+    task.run_with_context({'acc': acc}, 1)
+    assert acc == [1]
+
+
+def test_pipeline_history_is_not_leaked():
+    def double(a: int) -> int:
+        return a * 2
+
+    p = Pipeline('pipeline').add(Task('t1', double))
+
+    assert p.run(1) == 2
+    assert p.run(2) == 4
+    assert dict(p.context.history_context) == {}
+
+
+def test_context_resolve_path():
+    from sprinkler.constants import null
+
+    context = Context()
+    context.add_global({'t1': {'a': 1}, 'b': 2})
+    context.add_history((3, 4), 't1')
+
+    assert context.resolve(Path(K('t1', 1))) == 4
+    # falls through to global context if history doesn't have the path
+    assert context.resolve(Path(K('t1', 'a'))) == 1
+    assert context.resolve(Path(K('b'))) == 2
+    assert context.resolve(Path(K('c'))) is null
+
+
+def test_task_compiles_query_plan():
+    def operation(a: Ctx[int, K('t1', 0)], b: Ctx[int, K('t1', 0)], c: int) -> int:
+        return a + b + c
+
+    task = Task('task', operation)
+    context = Context()
+    context.add_history((1, 2), 't1')
+
+    assert len(task._ctx_plan) == 1
+    assert task.run_with_context(context, 3) == 5
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+
+import pytest
+
+from sprinkler import DAG, Pipeline, Task, Ann, Ctx, K
+
+
+def make_tasks():
+    @Task('t1')
+    def t1(a: int, b: int) -> int:
+        return a + b
+
+    @Task('t2')
+    def t2(a: str, b: str) -> str:
+        return a + b
+
+    @Task('t3')
+    def t3(a: Ann[str, 't2'], b: Ann[int, 't1']) -> str:
+        return a * b
+
+    @Task('t4')
+    def t4(a: Ann[str, 't2'], b: Ctx[int, 't1']) -> str:
+        return f'{a}-{b}'
+
+    return t1, t2, t3, t4
+
+
+def test_dag_infers_dependencies():
+    dag = DAG('dag').add(*make_tasks())
+
+    assert dag.dependencies() == {
+        't1': set(), 't2': set(), 't3': {'t1', 't2'}, 't4': {'t1', 't2'}
+    }
+
+
+def test_dag_run():
+    dag = DAG('dag').add(*make_tasks())
+
+    output = dag.run(t1=(1, 2), t2=('hello', 'world'))
+
+    assert output == {
+        't3': 'helloworldhelloworldhelloworld',
+        't4': 'helloworld-3'
+    }
+
+
+@pytest.mark.asyncio
+async def test_dag_arun():
+    dag = DAG('dag').add(*make_tasks())
+
+    output = await dag.arun(t1=(1, 2), t2=('hello', 'world'))
+
+    assert output == {
+        't3': 'helloworldhelloworldhelloworld',
+        't4': 'helloworld-3'
+    }
+
+
+def test_dag_runs_independent_branches_concurrently():
+    left_started, right_started = threading.Event(), threading.Event()
+
+    # each branch waits until the other has started
+    def left(a: int) -> int:
+        left_started.set()
+        assert right_started.wait(5)
+        return a
+
+    def right(a: int) -> int:
+        right_started.set()
+        assert left_started.wait(5)
+        return a
+
+    @Task('join')
+    def join(a: Ann[int, 'left'], b: Ann[int, K('right', 0)]) -> int:
+        return a + b
+
+    dag = DAG('dag').add(
+        Task('left', left),
+        join,
+        Pipeline('right').add(Task('r1', right), Task('r2', lambda a: (a,)))
+    )
+
+    assert dag.run(__default__=1) == {'join': 2}
+
+
+def test_dag_input_fields_are_not_dependencies():
+    def greet(name: Ann[str, 'name'], age: Ann[int, 'age']) -> str:
+        return f'{name} {age}'
+
+    def first(text: Ann[str, 'name']) -> str:
+        return text
+
+    dag = DAG('dag').add(
+        Task('name', lambda a: a),
+        Task('greet', greet),
+        # Ann keys inside a pipeline read the previous output
+        Pipeline('p').add(Task('fields', lambda a: a), Task('first', first))
+    )
+
+    assert dag.dependencies() == {'name': set(), 'greet': set(), 'p': set()}
+    person = {'name': 'kim', 'age': 3}
+    assert dag.run(name=1, greet=person, p=person) == {
+        'name': 1, 'greet': 'kim 3', 'p': 'kim'
+    }
+
+
+def test_dag_cycle():
+    @Task('a')
+    def a(x: Ann[int, 'b']) -> int:
+        return x
+
+    @Task('b')
+    def b(x: Ann[int, 'a']) -> int:
+        return x
+
+    with pytest.raises(Exception) as err:
+        DAG('dag').add(a, b).run()
+
+    assert 'cycle' in err.value.args[0]
+
+
+def test_dag_context_dependency_keeps_input():
+    def t4(c: Ctx[int, K('t1')], y: int) -> int:
+        return c + y
+
+    dag = DAG('dag').add(Task('t1', lambda a: a * 2), Task('t4', t4))
+
+    assert dag.dependencies() == {'t1': set(), 't4': {'t1'}}
+    assert dag.run(t1=1, t4=10) == {'t4': 12}
+
+
+@pytest.mark.asyncio
+async def test_dag_arun_awaits_cancelled_members():
+    cancelled = []
+
+    async def fail(a: int) -> int:
+        raise ValueError('failed')
+
+    async def slow(a: int) -> int:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(a)
+            raise
+        return a
+
+    dag = DAG('dag').add(Task('fail', fail), Task('slow', slow))
+
+    with pytest.raises(Exception):
+        await dag.arun(__default__=1)
+    assert cancelled == [1]
@@ -1,5 +1,10 @@
+import asyncio
+import threading
+import time
 from concurrent.futures import ProcessPoolExecutor
 
+import pytest
+
 from sprinkler import Pipeline, Group, Task, Ctx
 
 
@@ -140,4 +145,128 @@ def test_group_with_processpool():
     assert output == {
         'pipeline1': 'sprinklersprinklersprinkler',
         'pipeline2': [1, 2, 3, 1, 2, 3, 1, 2, 3]
-    }
\ No newline at end of file
+    }
+
+def sleeper(id_, seconds, fail=False):
+    @Task(id_)
+    def sleep(a: int) -> int:
+        time.sleep(seconds)
+        if fail:
+            raise ValueError(id_)
+        return a
+
+    return sleep
+
+
+def async_sleeper(id_, seconds, finished=None):
+    @Task(id_)
+    async def sleep(a: int) -> int:
+        await asyncio.sleep(seconds)
+        if finished is not None:
+            finished.append(id_)
+        return a
+
+    return sleep
+
+
+def blocker(id_, release, finished):
+    @Task(id_)
+    def block(a: int) -> int:
+        release.wait(5)
+        finished.append(id_)
+        return a
+
+    return block
+
+
+def test_group_first_mode():
+    release, finished = threading.Event(), []
+    group = Group('group', mode='first').add(
+        blocker('slow', release, finished), sleeper('fast', 0)
+    )
+
+    # returns while the slow member is still running
+    assert group.run(__default__=1) == {'fast': 1}
+    assert finished == []
+    release.set()
+
+
+def test_group_first_mode_empty():
+    assert Group('group', mode='first').run(__default__=1) == {}
+
+
+def test_group_quorum_ignores_failures():
+    group = Group('group', mode=2).add(
+        sleeper('a', 0.01), sleeper('b', 0.01, fail=True), sleeper('c', 0.05)
+    )
+    assert group.run(__default__=1) == {'a': 1, 'c': 1}
+
+    group = Group('group', mode=2).add(
+        sleeper('a', 0.01, fail=True), sleeper('b', 0.01, fail=True), sleeper('c', 0.01)
+    )
+    with pytest.raises(ValueError):
+        group.run(__default__=1)
+
+
+def test_group_timeout():
+    release, finished = threading.Event(), []
+    group = Group('group', timeout=0.05).add(
+        sleeper('fast', 0), blocker('slow', release, finished)
+    )
+
+    with pytest.raises(TimeoutError):
+        group.run(__default__=1)
+    assert finished == []
+    release.set()
+
+
+def test_group_member_timeout():
+    release, finished = threading.Event(), []
+    group = Group('group', member_timeout=0.05, mode=1).add(
+        blocker('slow', release, finished), sleeper('fast', 0.01, fail=True)
+    )
+    with pytest.raises(ValueError):
+        group.run(__default__=1)
+
+    group = Group('group', member_timeout=0.05).add(blocker('slow2', release, finished))
+    with pytest.raises(TimeoutError, match='slow2'):
+        group.run(__default__=1)
+    assert finished == []
+    release.set()
+
+
+def test_group_invalid_mode():
+    with pytest.raises(ValueError):
+        Group('group', mode=0)
+    with pytest.raises(ValueError):
+        Group('group', mode=True)
+    with pytest.raises(ValueError):
+        Group('group', on_straggler='ignore')
+
+
+@pytest.mark.asyncio
+async def test_async_group_stragglers():
+    finished = []
+    group = Group('group', mode='first').add(
+        async_sleeper('slow', 0.05, finished), async_sleeper('fast', 0)
+    )
+    assert await group.arun(__default__=1) == {'fast': 1}
+    await asyncio.sleep(0.1)
+    assert finished == []
+
+    group = Group('group', mode='first', on_straggler='detach').add(
+        async_sleeper('slow', 0.05, finished), async_sleeper('fast', 0)
+    )
+    assert await group.arun(__default__=1) == {'fast': 1}
+    await asyncio.sleep(0.1)
+    assert finished == ['slow']
+
+
+@pytest.mark.asyncio
+async def test_async_group_timeout():
+    group = Group('group', timeout=0.05).add(async_sleeper('slow', 1))
+    with pytest.raises(TimeoutError):
+        await group.arun(__default__=1)
+
+    group = Group('group', timeout=1).add(async_sleeper('a', 0), async_sleeper('b', 0.01))
+    assert await group.arun(__default__=1) == {'a': 1, 'b': 1}
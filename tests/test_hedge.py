@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from sprinkler import Task, Pipeline, Hedge, Runtime
+
+
+def slow_first(seconds):
+    calls = []
+
+    def operation(x: int) -> int:
+        calls.append(x)
+        if len(calls) == 1:
+            time.sleep(seconds)
+        return x + 1
+
+    return operation, calls
+
+
+def test_hedge_delay():
+    hedge = Hedge(50, initial_delay=0.5, min_samples=3)
+    assert hedge.delay() == 0.5
+
+    for latency in (0.1, 0.3, 0.2):
+        hedge.record(latency)
+    assert hedge.delay() == 0.2
+
+    with pytest.raises(ValueError):
+        Hedge(0)
+
+
+def test_hedged_task():
+    operation, calls = slow_first(1)
+    hedge = Hedge(initial_delay=0.05)
+    task = Task('task', operation, hedge=hedge)
+
+    assert task.run(1) == 2
+    assert len(calls) == 2
+    assert hedge.stats()['fired'] == 1
+    assert hedge.stats()['won'] == 1
+
+    # fast enough, not hedged
+    assert task.run(2) == 3
+    assert len(calls) == 3
+    assert hedge.stats()['calls'] == 2
+    assert hedge.stats()['fired'] == 1
+
+
+def test_hedge_failed_attempt():
+    calls = []
+
+    def operation(x: int) -> int:
+        calls.append(x)
+        attempt = len(calls)
+        time.sleep(0.1)
+        raise ValueError(attempt)
+
+    task = Task('task', operation, hedge=Hedge(initial_delay=0.01))
+    with pytest.raises(ValueError, match='1'):
+        task.run(1)
+    assert len(calls) == 2
+
+
+def test_hedge_uses_runtime_of_run():
+    release = threading.Event()
+    workers = []
+
+    def operation(x: int) -> int:
+        workers.append(runtime.in_worker())
+        if len(workers) == 1:
+            release.wait(5)
+        return x + 1
+
+    hedge = Hedge(initial_delay=0.01)
+    task = Task('task', operation, hedge=hedge)
+
+    with Runtime(2) as runtime:
+        assert Pipeline('p').add(task).run(1, __executor__=runtime) == 2
+        release.set()
+    assert workers == [True, True]
+
+
+def test_hedge_records_attempts_cut_short():
+    release = threading.Event()
+    calls = []
+    hedge = Hedge(initial_delay=0.05)
+
+    def slow(x: int) -> int:
+        if not calls:
+            calls.append(x)
+            release.wait(5)
+        return x + 1
+
+    assert hedge.call(slow, 1) == 2
+    release.set()
+
+    # the primary cut short by the duplicate is recorded at its elapsed time
+    latencies = sorted(hedge._latencies)
+    assert len(latencies) == 2
+    assert latencies[-1] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_async_hedged_task():
+    calls = []
+    cancelled = []
+
+    async def operation(x: int) -> int:
+        calls.append(x)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(x)
+                raise
+        return x + 1
+
+    hedge = Hedge(initial_delay=0.05)
+    task = Task('task', operation, hedge=hedge)
+
+    assert await task.arun(1) == 2
+    await asyncio.sleep(0)
+    assert cancelled == [1]
+    assert (hedge.fired, hedge.won) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_async_hedged_sync_operation():
+    operation, calls = slow_first(1)
+    hedge = Hedge(initial_delay=0.05)
+    task = Task('task', operation, hedge=hedge)
+
+    assert await task.arun(1) == 2
+    assert hedge.won == 1
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+import sprinkler
+
+
+def loaded_modules(statement):
+    code = f'{statement}\nimport sys\nprint(" ".join(sorted(sys.modules)))'
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+def test_import_defers_backends():
+    modules = loaded_modules('import sprinkler')
+    assert not {'openai', 'aiohttp', 'pydantic', 'sprinkler.runnable'} & modules
+
+    modules = loaded_modules(
+        'from sprinkler.runnable.task import ChatCompletionTask\n'
+        'from sprinkler import Task\n'
+        'Task("t", lambda a: a)'
+    )
+    assert not {'openai', 'aiohttp', 'pydantic'} & modules
+
+
+def test_import_defers_process_and_database_modules():
+    modules = loaded_modules(
+        'from sprinkler import Task, Pipeline, WorkerPool, Runtime\n'
+        'from sprinkler.cache import SQLiteCache'
+    )
+    assert not {'multiprocessing', 'sqlite3'} & modules
+
+
+def test_lazy_exports():
+    assert set(sprinkler.__all__) <= set(dir(sprinkler))
+    assert sprinkler.Task is sprinkler.runnable.Task
+
+    with pytest.raises(AttributeError):
+        sprinkler.Missing
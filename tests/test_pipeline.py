@@ -1,4 +1,14 @@
+from typing import Any
+import threading
+
+import pytest
+
 from sprinkler import Task, Pipeline, Ctx
+from sprinkler.cache import stable_hash
+
+
+def inc(x: int) -> int:
+    return x + 1
 
 
 def test_pipeline():
@@ -202,4 +212,255 @@ def test_pipeline_with_context2():
 
     output = p.run(2)
 
-    assert output == 70
\ No newline at end of file
+    assert output == 70
+
+def _define(source):
+    namespace = {}
+    exec(source, namespace)
+    return namespace['op']
+
+
+def test_pipeline_stage_cache(tmp_path):
+    from sprinkler.cache import DiskCache
+
+    calls = []
+
+    def load(path: str) -> str:
+        calls.append('load')
+        return path.upper()
+
+    def summarize(text: str, style: Ctx[str]) -> str:
+        calls.append('summarize')
+        return f'{style}: {text}'
+
+    def build(last):
+        return Pipeline('p', stage_cache=DiskCache(tmp_path)).add(
+            Task('load', load),
+            Task('summarize', summarize),
+            Task('format', last)
+        )
+
+    first = _define('def op(text: str) -> str:\n    return text + "!"')
+    assert build(first).run_with_context({'style': 'short'}, 'doc') == 'short: DOC!'
+    assert calls == ['load', 'summarize']
+
+    # edited last stage reuses outputs of earlier stages
+    edited = _define('def op(text: str) -> str:\n    return text + "?"')
+    assert build(edited).run_with_context({'style': 'short'}, 'doc') == 'short: DOC?'
+    assert calls == ['load', 'summarize']
+
+    # changed context value read by a stage
+    assert build(edited).run_with_context({'style': 'long'}, 'doc') == 'long: DOC?'
+    assert calls == ['load', 'summarize', 'summarize']
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_cache_async():
+    from sprinkler.cache import LRUCache
+
+    calls = []
+
+    def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    pipeline = Pipeline('p', stage_cache=LRUCache()).add(
+        Task('t1', double), Task('t2', double)
+    )
+
+    assert await pipeline.arun(1) == await pipeline.arun(1) == 4
+    assert calls == [1, 2]
+
+
+def test_pipeline_stage_cache_ignores_unread_context():
+    from sprinkler.cache import LRUCache
+
+    calls = []
+
+    def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    # unpicklable and mutable values which no stage reads
+    pipeline = Pipeline(
+        'p', stage_cache=LRUCache(), context={'lock': threading.Lock(), 'log': []}
+    ).add(Task('t1', double), Task('t2', double))
+
+    assert pipeline.run(1) == 4
+    pipeline.context.global_context['log'].append('run')
+    assert pipeline.run(1) == 4
+    assert calls == [1, 2]
+
+
+def test_pipeline_stage_cache_reads_member_context():
+    from sprinkler.cache import LRUCache
+
+    def punctuate(text: str, suffix: Ctx[str]) -> str:
+        return text + suffix
+
+    cache = LRUCache()
+
+    def make(suffix: str) -> Pipeline:
+        return Pipeline('p', stage_cache=cache).add(
+            Task('t', punctuate, context={'suffix': suffix}),
+            Pipeline('inner', context={'suffix': suffix}).add(Task('t2', punctuate))
+        )
+
+    assert make('!').run('a') == 'a!!'
+    assert make('?').run('a') == 'a??'
+    assert make('!').run('a') == 'a!!'
+    assert cache.stats()['hits'] == 2
+
+
+def test_fingerprint_follows_helpers():
+    helper = 'def helper(text):\n    return text + "{}"\n'
+    op = 'def op(text: str) -> str:\n    return helper(text)\n'
+
+    first = Task('t', _define(helper.format('!') + op))
+    edited = Task('t', _define(helper.format('?') + op))
+    same = Task('t', _define(helper.format('!') + op))
+
+    assert first.fingerprint() != edited.fingerprint()
+    assert first.fingerprint() == same.fingerprint()
+
+
+def test_pipeline_checkpoint_resume(tmp_path):
+    from sprinkler.checkpoint import CheckpointStore
+
+    calls = []
+    fail = {'t3': True}
+
+    def make(id_):
+        def operation(x: int) -> int:
+            calls.append(id_)
+            if fail.get(id_):
+                raise RuntimeError(f'{id_} failed')
+            return x + 1
+        return Task(id_, operation)
+
+    store = CheckpointStore(tmp_path)
+    pipeline = Pipeline('p', checkpoint=store).add(*[make(f't{i}') for i in range(1, 5)])
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(0, __run_id__='nightly')
+    assert calls == ['t1', 't2', 't3']
+
+    fail['t3'] = False
+    assert pipeline.run(0, __run_id__='nightly') == 4
+    assert calls == ['t1', 't2', 't3', 't3', 't4']
+
+    # checkpoint is removed after success
+    assert pipeline.run(0, __run_id__='nightly') == 4
+    assert calls.count('t1') == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_checkpoint_async_off_loop(tmp_path):
+    from sprinkler.checkpoint import CheckpointStore
+
+    threads = []
+
+    class RecordingStore(CheckpointStore):
+        def load(self, *args):
+            threads.append(threading.current_thread())
+            return super().load(*args)
+
+        def save(self, *args):
+            threads.append(threading.current_thread())
+            return super().save(*args)
+
+        def clear(self, *args):
+            threads.append(threading.current_thread())
+            return super().clear(*args)
+
+    pipeline = Pipeline('p', checkpoint=RecordingStore(tmp_path)).add(
+        Task('t1', inc), Task('t2', inc)
+    )
+
+    assert await pipeline.arun(0, __run_id__='run') == 2
+    # load, save of each member and clear run in threads, not on the loop
+    assert len(threads) == 4
+    assert threading.current_thread() not in threads
+
+
+def test_pipeline_checkpoint_unpicklable_output(tmp_path):
+    from sprinkler.checkpoint import CheckpointStore
+
+    def lock(x: int) -> Any:
+        return threading.Lock()
+
+    def fail(x: Any) -> int:
+        raise RuntimeError('fail')
+
+    store = CheckpointStore(tmp_path)
+    pipeline = Pipeline('p', checkpoint=store).add(
+        Task('t1', inc), Task('lock', lock), Task('t3', lambda x: 1)
+    )
+
+    # the run succeeds without checkpoint of the output
+    with pytest.warns(RuntimeWarning):
+        assert pipeline.run(0, __run_id__='run') == 1
+
+    pipeline = Pipeline('p', checkpoint=store).add(
+        Task('t1', inc), Task('lock', lock), Task('fail', fail)
+    )
+    with pytest.warns(RuntimeWarning), pytest.raises(RuntimeError):
+        pipeline.run(0, __run_id__='run')
+    assert len(store.load('p', 'run', stable_hash((0,), {}))) == 1
+
+
+def test_pipeline_checkpoint_without_fingerprint(tmp_path):
+    from sprinkler.checkpoint import CheckpointStore
+
+    calls = []
+
+    class Unhashable(Task):
+        def fingerprint(self) -> str:
+            raise TypeError('unhashable')
+
+    def record(x: int) -> int:
+        calls.append(x)
+        return x + 1
+
+    def fail(x: int) -> int:
+        raise RuntimeError('fail')
+
+    pipeline = Pipeline('p', checkpoint=CheckpointStore(tmp_path)).add(
+        Unhashable('t1', record), Task('fail', fail)
+    )
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pipeline.run(0, __run_id__='run')
+
+    # member without fingerprint never resumes
+    assert calls == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_checkpoint_other_input(tmp_path):
+    from sprinkler.checkpoint import CheckpointStore
+
+    calls = []
+
+    def first(x: int) -> int:
+        calls.append(x)
+        return x
+
+    def second(x: int, limit: Ctx[int]) -> int:
+        if x > limit:
+            raise ValueError(x)
+        return x
+
+    pipeline = Pipeline('p', checkpoint=CheckpointStore(tmp_path)).add(
+        Task('first', first), Task('second', second)
+    )
+
+    for x in (5, 6):
+        with pytest.raises(ValueError):
+            await pipeline.arun_with_context({'limit': 0}, x, __run_id__='run')
+
+    # input of run changed, so it started over
+    assert calls == [5, 6]
+    assert await pipeline.arun_with_context({'limit': 10}, 6, __run_id__='run') == 6
+    assert calls == [5, 6]
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sprinkler import Task, Pipeline, Group, Ctx, Runtime, Tracer
+from sprinkler.cache import LRUCache
+from sprinkler.runnable import Plan
+from sprinkler.runnable.plan import _Step, _TaskStep, _PipelineStep, _GroupStep
+
+
+def inc(x: int) -> int:
+    return x + 1
+
+def scale(x: int, factor: Ctx[int]) -> int:
+    return x * factor
+
+def first(x: int, a: Ctx[int, 't1']) -> int:
+    return x + a
+
+async def ainc(x: int) -> int:
+    return x + 1
+
+def to_int(a: str) -> int:
+    return a
+
+def double(a: int) -> int:
+    return a * 2
+
+
+def make_pipeline() -> Pipeline:
+    return Pipeline('p').add(
+        Task('t1', inc),
+        Task('t2', scale),
+        Task('t3', first),
+        Group('g').add(
+            Task('g1', inc),
+            Pipeline('gp').add(Task('g2', ainc), Task('g3', scale))
+        )
+    )
+
+
+def test_plan_same_output_as_run():
+    pipeline = make_pipeline()
+    plan = pipeline.compile()
+
+    assert isinstance(plan, Plan)
+    assert isinstance(plan.root, _PipelineStep)
+    assert [type(step) for step in plan.root.steps] == [
+        _TaskStep, _TaskStep, _TaskStep, _GroupStep
+    ]
+
+    expected = pipeline.run_with_context({'factor': 3}, 1)
+    assert expected == {'g1': 9, 'gp': 27}
+    assert plan.run_with_context({'factor': 3}, 1) == expected
+    # context is read on each run
+    assert plan.run_with_context({'factor': 2}, 1) == pipeline.run_with_context({'factor': 2}, 1)
+
+    with Runtime(2) as runtime:
+        assert plan.run_with_context({'factor': 3}, 1, __executor__=runtime) == expected
+    assert plan.run_with_context({'factor': 3}, 1, __executor__='asyncio') == expected
+
+
+@pytest.mark.asyncio
+async def test_plan_arun():
+    pipeline = make_pipeline()
+    plan = pipeline.compile()
+
+    expected = await pipeline.arun_with_context({'factor': 3}, 1)
+    assert await plan.arun_with_context({'factor': 3}, 1) == expected
+
+
+def test_plan_task_and_group():
+    task = Task('t', inc)
+    assert task.compile()(1) == 2
+    assert task.compile().run(x=1) == 2
+
+    group = Group('g').add(Task('t1', inc), Task('t2', double))
+    plan = group.compile()
+    assert plan.run(__default__=1) == group.run(__default__=1) == {'t1': 2, 't2': 2}
+    assert plan.run(t1=1, t2=5) == {'t1': 2, 't2': 10}
+
+
+def test_plan_validation():
+    p = Pipeline('p', validation='boundary').add(
+        Task('t1', to_int),
+        Group('g').add(Task('t2', double), Task('t3', to_int))
+    )
+    assert p.compile().run('3') == p.run('3') == {'t2': 33, 't3': 3}
+
+    assert Task('t', to_int, validation='off').compile().run('3') == '3'
+    assert Task('t', to_int).compile().run('3') == 3
+
+
+def test_plan_task_with_cache():
+    calls = []
+
+    def operation(x: int) -> int:
+        calls.append(x)
+        return x
+
+    plan = Task('t', operation, cache=LRUCache()).compile()
+    assert not plan.root.direct
+    assert plan.run(1) == plan.run(1) == 1
+    assert calls == [1]
+
+
+def test_plan_shared_by_threads():
+    pipeline = make_pipeline()
+    plan = pipeline.compile()
+
+    with ThreadPoolExecutor(8) as pool:
+        outputs = list(pool.map(
+            lambda i: plan.run_with_context({'factor': i}, i), range(32)
+        ))
+    assert outputs == [pipeline.run_with_context({'factor': i}, i) for i in range(32)]
+
+
+def test_plan_opaque_steps():
+    class Custom(Task):
+        def run_with_context(self, context, *args, **kwargs):
+            return super().run_with_context(context, *args, **kwargs) * 10
+
+    p = Pipeline('p').add(
+        Custom('c', inc),
+        Pipeline('cached', stage_cache=LRUCache()).add(Task('t', inc)),
+        Group('first', mode='first').add(Task('f', inc))
+    )
+    plan = p.compile()
+
+    assert [type(step) for step in plan.root.steps] == [_Step, _Step, _Step]
+    assert plan.run(1) == p.run(1)
+
+
+def test_plan_traced():
+    plan = Pipeline('p').add(Task('t1', inc), Task('t2', inc)).compile()
+
+    with Tracer() as tracer:
+        assert plan.run(1) == 3
+    names = {(s['category'], s['name']) for s in tracer.to_json()}
+    assert {('pipeline', 'p'), ('task', 't1'), ('task', 't2')} <= names
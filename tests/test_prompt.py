@@ -66,4 +66,16 @@ def test_prompt_task_base():
 
     assert output == [{'role': 'user', 'content': 'hello gpt!'},
                     {'role': 'user', 'content': 'Jungsik is genius'}]
-    
\ No newline at end of file
+    
+
+def test_prompt_task_messages_are_not_leaked_across_runs():
+    from sprinkler import Pipeline
+
+    messages = [PromptTemplate('Jungsik is {identity}')]
+    p = Pipeline('p', validation='off').add(
+        PromptTask('prompt#1', {'messages': messages})
+    )
+
+    assert p.run({'identity': 'genius'}) == [{'role': 'user', 'content': 'Jungsik is genius'}]
+    assert p.run({'identity': 'kind'}) == [{'role': 'user', 'content': 'Jungsik is kind'}]
+    assert isinstance(messages[0], PromptTemplate)
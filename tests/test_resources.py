@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from sprinkler import Task, Group, Runtime
+from sprinkler.resources import Resource, get_resource_registry
+
+
+class Gauge:
+    """Counter of concurrent calls"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.current -= 1
+
+
+@pytest.fixture
+def registry():
+    registry = get_resource_registry()
+    yield registry
+    for name in list(registry.stats()):
+        registry.remove(name)
+
+
+def test_resource_weights():
+    resource = Resource('db', 3)
+    resource.acquire(2)
+    assert resource.available == 1
+
+    acquired = threading.Event()
+
+    def acquire():
+        resource.acquire(2)
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    resource.release(2)
+    thread.join()
+    assert acquired.is_set()
+    assert resource.available == 1
+
+    with pytest.raises(ValueError):
+        resource.acquire(4)
+
+
+@pytest.mark.asyncio
+async def test_resource_cancelled_waiter():
+    resource = Resource('db', 1)
+    await resource.aacquire()
+
+    waiter = asyncio.ensure_future(resource.aacquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    resource.release()
+    assert resource.available == 1
+
+
+def test_task_resources_in_nested_groups(registry):
+    registry.set('api', 2)
+    gauge = Gauge()
+
+    def call(a: int) -> int:
+        with gauge:
+            time.sleep(0.02)
+        return a
+
+    group = Group('outer').add(*[
+        Group(f'inner{i}').add(*[
+            Task(f'task{j}', call, resources={'api': 1}) for j in range(4)
+        ])
+        for i in range(3)
+    ])
+
+    with Runtime(16) as runtime:
+        output = group.run(__default__=1, __executor__=runtime)
+
+    assert output['inner0'] == {f'task{j}': 1 for j in range(4)}
+    assert gauge.peak == 2
+    assert registry.get('api').available == 2
+
+
+@pytest.mark.asyncio
+async def test_async_task_resources(registry):
+    registry.set('api', 3)
+    gauge = Gauge()
+
+    async def call(a: int) -> int:
+        with gauge:
+            await asyncio.sleep(0.01)
+        return a
+
+    # names without capacity are not limited
+    group = Group('group').add(*[
+        Task(f'task{i}', call, resources={'api': 1, 'other': 5}) for i in range(10)
+    ])
+
+    assert await group.arun(__default__=1) == {f'task{i}': 1 for i in range(10)}
+    assert gauge.peak == 3
@@ -0,0 +1,121 @@
+import pytest
+
+from sprinkler import Task, RetryPolicy, RetryError
+from sprinkler.retry import retry_after, is_transient
+from sprinkler.runnable.task import ChatCompletionTask
+
+
+MESSAGES = [{'role': 'user', 'content': 'hello'}]
+
+
+class StatusError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f'status {status}')
+        self.http_status = status
+        self.headers = headers or {}
+
+
+def flaky(failures):
+    errors = list(failures)
+    calls = []
+
+    def operation(x: int) -> int:
+        calls.append(x)
+        if errors:
+            raise errors.pop(0)
+        return x + 1
+
+    return operation, calls
+
+
+def test_classifier_and_retry_after():
+    assert is_transient(StatusError(429))
+    assert is_transient(StatusError(503))
+    assert not is_transient(StatusError(400))
+    assert is_transient(ConnectionError())
+    assert not is_transient(ValueError())
+
+    assert retry_after(StatusError(429, {'Retry-After': '2'})) == 2
+    assert retry_after(StatusError(429)) is None
+
+
+def test_backoff_delay():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+
+    assert [policy.delay(i) for i in range(1, 5)] == [1, 2, 4, 5]
+    assert policy.delay(1, StatusError(429, {'retry-after': '3'})) == 3
+
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    assert all(0 <= policy.delay(3) <= 4 for _ in range(100))
+
+
+def test_task_retry():
+    operation, calls = flaky([StatusError(503), ConnectionError()])
+    task = Task('t', operation, retry=RetryPolicy(3, base_delay=0))
+
+    assert task.run(1) == 2
+    assert len(calls) == 3
+
+
+def test_task_retry_exhausted():
+    operation, calls = flaky([StatusError(503)] * 3)
+    task = Task('t', operation, retry=RetryPolicy(2, base_delay=0))
+
+    with pytest.raises(RetryError) as info:
+        task.run(1)
+
+    assert info.value.attempts == 2
+    assert isinstance(info.value.__cause__, StatusError)
+
+
+def test_task_retry_fatal_error():
+    operation, calls = flaky([ValueError('fatal')])
+    task = Task('t', operation, retry=3)
+
+    with pytest.raises(ValueError):
+        task.run(1)
+    assert len(calls) == 1
+
+
+def test_task_retry_budget():
+    operation, calls = flaky([StatusError(429, {'Retry-After': '10'})])
+    task = Task('t', operation, retry=RetryPolicy(3, budget=1))
+
+    with pytest.raises(RetryError, match='budget'):
+        task.run(1)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_task_aretry():
+    operation, calls = flaky([TimeoutError()])
+    task = Task('t', operation, retry=RetryPolicy(2, base_delay=0))
+
+    assert await task.arun(1) == 2
+    assert len(calls) == 2
+
+
+def test_chat_completion_retry(stub_openai):
+    stub_openai.failures = [(429, {'Retry-After': '0'}), (500, {})]
+    task = ChatCompletionTask('chat', {
+        'api_base': stub_openai.api_base,
+        'retry': RetryPolicy(3, base_delay=0.01)
+    })
+
+    assert task.run(MESSAGES) == 'echo: hello'
+    assert len(stub_openai.requests) == 3
+
+
+def test_chat_completion_raises(stub_openai):
+    stub_openai.failures = [(429, {})] * 2
+    task = ChatCompletionTask('chat', {
+        'api_base': stub_openai.api_base,
+        'retry_count': 2
+    })
+
+    with pytest.raises(RetryError):
+        task.run(MESSAGES)
+
+    stub_openai.failures = [(400, {})]
+    with pytest.raises(Exception, match='stub error 400'):
+        task.run(MESSAGES)
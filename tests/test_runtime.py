@@ -0,0 +1,79 @@
+import threading
+
+from sprinkler import Pipeline, Group, Task
+from sprinkler.runtime import Runtime, get_default_runtime
+
+
+def identity(a: int) -> int:
+    return a
+
+
+def make_tree(depth: int, width: int, prefix: str = 'g'):
+    group = Group(prefix)
+    for i in range(width):
+        id_ = f'{prefix}{i}'
+        if depth == 0:
+            group.add(Task(id_, identity))
+        else:
+            group.add(Pipeline(id_).add(make_tree(depth - 1, width, id_)))
+    return group
+
+
+def test_runtime_runs_nested_groups_without_deadlock():
+    tree = make_tree(3, 3)
+
+    with Runtime(2) as runtime:
+        output = tree.run(__default__=1, __executor__=runtime)
+
+    assert list(leaves(output)) == [1] * 3 ** 4
+
+
+def leaves(output):
+    if isinstance(output, dict):
+        for value in output.values():
+            yield from leaves(value)
+    else:
+        yield output
+
+
+def test_runtime_bounds_threads():
+    running = []
+    peak = []
+    threads = set()
+    lock = threading.Lock()
+    # the first works wait for each other, so they run at once
+    overlap = threading.Barrier(3)
+
+    def work(a: int) -> int:
+        with lock:
+            running.append(a)
+            peak.append(len(running))
+            threads.add(threading.get_ident())
+            first = len(peak) <= 3
+        if first:
+            overlap.wait(5)
+        with lock:
+            running.remove(a)
+        return a
+
+    group = Group('g').add(*[
+        Pipeline(f'p{i}').add(Group(f'g{i}').add(*[
+            Task(f't{i}{j}', work) for j in range(4)
+        ])) for i in range(4)
+    ])
+
+    with Runtime(3) as runtime:
+        group.run(__default__=1, __executor__=runtime)
+
+    assert max(peak) == 3
+    assert len(threads) == 3
+
+
+def test_default_runtime_is_shared():
+    group = Group('g').add(Task('a', identity), Task('b', identity))
+
+    group.run(__default__=1)
+    runtime = get_default_runtime()
+    group.run(__default__=2)
+
+    assert get_default_runtime() is runtime
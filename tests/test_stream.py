@@ -0,0 +1,154 @@
+from typing import AsyncIterator, Iterator
+import asyncio
+import threading
+
+import pytest
+
+from sprinkler import Pipeline, Task, Ctx, Runtime, Tracer
+
+
+def count(n: int) -> Iterator[int]:
+    for i in range(n):
+        yield str(i)
+
+
+async def acount(n: int) -> AsyncIterator[int]:
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield str(i)
+
+
+def double(a: int) -> int:
+    return a * 2
+
+
+def test_streaming_task():
+    task = Task('count', count)
+
+    assert task.streaming
+    assert list(task.stream(3)) == [0, 1, 2]
+    assert task.run(3) == [0, 1, 2]
+
+
+def test_streaming_async_task():
+    task = Task('count', acount)
+
+    assert list(task.stream(3)) == [0, 1, 2]
+    assert task.run(3) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_streaming_task_arun():
+    task = Task('count', acount)
+
+    assert [item async for item in task.astream(3)] == [0, 1, 2]
+    assert await task.arun(3) == [0, 1, 2]
+
+
+def test_pipeline_stream():
+    def offset(a: int, base: Ctx[int, 'count'], b: Ctx[int, 'start']) -> int:
+        return a + base + b
+
+    p = Pipeline('pipeline').add(
+        Task('start', double),
+        Task('count', count),
+        Task('double', double),
+        Task('offset', offset)
+    )
+
+    assert list(p.stream(2)) == [4, 7, 10, 13]
+    assert p.run(2) == [4, 7, 10, 13]
+
+
+def test_pipeline_stream_overlaps_stages():
+    consumed = threading.Event()
+
+    def produce(n: int) -> Iterator[int]:
+        yield 0
+        # the next stage consumes item 0 while this stage is still running
+        assert consumed.wait(5)
+        yield from range(1, n)
+
+    def consume(a: int) -> int:
+        consumed.set()
+        return a
+
+    p = Pipeline('pipeline').add(Task('produce', produce), Task('consume', consume))
+
+    assert p.run(8) == list(range(8))
+
+
+def test_pipeline_stream_bounded_runtime():
+    def repeat(a: int) -> Iterator[int]:
+        yield a
+        yield a
+
+    p = Pipeline('pipeline', stream_buffer=1).add(
+        Task('count', count), Task('repeat', repeat), Task('double', double)
+    )
+
+    # stages without a free worker run in the consuming thread
+    with Runtime(1) as runtime:
+        assert p.run(3, __executor__=runtime) == [0, 0, 2, 2, 4, 4]
+
+        stream = p.stream(100, __executor__=runtime)
+        assert next(stream) == 0
+        stream.close()
+        # the worker is released when the stream stops
+        assert runtime.try_submit(double, 1).result() == 2
+
+
+def test_pipeline_stream_traced():
+    p = Pipeline('pipeline').add(Task('count', count), Task('double', double))
+
+    with Tracer() as tracer:
+        assert p.run(2) == [0, 2]
+
+    # stages run in workers within the span of pipeline
+    spans = {(s['category'], s['name']): s for s in tracer.to_json()}
+    assert spans['task', 'double']['parent'] == spans['pipeline', 'pipeline']['id']
+    assert spans['queue', 'produce']['parent'] == spans['pipeline', 'pipeline']['id']
+
+
+def test_pipeline_stream_of_streams():
+    def repeat(a: int) -> Iterator[int]:
+        for _ in range(a):
+            yield a
+
+    p = Pipeline('pipeline').add(Task('count', count), Task('repeat', repeat))
+
+    assert p.run(4) == [1, 2, 2, 3, 3, 3]
+
+
+def test_pipeline_stream_error():
+    def fail(a: int) -> int:
+        if a == 2:
+            raise ValueError('fail')
+        return a
+
+    p = Pipeline('pipeline').add(Task('count', count), Task('fail', fail))
+
+    with pytest.raises(ValueError):
+        p.run(5)
+
+
+def test_pipeline_stream_stops_early():
+    def infinite(a: int) -> Iterator[int]:
+        while True:
+            yield a
+
+    p = Pipeline('pipeline', stream_buffer=2).add(
+        Task('infinite', infinite), Task('double', double)
+    )
+
+    stream = p.stream(1)
+    assert [next(stream) for _ in range(3)] == [2, 2, 2]
+    stream.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_astream():
+    p = Pipeline('pipeline').add(Task('count', acount), Task('double', double))
+
+    assert [output async for output in p.astream(3)] == [0, 2, 4]
+    assert await p.arun(3) == [0, 2, 4]
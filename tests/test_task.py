@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Dict, Union, Tuple
+from typing import Any, List, Dict, Union, Tuple
 
 import pytest
 
@@ -231,4 +231,137 @@ def test_task_without_paramter():
 
     output = task()
 
-    assert output == 5
\ No newline at end of file
+    assert output == 5
+
+def test_validation_models_are_cached():
+    def operation(a: str, b: int) -> str:
+        return a * b
+
+    task = Task(
+        'task1',
+        operation
+    )
+    input_model, output_model = task._input_model, task._output_model
+
+    task.run('sprinkler', 3)
+    task.run('sprinkler', 2)
+
+    assert task._input_model is input_model
+    assert task._output_model is output_model
+
+
+def test_invalid_annotation_fails_at_definition():
+    def operation(a: Ann[5]) -> str:
+        return a
+
+    with pytest.raises(TypeError):
+        Task('task1', operation)
+
+
+def test_models_built_once_by_concurrent_runs():
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest import mock
+
+    task = Task('task1', _repeat)
+    build = mock.Mock(wraps=task._build_models)
+
+    with mock.patch.object(task, '_build_models', build):
+        with ThreadPoolExecutor(8) as pool:
+            outputs = list(pool.map(lambda b: task.run('s', b), range(16)))
+
+    assert outputs == ['s' * b for b in range(16)]
+    assert build.call_count == 1
+
+
+def test_task_pickle_rebuilds_models():
+    import pickle
+
+    task = pickle.loads(pickle.dumps(Task('task1', _repeat)))
+
+    assert task.run('sprinkler', 2) == 'sprinklersprinkler'
+
+
+def _repeat(a: str, b: int) -> str:
+    return a * b
+
+
+def test_task_memoization():
+    import pickle
+    from sprinkler.cache import LRUCache
+
+    calls = []
+
+    def normalize(text: str, options: dict = None) -> list:
+        calls.append(text)
+        return text.strip().lower().split()
+
+    task = Task('normalize', normalize, cache=LRUCache(2, ttl=60))
+
+    output = task.run(' A B ')
+    output.append('mutated')
+
+    assert task.run(' A B ') == ['a', 'b']
+    assert task.run(' a b ', {'x': 1}) == ['a', 'b']
+    assert len(calls) == 2
+    assert task.cache.stats() == {'hits': 1, 'misses': 2, 'evictions': 0, 'size': 2}
+
+    restored = pickle.loads(pickle.dumps(task.cache))
+    assert len(restored) == 2
+
+
+def test_task_memoization_key():
+    calls = []
+
+    def greet(name: str, request_id: int) -> str:
+        calls.append(request_id)
+        return f'hello {name}'
+
+    task = Task('greet', greet, cache=16, cache_key=lambda input_: input_['name'])
+
+    assert task.run('kim', 1) == task.run('kim', 2) == 'hello kim'
+    assert calls == [1]
+
+
+def test_task_memoization_input_types():
+    import threading
+    from sprinkler.cache import LRUCache
+
+    calls = []
+
+    def keys(mapping: Any) -> list:
+        calls.append(mapping)
+        return [type(key).__name__ for key in mapping]
+
+    task = Task('keys', keys, cache=10)
+
+    assert task.run({1: 'a'}) == ['int']
+    assert task.run({'1': 'a'}) == ['str']
+    assert task.run({1: 'a', 'b': 2}) == ['int', 'str']
+    # input which can't be hashed isn't memoized
+    lock = threading.Lock()
+    assert task.run({'lock': lock}) == task.run({'lock': lock}) == ['str']
+    assert len(calls) == 5
+
+    # outputs of the old operation aren't returned after it changes
+    cache = LRUCache()
+    assert Task('t', lambda x: x + 1, cache=cache).run(1) == 2
+    assert Task('t', lambda x: x * 10, cache=cache).run(1) == 10
+
+
+@pytest.mark.asyncio
+async def test_task_memoization_async():
+    calls = []
+
+    async def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    task = Task('double', double, cache=16)
+
+    assert await task.arun(2) == await task.arun(2) == 4
+    assert calls == [2]
+
+
+def test_task_rejects_bool_cache():
+    with pytest.raises(TypeError):
+        Task('double', lambda x: x, cache=True)
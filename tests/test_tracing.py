@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from sprinkler import Task, Pipeline, Group, Runtime, Tracer
+from sprinkler.tracing import _NOOP, span
+
+
+def inc(x: int) -> int:
+    return x + 1
+
+
+def test_tracing_disabled():
+    assert span('bind') is _NOOP
+    with Tracer():
+        assert span('bind') is not _NOOP
+    assert span('bind') is _NOOP
+    assert Task('t', inc).run(1) == 2
+
+
+def test_tracing_pipeline_group(tmp_path):
+    pipeline = Pipeline('p').add(
+        Task('t1', inc),
+        Group('g').add(Task('t2', inc), Task('t3', inc))
+    )
+
+    with Tracer() as tracer:
+        output = pipeline.run(1, __executor__=Runtime(2))
+    assert output == {'t2': 3, 't3': 3}
+
+    spans = {(s['category'], s['name']): s for s in tracer.to_json()}
+    root = spans['pipeline', 'p']
+    assert root['parent'] is None
+    assert spans['task', 't1']['parent'] == root['id']
+    assert spans['group', 'g']['parent'] == root['id']
+
+    # members of group ran in worker threads with the group as parent
+    group_id = spans['group', 'g']['id']
+    assert spans['task', 't2']['parent'] == group_id
+    assert spans['queue', 't2']['parent'] == group_id
+    assert spans['task', 't2']['thread'] != root['thread']
+
+    summary = tracer.summary()
+    for phase in ('context', 'bind', 'validate_input', 'operation', 'validate_output'):
+        assert summary[f'phase:{phase}']['count'] == 3
+
+    tracer.dump_chrome(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert {'name', 'cat', 'ph', 'ts', 'dur', 'pid', 'tid'} <= set(events[0])
+
+
+@pytest.mark.asyncio
+async def test_tracing_async_error():
+    def fail(x: int) -> int:
+        raise ValueError(x)
+
+    pipeline = Pipeline('p').add(Task('t1', inc), Task('t2', fail))
+
+    with Tracer() as tracer:
+        with pytest.raises(ValueError):
+            await pipeline.arun(1)
+
+    spans = {s['name']: s for s in tracer.to_json()}
+    assert 'ValueError' in spans['t2']['attributes']['error']
+    assert spans['t2']['parent'] == spans['p']['id']
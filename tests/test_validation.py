@@ -0,0 +1,89 @@
+from typing import Any
+
+import pytest
+
+from sprinkler import Task, Pipeline, Group, Validation
+
+
+def to_int(a: str) -> int:
+    return a
+
+def double(a: int) -> int:
+    return a * 2
+
+def to_str(a: int) -> str:
+    return a
+
+
+def test_validation_off():
+    task = Task('task', to_int, validation='off')
+
+    assert task.run('3') == '3'
+
+
+def test_validation_strict_by_default():
+    task = Task('task', to_int)
+
+    assert task.run('3') == 3
+
+
+def test_validation_sampled():
+    assert Task('task', to_int, validation=0.0).run('3') == '3'
+    assert Task('task', to_int, validation=1.0).run('3') == 3
+
+
+def test_validation_boundary_of_pipeline():
+    p = Pipeline('pipeline', validation='boundary').add(
+        Task('t1', to_int),
+        Task('t2', double),
+        Task('t3', to_str)
+    )
+
+    # outputs of t1 and t2 are passed as they are
+    assert p.run('3') == '33'
+
+
+def test_validation_boundary_of_nested_group():
+    p = Pipeline('pipeline', validation='boundary').add(
+        Task('t1', to_int),
+        Group('group').add(Task('t2', double), Task('t3', to_str))
+    )
+
+    assert p.run('3') == {'t2': 33, 't3': '3'}
+
+
+def test_validation_policy_of_task_overrides_pipeline():
+    p = Pipeline('pipeline', validation='off').add(
+        Task('t1', to_int, validation='strict'),
+        Task('t2', double)
+    )
+
+    assert p.run('3') == 6
+
+
+def test_validation_skips_any():
+    def operation(a, b: Any = None) -> Any:
+        return a
+
+    task = Task('task', operation)
+    value = {'a': [1, 2]}
+
+    assert task._input_model is None
+    assert task._output_model is None
+    assert task.run(value) is value
+
+    with pytest.raises(Exception) as err:
+        task.run(b=1)
+
+    assert 'input' in err.value.args[0]
+
+
+def test_validation_invalid_mode():
+    with pytest.raises(ValueError):
+        Validation('always')
+
+    # bool is not a sampling rate
+    with pytest.raises(TypeError):
+        Validation.of(True)
+    with pytest.raises(TypeError):
+        Task('t', lambda a: a, validation=False)
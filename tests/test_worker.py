@@ -0,0 +1,207 @@
+import mmap
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from sprinkler import Task, Pipeline, Group, Ctx, WorkerPool
+from sprinkler.worker import walk
+
+
+def make_group():
+    offset = 10
+
+    # closures and lambdas can't be pickled
+    def add(x: int) -> int:
+        return x + offset
+
+    def scale(x: int, factor: Ctx[int]) -> int:
+        return x * factor
+
+    return Pipeline('p', context={'factor': 3}).add(
+        Task('first', lambda x: x + 1),
+        Group('g').add(Task('add', add), Task('scale', scale))
+    )
+
+
+def test_walk():
+    pipeline = make_group()
+    assert [r.id for r in walk(pipeline)] == ['p', 'first', 'g', 'add', 'scale']
+
+
+def test_process_pool_fails_with_closures():
+    pipeline = make_group()
+
+    with ProcessPoolExecutor(1) as pool:
+        with pytest.raises((pickle.PicklingError, AttributeError)):
+            pipeline.run(1, __executor__=pool)
+
+
+def test_worker_pool_runs_registered_runnables():
+    pipeline = make_group()
+
+    # closures need the fork start method
+    with WorkerPool(pipeline, max_workers=2, mp_context=multiprocessing.get_context('fork')) as pool:
+        assert pool.index(pipeline.members[1].members[0]) == 3
+        assert pipeline.run(1, __executor__=pool) == {'add': 12, 'scale': 6}
+        assert pipeline.run(2, __executor__=pool) == {'add': 13, 'scale': 9}
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def scale(x: int, factor: Ctx[int]) -> int:
+    return x * factor
+
+
+def test_worker_pool_registers_context():
+    pipeline = Pipeline('p', context={'factor': 3}).add(
+        Task('first', square),
+        Group('g').add(Task('square', square), Task('scale', scale))
+    )
+
+    with WorkerPool(pipeline, max_workers=2) as pool:
+        assert pipeline.run(2, __executor__=pool) == {'square': 16, 'scale': 12}
+        assert pipeline.run_with_context({'factor': 4}, 2, __executor__=pool) == {
+            'square': 16, 'scale': 16
+        }
+
+        # layers of registered runnables are sent as indices
+        context = pipeline.context.child({'factor': 4})
+        sent = pool._send(context)
+        assert sent.global_maps[0] == {'factor': 4}
+        assert all(isinstance(layer, int) for layer in sent.global_maps[1:])
+
+
+@Task('camel')
+def make_camel(text: str) -> str:
+    return ''.join(
+        word.lower() if i == 0 else word.capitalize()
+        for i, word in enumerate(text.split())
+    )
+
+
+@Task('shout')
+def shout(text: str) -> str:
+    return text.upper()
+
+
+def test_worker_pool_runs_decorated_tasks():
+    # the decorator binds the task to the name of its operation
+    group = Group('g').add(make_camel, shout)
+
+    with WorkerPool(group, mp_context=multiprocessing.get_context('forkserver')) as pool:
+        assert group.run(__default__='python sprinkler', __executor__=pool) == {
+            'camel': 'pythonSprinkler', 'shout': 'PYTHON SPRINKLER'
+        }
+
+
+README_EXAMPLE = """
+from sprinkler import Pipeline, Group, Task, Ctx, WorkerPool
+
+
+@Task('camel')
+def make_camel(text: str) -> str:
+    return ''.join(
+        word.lower() if i == 0 else word.capitalize()
+        for i, word in enumerate(text.split())
+    )
+
+def repeat(text: str, times: Ctx[int]) -> str:
+    return ''.join(ch * times for ch in text)
+
+def tile(text: str, times: Ctx[int]) -> str:
+    return text * times
+
+pipeline = Pipeline('pipeline', context={'times': 2}).add(
+    make_camel,
+    Group('group').add(
+        Task('repeat', repeat),
+        Task('tile', tile)
+    )
+)
+
+with WorkerPool(pipeline) as pool:
+    print(pipeline.run('python sprinkler', __executor__=pool))
+"""
+
+
+def test_worker_pool_readme_example(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    import sprinkler
+
+    script = tmp_path / 'example.py'
+    script.write_text(README_EXAMPLE)
+    root = str(Path(sprinkler.__file__).parents[1])
+
+    output = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, check=True,
+        env={**os.environ, 'PYTHONPATH': root}
+    ).stdout
+    assert output.strip() == str({
+        'repeat': 'ppyytthhoonnSSpprriinnkklleerr',
+        'tile': 'pythonSprinklerpythonSprinkler'
+    })
+
+
+def test_worker_pool_submits_other_calls():
+    with WorkerPool() as pool:
+        assert pool.submit(square, 3).result() == 9
+        assert list(pool.map(square, [1, 2])) == [1, 4]
+
+
+def checksum(data: bytes) -> int:
+    return sum(data[::4096])
+
+
+def reverse(data: bytes) -> bytes:
+    return data[::-1]
+
+
+class ZeroCopy(bytearray):
+
+    def __reduce_ex__(self, protocol):
+        return type(self)._from_buffer, (pickle.PickleBuffer(self),)
+
+    @classmethod
+    def _from_buffer(cls, buffer):
+        return memoryview(buffer)
+
+
+def test_shared_memory_transport(tmp_path):
+    from sprinkler.worker import SharedMemoryTransport
+
+    transport = SharedMemoryTransport(1024, tmp_path)
+    value = {'big': b'x' * 4096, 'array': bytearray(b'y' * 4096), 'small': b'z'}
+
+    packed = transport.pack(value)
+    assert len(packed.paths) == 2
+    assert all(os.stat(path).st_mode & 0o777 == 0o600 for path in packed.paths)
+    assert len(packed.data) < 1024
+
+    assert transport.unpack(packed) == value
+    assert list(tmp_path.iterdir()) == []
+
+    # out-of-band buffers are reconstructed on the mapping
+    view = transport.unpack(transport.pack(ZeroCopy(b'w' * 4096)))
+    assert isinstance(view.obj, mmap.mmap)
+    assert view == b'w' * 4096
+
+
+def test_worker_pool_shared_memory(tmp_path):
+    from sprinkler.worker import SharedMemoryTransport
+
+    group = Group('g').add(Task('checksum', checksum), Task('reverse', reverse))
+    data = bytes(range(256)) * 4096
+
+    with WorkerPool(group, transport=SharedMemoryTransport(1024, tmp_path)) as pool:
+        output = group.run(__default__=data, __executor__=pool)
+
+    assert output == {'checksum': checksum(data), 'reverse': data[::-1]}
+    assert list(tmp_path.iterdir()) == []